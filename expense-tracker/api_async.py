@@ -0,0 +1,668 @@
+"""
+Async versions of the authentication, expense and category endpoints.
+
+Enabled with ASYNC_DATABASE_ENABLED=true. These endpoints use an AsyncSession
+from getAsyncDb instead of the blocking Session from getDb, so a single worker
+can keep many requests in flight while they wait on the database instead of
+being capped by the size of FastAPI's threadpool. Paths, parameters and
+responses are identical to the synchronous endpoints in api_main.py, which
+they replace in place via installAsyncRoutes().
+"""
+from functools import partial
+from typing import Optional
+
+from fastapi import APIRouter, FastAPI, Depends, HTTPException, status, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from fastapi.routing import APIRoute
+from sqlalchemy import select, func
+from sqlalchemy.engine import RowMapping
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from database import getAsyncDb
+from models import User, Expense
+from schemas import (
+    UserCreate, UserResponse, UserLogin, Token, AuthenticatedUser,
+    ExpenseCreate, ExpenseUpdate, ExpenseResponse, ExpenseListResponse,
+    ExpenseSummary, ExpenseChangesResponse, ExpenseTrendsResponse, CategoryListResponse,
+    ExpenseLookup, ExpenseLookupResponse, BatchRequest, BatchResponse
+)
+from auth import (
+    getPasswordHashAsync, authenticateUserAsync, createAccessToken,
+    createRefreshToken, getCurrentActiveUserAsync, loadUserProfile
+)
+from queries import (
+    buildExpenseFilters, buildOrderBy, buildCategoryTotalsQuery, buildExpenseSummary, buildChangeMarker,
+    buildChangesQuery, buildChangesPage, buildListParams
+)
+from mutations import (
+    insertExpense, updateOwnedExpense, softDeleteOwnedExpense, runExpenseWriteAsync
+)
+from ratelimit import limiter
+from reads import (
+    selectExpensePage, selectOwnedExpense, selectOwnedExpenses, lookupResponse, renderExpensePage, responseColumns
+)
+from responsecache import (
+    responseCacheKey, normalizeParams, getCachedResponse, storeResponse, getUserVersion
+)
+from fastjson import serializeResponse
+from singleflight import readFlights
+from batching import beginReadSnapshotAsync, runBatch
+from changefeed import (
+    expenseChanges, buildLatestChangeQuery, latestSyncToken, buildChangeEvents, resumeSyncToken, summaryEtag,
+    eventStreamResponse
+)
+from trends import (
+    TREND_BUCKETS, parseTimezone, buildLocalDateFilters, buildDateSpanQuery, buildTrendsQuery,
+    planTrends, trendsResponse
+)
+from categoryindex import getCategoryIndex, storeCategoryIndex, buildCategoryUsageQuery
+from etags import makeEtag, notModifiedResponse, withEtag
+
+router = APIRouter()
+
+
+async def getOwnedExpense(db: AsyncSession, expenseId: int, userId: int) -> RowMapping:
+    """
+    Load a non-deleted expense owned by the user.
+
+    Args:
+        db: Async database session
+        expenseId: Expense ID
+        userId: Owner ID
+
+    Returns:
+        Row mapping with the ExpenseResponse fields and change_seq
+
+    Raises:
+        HTTPException: If the expense does not exist for this user
+    """
+    result = await db.execute(selectOwnedExpense(expenseId, userId))
+    expense = result.mappings().first()
+
+    if not expense:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Expense not found"
+        )
+
+    return expense
+
+
+# ============================================================================
+# Authentication Endpoints
+# ============================================================================
+
+@router.post(
+    f"{settings.API_V1_PREFIX}/auth/register",
+    response_model=UserResponse,
+    status_code=status.HTTP_201_CREATED,
+    tags=["Authentication"]
+)
+@limiter.limit("5/minute")
+async def registerUser(
+    request: Request,
+    user: UserCreate,
+    db: AsyncSession = Depends(getAsyncDb)
+):
+    """
+    Register a new user.
+
+    - **email**: Valid email address
+    - **username**: Unique username (3-50 characters)
+    - **password**: Strong password (min 8 chars, 1 digit, 1 uppercase)
+    """
+    result = await db.execute(select(User.id).where(User.email == user.email))
+    if result.first():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered"
+        )
+
+    result = await db.execute(select(User.id).where(User.username == user.username))
+    if result.first():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Username already taken"
+        )
+
+    # bcrypt runs on the hashing pool, off the event loop and request threadpool
+    hashedPassword = await getPasswordHashAsync(user.password)
+    dbUser = User(
+        email=user.email,
+        username=user.username,
+        hashed_password=hashedPassword
+    )
+    db.add(dbUser)
+    await db.commit()
+    await db.refresh(dbUser)
+
+    return dbUser
+
+
+@router.post(
+    f"{settings.API_V1_PREFIX}/auth/login",
+    response_model=Token,
+    tags=["Authentication"]
+)
+@limiter.limit(f"{settings.RATE_LIMIT_PER_MINUTE}/minute")
+async def login(
+    request: Request,
+    user_login: UserLogin,
+    db: AsyncSession = Depends(getAsyncDb)
+):
+    """
+    Login and receive access and refresh tokens.
+
+    - **username**: Your username
+    - **password**: Your password
+    """
+    user = await authenticateUserAsync(db, user_login.username, user_login.password)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect username or password",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    accessToken = createAccessToken(data={"sub": user.username, "user_id": user.id})
+    refreshToken = createRefreshToken(data={"sub": user.username, "user_id": user.id})
+
+    return {
+        "access_token": accessToken,
+        "refresh_token": refreshToken,
+        "token_type": "bearer"
+    }
+
+
+@router.get(
+    f"{settings.API_V1_PREFIX}/auth/me",
+    response_model=UserResponse,
+    tags=["Authentication"]
+)
+async def getCurrentUserInfo(
+    currentUser: AuthenticatedUser = Depends(getCurrentActiveUserAsync),
+    db: AsyncSession = Depends(getAsyncDb)
+):
+    """Get current authenticated user information."""
+    return loadUserProfile(await db.get(User, currentUser.id))
+
+
+# ============================================================================
+# Expense Endpoints
+# ============================================================================
+
+@router.post(
+    f"{settings.API_V1_PREFIX}/expenses",
+    response_model=ExpenseResponse,
+    status_code=status.HTTP_201_CREATED,
+    tags=["Expenses"]
+)
+@limiter.limit(f"{settings.RATE_LIMIT_PER_MINUTE}/minute")
+async def createExpense(
+    request: Request,
+    expense: ExpenseCreate,
+    currentUser: AuthenticatedUser = Depends(getCurrentActiveUserAsync),
+    db: AsyncSession = Depends(getAsyncDb)
+):
+    """
+    Create a new expense.
+
+    - **amount**: Expense amount (must be positive)
+    - **category**: Category name (e.g., Food, Transport)
+    - **description**: Expense description
+    """
+    return await runExpenseWriteAsync(
+        db, partial(insertExpense, userId=currentUser.id, expense=expense), currentUser.id
+    )
+
+
+@router.get(
+    f"{settings.API_V1_PREFIX}/expenses",
+    response_model=ExpenseListResponse,
+    tags=["Expenses"]
+)
+@limiter.limit(f"{settings.RATE_LIMIT_PER_MINUTE}/minute")
+async def listExpenses(
+    request: Request,
+    page: int = Query(1, ge=1, description="Page number"),
+    page_size: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+    category: Optional[str] = Query(None, description="Filter by category"),
+    from_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
+    to_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
+    min_amount: Optional[float] = Query(None, ge=0, description="Minimum amount"),
+    max_amount: Optional[float] = Query(None, ge=0, description="Maximum amount"),
+    q: Optional[str] = Query(None, max_length=200, description="Full-text search in descriptions"),
+    sort_by: Optional[str] = Query(
+        None, enum=["date", "amount", "category", "relevance"],
+        description="Sort field (default: relevance with q, otherwise date)"
+    ),
+    sort_order: str = Query("desc", enum=["asc", "desc"], description="Sort order"),
+    fields: Optional[str] = Query(None, description="Comma-separated item fields (e.g. id,amount,date)"),
+    currentUser: AuthenticatedUser = Depends(getCurrentActiveUserAsync),
+    db: AsyncSession = Depends(getAsyncDb)
+):
+    """
+    Get paginated list of expenses with filtering and sorting.
+
+    - **page**: Page number (default: 1)
+    - **page_size**: Items per page (default: 20, max: 100)
+    - **category**: Filter by category name
+    - **from_date**: Filter expenses from this date
+    - **to_date**: Filter expenses until this date
+    - **min_amount**: Filter expenses with amount >= this value
+    - **max_amount**: Filter expenses with amount <= this value
+    - **q**: Only expenses whose description contains all of these words
+    - **sort_by**: Sort by field (date, amount, category, relevance)
+    - **sort_order**: Sort order (asc, desc)
+    - **fields**: Only load and return these item fields (default: all)
+
+    Responses carry an ETag; a request whose If-None-Match matches it gets 304.
+    """
+    params, fieldNames = buildListParams(
+        page, page_size, category, from_date, to_date, min_amount, max_amount, q, sort_by, sort_order, fields
+    )
+    cacheKey = responseCacheKey(request, currentUser.id, "list", params)
+    cached = getCachedResponse(cacheKey)
+    if cached is not None:
+        return notModifiedResponse(request, cached.headers["ETag"]) or cached
+
+    changeSeq = (await db.execute(buildChangeMarker(currentUser.id))).scalar()
+    etag = makeEtag("list", currentUser.id, changeSeq, normalizeParams(params))
+    notModified = notModifiedResponse(request, etag)
+    if notModified is not None:
+        return notModified
+
+    async def loadPage() -> bytes:
+        conditions = buildExpenseFilters(
+            currentUser.id, category, from_date, to_date, min_amount, max_amount, q
+        )
+        orderBy = buildOrderBy(params["sort_by"], sort_order, q)
+
+        total = (await db.execute(
+            select(func.count()).select_from(Expense).where(*conditions)
+        )).scalar_one()
+
+        offset = (page - 1) * page_size
+        result = await db.execute(
+            selectExpensePage(conditions, orderBy, offset, page_size, responseColumns(fieldNames))
+        )
+        return renderExpensePage(result.mappings().all(), total, page, page_size, fieldNames)
+
+    # Identical concurrent requests (same ETag) share one query and body
+    return storeResponse(cacheKey, await readFlights.runAsync(etag, loadPage), etag)
+
+
+async def renderExpenseSummary(
+    db: AsyncSession,
+    userId: int,
+    from_date: Optional[str],
+    to_date: Optional[str]
+) -> bytes:
+    """
+    Aggregate and serialize a user's expense summary.
+
+    Args:
+        db: Async database session
+        userId: Owner of the expenses
+        from_date: Optional start date (YYYY-MM-DD)
+        to_date: Optional end date (YYYY-MM-DD)
+
+    Returns:
+        ExpenseSummary JSON
+    """
+    categoryTotals = (await db.execute(buildCategoryTotalsQuery(buildExpenseFilters(
+        userId, from_date=from_date, to_date=to_date
+    )))).all()
+    return serializeResponse(ExpenseSummary, buildExpenseSummary(categoryTotals, from_date, to_date))
+
+
+@router.get(
+    f"{settings.API_V1_PREFIX}/expenses/summary",
+    response_model=ExpenseSummary,
+    tags=["Expenses"]
+)
+async def getExpenseSummary(
+    request: Request,
+    from_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
+    to_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
+    currentUser: AuthenticatedUser = Depends(getCurrentActiveUserAsync),
+    db: AsyncSession = Depends(getAsyncDb)
+):
+    """
+    Get expense summary with category breakdown.
+
+    - **from_date**: Optional start date for filtering
+    - **to_date**: Optional end date for filtering
+
+    Responses carry an ETag; a request whose If-None-Match matches it gets 304.
+    """
+    params = {"from_date": from_date, "to_date": to_date}
+    cacheKey = responseCacheKey(request, currentUser.id, "summary", params)
+    cached = getCachedResponse(cacheKey)
+    if cached is not None:
+        return notModifiedResponse(request, cached.headers["ETag"]) or cached
+
+    changeSeq = (await db.execute(buildChangeMarker(currentUser.id))).scalar()
+    etag = makeEtag("summary", currentUser.id, changeSeq, normalizeParams(params))
+    notModified = notModifiedResponse(request, etag)
+    if notModified is not None:
+        return notModified
+
+    loadSummary = partial(renderExpenseSummary, db, currentUser.id, from_date, to_date)
+    return storeResponse(cacheKey, await readFlights.runAsync(etag, loadSummary), etag)
+
+
+@router.get(
+    f"{settings.API_V1_PREFIX}/expenses/trends",
+    response_model=ExpenseTrendsResponse,
+    tags=["Expenses"]
+)
+@limiter.limit(f"{settings.RATE_LIMIT_PER_MINUTE}/minute")
+async def getExpenseTrends(
+    request: Request,
+    bucket: str = Query("month", enum=list(TREND_BUCKETS), description="Bucket size"),
+    tz: str = Query("UTC", max_length=64, description="IANA time zone (e.g. Europe/Berlin)"),
+    from_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD, local)"),
+    to_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD, local)"),
+    category: Optional[str] = Query(None, description="Filter by category"),
+    currentUser: AuthenticatedUser = Depends(getCurrentActiveUserAsync),
+    db: AsyncSession = Depends(getAsyncDb)
+):
+    """
+    Get spending per time bucket and category, for charting.
+
+    - **bucket**: day, week (starting Monday) or month
+    - **tz**: IANA time zone the buckets and dates are in (default: UTC)
+    - **from_date**, **to_date**: Optional local date range (inclusive);
+      without them the range spans the matching expenses
+    - **category**: Only this category
+
+    Every bucket in the range is listed, empty ones included; each series
+    has one total and count per bucket. Responses carry an ETag.
+    """
+    zone = parseTimezone(tz)
+    params = {"bucket": bucket, "tz": tz, "from_date": from_date, "to_date": to_date, "category": category}
+    cacheKey = responseCacheKey(request, currentUser.id, "trends", params)
+    cached = getCachedResponse(cacheKey)
+    if cached is not None:
+        return notModifiedResponse(request, cached.headers["ETag"]) or cached
+
+    changeSeq = (await db.execute(buildChangeMarker(currentUser.id))).scalar()
+    etag = makeEtag("trends", currentUser.id, changeSeq, normalizeParams(params))
+    notModified = notModifiedResponse(request, etag)
+    if notModified is not None:
+        return notModified
+
+    async def loadTrends() -> bytes:
+        conditions = buildExpenseFilters(currentUser.id, category) + buildLocalDateFilters(from_date, to_date, zone)
+        # The first/last expense only matters when the range is open-ended
+        span = None
+        if not (from_date and to_date):
+            span = (await db.execute(buildDateSpanQuery(conditions))).one()
+        plan = planTrends(bucket, zone, from_date, to_date, span)
+        buckets, rows = [], []
+        if plan is not None:
+            buckets, segments = plan
+            rows = (await db.execute(buildTrendsQuery(conditions, bucket, segments))).all()
+        return serializeResponse(ExpenseTrendsResponse, trendsResponse(rows, bucket, tz, buckets))
+
+    return storeResponse(cacheKey, await readFlights.runAsync(etag, loadTrends), etag)
+
+
+@router.get(
+    f"{settings.API_V1_PREFIX}/expenses/changes",
+    response_model=ExpenseChangesResponse,
+    tags=["Expenses"]
+)
+@limiter.limit(f"{settings.RATE_LIMIT_PER_MINUTE}/minute")
+async def listExpenseChanges(
+    request: Request,
+    since: Optional[str] = Query(None, description="Sync token from a previous response"),
+    limit: int = Query(settings.MAX_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE, description="Maximum changes"),
+    currentUser: AuthenticatedUser = Depends(getCurrentActiveUserAsync),
+    db: AsyncSession = Depends(getAsyncDb)
+):
+    """
+    Get expenses created, updated or deleted since a sync token.
+
+    - **since**: `next_token` of the previous response (omit for a full sync)
+    - **limit**: Maximum changes per response; repeat while `has_more` is true
+
+    Deleted expenses are returned with `is_deleted: true`.
+    """
+    expenses = (await db.execute(buildChangesQuery(currentUser.id, since, limit))).scalars().all()
+    return buildChangesPage(expenses, since, limit)
+
+
+@router.get(
+    f"{settings.API_V1_PREFIX}/expenses/events",
+    response_class=StreamingResponse,
+    tags=["Expenses"]
+)
+async def streamExpenseChanges(
+    request: Request,
+    since: Optional[str] = Query(None, description="Sync token to resume after (Last-Event-ID wins)"),
+    currentUser: AuthenticatedUser = Depends(getCurrentActiveUserAsync),
+    db: AsyncSession = Depends(getAsyncDb)
+):
+    """
+    Stream the user's expense changes as server-sent events (text/event-stream).
+
+    - **since**: Send changes after this sync token first; without it (and
+      without a Last-Event-ID header) only future changes are sent
+
+    Events: `created`, `updated` and `deleted` carry the expense and have the
+    sync token after it as their id; `summary` carries the summary totals
+    and follows every round of changes (and opens the stream). The stream
+    ends after EVENTS_MAX_STREAM_SECONDS; EventSource reconnects and resumes
+    from Last-Event-ID.
+    """
+    since = resumeSyncToken(request, since)
+    if not since:
+        since = latestSyncToken((await db.execute(buildLatestChangeQuery(currentUser.id))).first())
+    bind = db.bind
+    userId = currentUser.id
+    # The stream outlives the request's session; each read opens its own
+    await db.close()
+
+    async def loadChanges(token: str):
+        async with AsyncSession(bind) as session:
+            result = await session.execute(buildChangesQuery(userId, token, settings.MAX_PAGE_SIZE))
+            return buildChangeEvents(
+                result.scalars().all(), token, settings.MAX_PAGE_SIZE, partial(serializeResponse, ExpenseResponse)
+            )
+
+    async def loadSummary() -> bytes:
+        async with AsyncSession(bind) as session:
+            changeSeq = (await session.execute(buildChangeMarker(userId))).scalar()
+            return await readFlights.runAsync(
+                summaryEtag(userId, changeSeq), partial(renderExpenseSummary, session, userId, None, None)
+            )
+
+    return eventStreamResponse(expenseChanges.subscribe(userId), since, loadChanges, loadSummary)
+
+
+@router.post(
+    f"{settings.API_V1_PREFIX}/expenses/lookup",
+    response_model=ExpenseLookupResponse,
+    tags=["Expenses"]
+)
+@limiter.limit(f"{settings.RATE_LIMIT_PER_MINUTE}/minute")
+async def lookupExpenses(
+    request: Request,
+    lookup: ExpenseLookup,
+    currentUser: AuthenticatedUser = Depends(getCurrentActiveUserAsync),
+    db: AsyncSession = Depends(getAsyncDb)
+):
+    """
+    Get many expenses by ID with a single query.
+
+    - **ids**: Expense IDs (max MAX_LOOKUP_IDS)
+
+    Found expenses are returned in the order requested; IDs that do not exist,
+    are deleted or belong to another user are listed in **missing**.
+    """
+    result = await db.execute(selectOwnedExpenses(lookup.ids, currentUser.id))
+    return lookupResponse(lookup.ids, result.mappings().all())
+
+
+@router.get(
+    f"{settings.API_V1_PREFIX}/expenses/{{expense_id}}",
+    response_model=ExpenseResponse,
+    tags=["Expenses"]
+)
+async def getExpense(
+    request: Request,
+    response: Response,
+    expense_id: int,
+    currentUser: AuthenticatedUser = Depends(getCurrentActiveUserAsync),
+    db: AsyncSession = Depends(getAsyncDb)
+):
+    """Get a specific expense by ID (with ETag / If-None-Match support)."""
+    expense = await getOwnedExpense(db, expense_id, currentUser.id)
+    etag = makeEtag("expense", expense["id"], expense["change_seq"])
+    return notModifiedResponse(request, etag) or withEtag(expense, response, etag)
+
+
+@router.put(
+    f"{settings.API_V1_PREFIX}/expenses/{{expense_id}}",
+    response_model=ExpenseResponse,
+    tags=["Expenses"]
+)
+@limiter.limit(f"{settings.RATE_LIMIT_PER_MINUTE}/minute")
+async def updateExpense(
+    request: Request,
+    expense_id: int,
+    expenseUpdate: ExpenseUpdate,
+    currentUser: AuthenticatedUser = Depends(getCurrentActiveUserAsync),
+    db: AsyncSession = Depends(getAsyncDb)
+):
+    """
+    Update an existing expense.
+
+    All fields are optional. Only provided fields will be updated.
+    """
+    return await runExpenseWriteAsync(db, partial(
+        updateOwnedExpense, expenseId=expense_id, userId=currentUser.id, expenseUpdate=expenseUpdate
+    ), currentUser.id)
+
+
+@router.delete(
+    f"{settings.API_V1_PREFIX}/expenses/{{expense_id}}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    tags=["Expenses"]
+)
+@limiter.limit(f"{settings.RATE_LIMIT_PER_MINUTE}/minute")
+async def deleteExpense(
+    request: Request,
+    expense_id: int,
+    currentUser: AuthenticatedUser = Depends(getCurrentActiveUserAsync),
+    db: AsyncSession = Depends(getAsyncDb)
+):
+    """
+    Delete an expense (soft delete).
+
+    The expense is marked as deleted but remains in the database for audit purposes.
+    """
+    await runExpenseWriteAsync(
+        db, partial(softDeleteOwnedExpense, expenseId=expense_id, userId=currentUser.id), currentUser.id
+    )
+
+    return None
+
+
+# ============================================================================
+# Category Endpoints
+# ============================================================================
+
+@router.get(
+    f"{settings.API_V1_PREFIX}/categories",
+    response_model=CategoryListResponse,
+    tags=["Categories"]
+)
+async def listCategories(
+    prefix: str = Query("", max_length=50, description="Start of the category name (case-insensitive)"),
+    limit: int = Query(10, ge=1, le=settings.MAX_PAGE_SIZE, description="Maximum categories"),
+    currentUser: AuthenticatedUser = Depends(getCurrentActiveUserAsync),
+    db: AsyncSession = Depends(getAsyncDb)
+):
+    """
+    Autocomplete the user's categories, most used first.
+
+    - **prefix**: Typed text; omit to list all categories in use
+    - **limit**: Maximum categories to return
+
+    Served from an in-memory index that the user's writes keep up to date.
+    """
+    index = getCategoryIndex(currentUser.id)
+    if index is None:
+        version = getUserVersion(currentUser.id)
+        rows = (await db.execute(buildCategoryUsageQuery(currentUser.id))).all()
+        index = storeCategoryIndex(currentUser.id, version, rows)
+    return {"categories": index.search(prefix, limit)}
+
+
+# ============================================================================
+# Batch Endpoint
+# ============================================================================
+
+@router.post(
+    f"{settings.API_V1_PREFIX}/batch",
+    response_model=BatchResponse,
+    tags=["Batch"]
+)
+@limiter.limit(f"{settings.RATE_LIMIT_PER_MINUTE}/minute")
+async def batchRequests(
+    request: Request,
+    batch: BatchRequest,
+    currentUser: AuthenticatedUser = Depends(getCurrentActiveUserAsync),
+    db: AsyncSession = Depends(getAsyncDb)
+):
+    """
+    Run several read requests with one authentication and one session.
+
+    - **requests**: Up to MAX_BATCH_REQUESTS items, each a GET **path** with
+      query string (e.g. `/api/v1/expenses/summary`) and an optional
+      **if_none_match**
+
+    Sub-requests run in order on one database snapshot. Each response has the
+    status, ETag and JSON body the route would have returned on its own.
+    """
+    await beginReadSnapshotAsync(db)
+    body = await runBatch(request, batch.requests, currentUser, db)
+    return Response(content=body, media_type="application/json")
+
+
+# ============================================================================
+# Route Installation
+# ============================================================================
+
+def installAsyncRoutes(targetApp: FastAPI) -> None:
+    """
+    Replace the app's synchronous routes with their async equivalents.
+
+    Routes are swapped in place (same position in the route table) so that
+    matching order is preserved, e.g. /expenses/summary still matches before
+    /expenses/{expense_id}. Routes without a sync counterpart are appended.
+
+    Args:
+        targetApp: FastAPI application whose routes are replaced
+    """
+    routes = targetApp.router.routes
+
+    # include_router builds routes bound to targetApp (dependency overrides etc.);
+    # take them back off the end and put them where the sync routes were
+    existingCount = len(routes)
+    targetApp.include_router(router)
+    asyncRoutes = routes[existingCount:]
+    del routes[existingCount:]
+
+    for asyncRoute in asyncRoutes:
+        for index, route in enumerate(routes):
+            if (isinstance(route, APIRoute) and route.path == asyncRoute.path
+                    and route.methods == asyncRoute.methods):
+                routes[index] = asyncRoute
+                break
+        else:
+            routes.append(asyncRoute)
@@ -4,39 +4,69 @@ FastAPI main application for Expense Tracker REST API.
 from fastapi import FastAPI, Depends, HTTPException, status, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.httpsredirect import HTTPSRedirectMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func
-from datetime import datetime, timedelta
+from sqlalchemy import and_, or_, func, select
+from datetime import datetime
 from typing import Optional, List
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
+from functools import partial
+from slowapi import _rate_limit_exceeded_handler
+from starlette.concurrency import run_in_threadpool
 from slowapi.errors import RateLimitExceeded
-import math
+from pydantic import ValidationError
+import json
 
 from config import settings
 from database import getDb, initDb
 from models import User, Expense
 from schemas import (
-    UserCreate, UserResponse, UserLogin, Token,
+    UserCreate, UserResponse, UserLogin, Token, AuthenticatedUser,
     ExpenseCreate, ExpenseUpdate, ExpenseResponse, ExpenseListResponse,
-    ExpenseSummary, CategorySummary, ErrorResponse
+    ExpenseSummary, ExpenseChangesResponse, ErrorResponse,
+    ExpenseBatchCreate, ExpenseBatchResponse, BatchItemError,
+    ExpenseBulkUpdate, ExpenseBulkDelete, BulkOperationResponse, CategoryListResponse,
+    ExpenseTrendsResponse, ExpenseLookup, ExpenseLookupResponse, BatchRequest, BatchResponse
 )
 from auth import (
-    getPasswordHash, authenticateUser, createAccessToken,
-    createRefreshToken, getCurrentActiveUser
+    getPasswordHashAsync, getUserByUsername, checkUserPassword, createAccessToken,
+    createRefreshToken, getCurrentActiveUser, loadUserProfile, userCache,
+    tokenCache, passwordHashPool
 )
-
-# ============================================================================
-# Constants and Mappings
-# ============================================================================
-
-# Explicit mapping for sort fields to prevent attribute injection
-SORT_FIELD_MAPPING = {
-    "date": Expense.date,
-    "amount": Expense.amount,
-    "category": Expense.category
-}
+from queries import (
+    buildExpenseFilters, buildSelectionFilters, buildOrderBy, buildCategoryTotalsQuery,
+    buildExpenseSummary, buildChangeMarker, buildChangesQuery, buildChangesPage, buildListParams
+)
+from mutations import (
+    insertExpense, insertExpenses, updateOwnedExpense, softDeleteOwnedExpense,
+    updateExpensesWhere, softDeleteExpensesWhere, runExpenseWrite
+)
+from writer import stopExpenseWriter
+from reads import (
+    fetchExpensePage, fetchOwnedExpense, fetchOwnedExpenses, lookupResponse, renderExpensePage, responseColumns
+)
+from responsecache import (
+    responseCache, responseCacheKey, normalizeParams, getCachedResponse, storeResponse,
+    getUserVersion
+)
+from fastjson import serializeResponse
+from singleflight import readFlights
+from batching import beginReadSnapshot, runBatch
+from changefeed import (
+    expenseChanges, buildLatestChangeQuery, latestSyncToken, buildChangeEvents, resumeSyncToken, summaryEtag,
+    eventStreamResponse
+)
+from trends import (
+    TREND_BUCKETS, parseTimezone, buildLocalDateFilters, buildDateSpanQuery, buildTrendsQuery,
+    planTrends, trendsResponse
+)
+from categoryindex import (
+    categoryIndexes, getCategoryIndex, storeCategoryIndex, buildCategoryUsageQuery
+)
+from etags import makeEtag, notModifiedResponse, withEtag
+from export import streamExpenses, EXPORT_MEDIA_TYPES
+from importer import streamImport, IMPORT_MEDIA_TYPES
+from ratelimit import limiter
+from api_async import installAsyncRoutes
 
 # ============================================================================
 # Application Setup
@@ -51,7 +81,6 @@ app = FastAPI(
 )
 
 # Rate Limiter Setup
-limiter = Limiter(key_func=get_remote_address)
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
@@ -73,6 +102,14 @@ if settings.ENVIRONMENT == "production":
 def onStartup():
     """Initialize database tables on application startup."""
     initDb()
+    # Category indexes are rebuilt from the database on first use
+    categoryIndexes.clear()
+
+
+@app.on_event("shutdown")
+def onShutdown():
+    """Commit any queued writes before the process exits."""
+    stopExpenseWriter()
 
 
 # ============================================================================
@@ -89,10 +126,76 @@ async def healthCheck():
     }
 
 
+@app.get("/metrics")
+async def getMetrics():
+    """
+    Counters of the in-process caches and queues.
+
+    Unauthenticated, for monitoring scrapers; 404 unless METRICS_ENABLED.
+    """
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    return {
+        "user_cache": userCache.snapshot(),
+        "token_cache": tokenCache.snapshot(),
+        "password_hash_pool": passwordHashPool.snapshot(),
+        "response_cache": responseCache.snapshot(),
+        "category_index": categoryIndexes.snapshot(),
+        "single_flight": readFlights.snapshot(),
+        "event_streams": expenseChanges.snapshot()
+    }
+
+
 # ============================================================================
 # Authentication Endpoints
 # ============================================================================
 
+def findRegistrationConflict(db: Session, user: UserCreate) -> Optional[str]:
+    """
+    Check whether the email or username is already in use.
+
+    Args:
+        db: Database session
+        user: Registration data
+
+    Returns:
+        Error message for the first conflict, or None
+    """
+    # Check if email already exists
+    if db.query(User).filter(User.email == user.email).first():
+        return "Email already registered"
+
+    # Check if username already exists
+    if db.query(User).filter(User.username == user.username).first():
+        return "Username already taken"
+
+    return None
+
+
+def insertUser(db: Session, user: UserCreate, hashedPassword: str) -> User:
+    """
+    Create a user with an already hashed password.
+
+    Args:
+        db: Database session
+        user: Registration data
+        hashedPassword: bcrypt hash of the password
+
+    Returns:
+        The created user
+    """
+    dbUser = User(
+        email=user.email,
+        username=user.username,
+        hashed_password=hashedPassword
+    )
+    db.add(dbUser)
+    db.commit()
+    db.refresh(dbUser)
+
+    return dbUser
+
+
 @app.post(
     f"{settings.API_V1_PREFIX}/auth/register",
     response_model=UserResponse,
@@ -100,7 +203,7 @@ async def healthCheck():
     tags=["Authentication"]
 )
 @limiter.limit("5/minute")
-def registerUser(
+async def registerUser(
     request: Request,
     user: UserCreate,
     db: Session = Depends(getDb)
@@ -112,34 +215,18 @@ def registerUser(
     - **username**: Unique username (3-50 characters)
     - **password**: Strong password (min 8 chars, 1 digit, 1 uppercase)
     """
-    # Check if email already exists
-    dbUser = db.query(User).filter(User.email == user.email).first()
-    if dbUser:
+    # Async so that waiting for bcrypt does not hold a request thread;
+    # the short database steps still run on the threadpool
+    conflict = await run_in_threadpool(findRegistrationConflict, db, user)
+    if conflict:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
+            detail=conflict
         )
 
-    # Check if username already exists
-    dbUser = db.query(User).filter(User.username == user.username).first()
-    if dbUser:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Username already taken"
-        )
-
-    # Create new user
-    hashedPassword = getPasswordHash(user.password)
-    dbUser = User(
-        email=user.email,
-        username=user.username,
-        hashed_password=hashedPassword
-    )
-    db.add(dbUser)
-    db.commit()
-    db.refresh(dbUser)
+    hashedPassword = await getPasswordHashAsync(user.password)
 
-    return dbUser
+    return await run_in_threadpool(insertUser, db, user, hashedPassword)
 
 
 @app.post(
@@ -148,7 +235,7 @@ def registerUser(
     tags=["Authentication"]
 )
 @limiter.limit(f"{settings.RATE_LIMIT_PER_MINUTE}/minute")
-def login(
+async def login(
     request: Request,
     user_login: UserLogin,
     db: Session = Depends(getDb)
@@ -159,7 +246,8 @@ def login(
     - **username**: Your username
     - **password**: Your password
     """
-    user = authenticateUser(db, user_login.username, user_login.password)
+    user = await run_in_threadpool(getUserByUsername, db, user_login.username)
+    user = await checkUserPassword(user, user_login.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -184,10 +272,12 @@ def login(
     tags=["Authentication"]
 )
 def getCurrentUserInfo(
-    currentUser: User = Depends(getCurrentActiveUser)
+    currentUser: AuthenticatedUser = Depends(getCurrentActiveUser),
+    db: Session = Depends(getDb)
 ):
     """Get current authenticated user information."""
-    return currentUser
+    # The cached identity only holds id/username/is_active; load the profile
+    return loadUserProfile(db.get(User, currentUser.id))
 
 
 # ============================================================================
@@ -204,7 +294,7 @@ def getCurrentUserInfo(
 def createExpense(
     request: Request,
     expense: ExpenseCreate,
-    currentUser: User = Depends(getCurrentActiveUser),
+    currentUser: AuthenticatedUser = Depends(getCurrentActiveUser),
     db: Session = Depends(getDb)
 ):
     """
@@ -214,17 +304,185 @@ def createExpense(
     - **category**: Category name (e.g., Food, Transport)
     - **description**: Expense description
     """
-    dbExpense = Expense(
-        amount=expense.amount,
-        category=expense.category,
-        description=expense.description,
-        user_id=currentUser.id
+    return runExpenseWrite(
+        db, partial(insertExpense, userId=currentUser.id, expense=expense), currentUser.id
     )
-    db.add(dbExpense)
-    db.commit()
-    db.refresh(dbExpense)
 
-    return dbExpense
+
+@app.post(
+    f"{settings.API_V1_PREFIX}/expenses/batch",
+    response_model=ExpenseBatchResponse,
+    status_code=status.HTTP_201_CREATED,
+    tags=["Expenses"]
+)
+@limiter.limit(f"{settings.RATE_LIMIT_PER_MINUTE}/minute")
+def createExpensesBatch(
+    request: Request,
+    batch: ExpenseBatchCreate,
+    all_or_nothing: bool = Query(False, description="Reject the whole batch if any item is invalid"),
+    currentUser: AuthenticatedUser = Depends(getCurrentActiveUser),
+    db: Session = Depends(getDb)
+):
+    """
+    Create many expenses in one request.
+
+    Valid items are inserted with a single bulk statement in one transaction.
+    Invalid items are skipped and reported by index.
+
+    - **items**: List of expenses (same fields as create, max MAX_BATCH_SIZE)
+    - **all_or_nothing**: If true, nothing is inserted when any item is invalid
+    """
+    validExpenses = []
+    errors = []
+    for index, item in enumerate(batch.items):
+        # Valid items are already ExpenseCreate and pass through unchanged;
+        # re-validating the rest collects their errors
+        try:
+            validExpenses.append(ExpenseCreate.model_validate(item))
+        except ValidationError as exc:
+            errors.extend(
+                BatchItemError(
+                    index=index,
+                    field=".".join(str(part) for part in error["loc"]),
+                    message=error["msg"]
+                )
+                for error in exc.errors()
+            )
+
+    if errors and all_or_nothing:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=[error.model_dump() for error in errors]
+        )
+
+    createdIds = []
+    if validExpenses:
+        createdIds = runExpenseWrite(
+            db, partial(insertExpenses, userId=currentUser.id, expenses=validExpenses), currentUser.id
+        )
+
+    return {
+        "created_ids": createdIds,
+        "created": len(createdIds),
+        "failed": len({error.index for error in errors}),
+        "errors": errors
+    }
+
+
+@app.post(
+    f"{settings.API_V1_PREFIX}/expenses/bulk/update",
+    response_model=BulkOperationResponse,
+    tags=["Expenses"]
+)
+@limiter.limit(f"{settings.RATE_LIMIT_PER_MINUTE}/minute")
+def bulkUpdateExpenses(
+    request: Request,
+    bulkUpdate: ExpenseBulkUpdate,
+    currentUser: AuthenticatedUser = Depends(getCurrentActiveUser),
+    db: Session = Depends(getDb)
+):
+    """
+    Apply one update to many expenses with a single UPDATE statement.
+
+    - **ids**: Expense IDs to update
+    - **category**, **from_date**, **to_date**, **min_amount**, **max_amount**:
+      Same filters as the list endpoint (combined with ids if both are given)
+    - **update**: Fields to set (same as the single update endpoint)
+    """
+    # Explicit nulls are dropped: every updatable column is NOT NULL
+    values = bulkUpdate.update.model_dump(exclude_unset=True, exclude_none=True)
+    if not values:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No fields to update"
+        )
+
+    conditions = buildSelectionFilters(currentUser.id, bulkUpdate)
+    affected = runExpenseWrite(
+        db,
+        partial(updateExpensesWhere, userId=currentUser.id, conditions=conditions, values=values),
+        currentUser.id
+    )
+
+    return {"affected": affected}
+
+
+@app.post(
+    f"{settings.API_V1_PREFIX}/expenses/bulk/delete",
+    response_model=BulkOperationResponse,
+    tags=["Expenses"]
+)
+@limiter.limit(f"{settings.RATE_LIMIT_PER_MINUTE}/minute")
+def bulkDeleteExpenses(
+    request: Request,
+    bulkDelete: ExpenseBulkDelete,
+    currentUser: AuthenticatedUser = Depends(getCurrentActiveUser),
+    db: Session = Depends(getDb)
+):
+    """
+    Soft delete many expenses with a single UPDATE statement.
+
+    - **ids**: Expense IDs to delete
+    - **category**, **from_date**, **to_date**, **min_amount**, **max_amount**:
+      Same filters as the list endpoint (combined with ids if both are given)
+    """
+    conditions = buildSelectionFilters(currentUser.id, bulkDelete)
+    affected = runExpenseWrite(
+        db, partial(softDeleteExpensesWhere, userId=currentUser.id, conditions=conditions), currentUser.id
+    )
+
+    return {"affected": affected}
+
+
+@app.post(
+    f"{settings.API_V1_PREFIX}/expenses/import",
+    response_class=Response,
+    tags=["Expenses"]
+)
+@limiter.limit(f"{settings.RATE_LIMIT_PER_MINUTE}/minute")
+async def importExpenses(
+    request: Request,
+    format: Optional[str] = Query(
+        None, enum=["csv", "ndjson"], description="Upload format (default: from Content-Type)"
+    ),
+    currentUser: AuthenticatedUser = Depends(getCurrentActiveUser),
+    db: Session = Depends(getDb)
+):
+    """
+    Import a large CSV or NDJSON upload of expenses.
+
+    The body is parsed as it arrives and inserted in chunked transactions.
+    The response is an NDJSON event log: one "error" per rejected row (up to
+    IMPORT_MAX_REPORTED_ERRORS), one "progress" per committed chunk and a
+    final "complete".
+
+    - **format**: csv (header with amount, category, description and optional
+      date) or ndjson (one expense object per line)
+    """
+    contentType = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    importFormat = format or IMPORT_MEDIA_TYPES.get(contentType)
+    if importFormat is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Send text/csv or application/x-ndjson, or pass format=csv|ndjson"
+        )
+
+    bind = db.get_bind()
+    userId = currentUser.id
+    # Release the request's connection so it holds no read transaction while
+    # the chunks are committed on their own sessions
+    db.close()
+
+    # The upload is consumed here rather than inside a StreamingResponse body:
+    # the response task also listens on receive() for disconnects, and two
+    # readers competing for body messages deadlock. The event log is bounded
+    # (capped errors plus one event per chunk), so it is sent afterwards.
+    events = [
+        json.dumps(event) + "\n"
+        async for event in streamImport(request.stream(), importFormat, bind, userId)
+    ]
+
+    return Response(content="".join(events), media_type="application/x-ndjson")
 
 
 @app.get(
@@ -242,9 +500,14 @@ def listExpenses(
     to_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
     min_amount: Optional[float] = Query(None, ge=0, description="Minimum amount"),
     max_amount: Optional[float] = Query(None, ge=0, description="Maximum amount"),
-    sort_by: str = Query("date", enum=["date", "amount", "category"], description="Sort field"),
+    q: Optional[str] = Query(None, max_length=200, description="Full-text search in descriptions"),
+    sort_by: Optional[str] = Query(
+        None, enum=["date", "amount", "category", "relevance"],
+        description="Sort field (default: relevance with q, otherwise date)"
+    ),
     sort_order: str = Query("desc", enum=["asc", "desc"], description="Sort order"),
-    currentUser: User = Depends(getCurrentActiveUser),
+    fields: Optional[str] = Query(None, description="Comma-separated item fields (e.g. id,amount,date)"),
+    currentUser: AuthenticatedUser = Depends(getCurrentActiveUser),
     db: Session = Depends(getDb)
 ):
     """
@@ -257,75 +520,65 @@ def listExpenses(
     - **to_date**: Filter expenses until this date
     - **min_amount**: Filter expenses with amount >= this value
     - **max_amount**: Filter expenses with amount <= this value
-    - **sort_by**: Sort by field (date, amount, category)
+    - **q**: Only expenses whose description contains all of these words
+    - **sort_by**: Sort by field (date, amount, category, relevance)
     - **sort_order**: Sort order (asc, desc)
+    - **fields**: Only load and return these item fields (default: all)
+
+    Responses carry an ETag; a request whose If-None-Match matches it gets 304.
     """
-    # Build query
-    query = db.query(Expense).filter(
-        Expense.user_id == currentUser.id,
-        Expense.is_deleted == False
+    params, fieldNames = buildListParams(
+        page, page_size, category, from_date, to_date, min_amount, max_amount, q, sort_by, sort_order, fields
     )
+    cacheKey = responseCacheKey(request, currentUser.id, "list", params)
+    cached = getCachedResponse(cacheKey)
+    if cached is not None:
+        return notModifiedResponse(request, cached.headers["ETag"]) or cached
+
+    changeSeq = db.execute(buildChangeMarker(currentUser.id)).scalar()
+    etag = makeEtag("list", currentUser.id, changeSeq, normalizeParams(params))
+    notModified = notModifiedResponse(request, etag)
+    if notModified is not None:
+        return notModified
+
+    def loadPage() -> bytes:
+        # Build filters and sorting using explicit mapping
+        conditions = buildExpenseFilters(
+            currentUser.id, category, from_date, to_date, min_amount, max_amount, q
+        )
+        orderBy = buildOrderBy(params["sort_by"], sort_order, q)
 
-    # Apply filters
-    if category:
-        query = query.filter(Expense.category.ilike(f"%{category}%"))
-
-    if from_date:
-        try:
-            fromDatetime = datetime.strptime(from_date, "%Y-%m-%d")
-            query = query.filter(Expense.date >= fromDatetime)
-        except ValueError:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid from_date format. Use YYYY-MM-DD"
-            )
-
-    if to_date:
-        try:
-            toDatetime = datetime.strptime(to_date, "%Y-%m-%d") + timedelta(days=1)
-            query = query.filter(Expense.date < toDatetime)
-        except ValueError:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid to_date format. Use YYYY-MM-DD"
-            )
-
-    if min_amount is not None:
-        query = query.filter(Expense.amount >= min_amount)
+        # Get total count
+        total = db.execute(select(func.count()).select_from(Expense).where(*conditions)).scalar_one()
 
-    if max_amount is not None:
-        query = query.filter(Expense.amount <= max_amount)
+        # Apply pagination; rows are plain mappings, not ORM instances
+        offset = (page - 1) * page_size
+        expenses = fetchExpensePage(db, conditions, orderBy, offset, page_size, responseColumns(fieldNames))
 
-    # Apply sorting using explicit mapping
-    sortColumn = SORT_FIELD_MAPPING.get(sort_by)
-    if not sortColumn:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Invalid sort_by value: {sort_by}"
-        )
+        return renderExpensePage(expenses, total, page, page_size, fieldNames)
 
-    if sort_order == "desc":
-        query = query.order_by(sortColumn.desc())
-    else:
-        query = query.order_by(sortColumn.asc())
+    # Identical concurrent requests (same ETag) share one query and body
+    return storeResponse(cacheKey, readFlights.run(etag, loadPage), etag)
 
-    # Get total count
-    total = query.count()
 
-    # Apply pagination
-    offset = (page - 1) * page_size
-    expenses = query.offset(offset).limit(page_size).all()
+def renderExpenseSummary(db: Session, userId: int, from_date: Optional[str], to_date: Optional[str]) -> bytes:
+    """
+    Aggregate and serialize a user's expense summary.
 
-    # Calculate total pages
-    pages = math.ceil(total / page_size) if total > 0 else 0
+    Args:
+        db: Database session
+        userId: Owner of the expenses
+        from_date: Optional start date (YYYY-MM-DD)
+        to_date: Optional end date (YYYY-MM-DD)
 
-    return {
-        "items": expenses,
-        "total": total,
-        "page": page,
-        "page_size": page_size,
-        "pages": pages
-    }
+    Returns:
+        ExpenseSummary JSON
+    """
+    # Aggregate per category in SQL over integer cents
+    categoryTotals = db.execute(buildCategoryTotalsQuery(buildExpenseFilters(
+        userId, from_date=from_date, to_date=to_date
+    ))).all()
+    return serializeResponse(ExpenseSummary, buildExpenseSummary(categoryTotals, from_date, to_date))
 
 
 @app.get(
@@ -334,9 +587,10 @@ def listExpenses(
     tags=["Expenses"]
 )
 def getExpenseSummary(
+    request: Request,
     from_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
     to_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
-    currentUser: User = Depends(getCurrentActiveUser),
+    currentUser: AuthenticatedUser = Depends(getCurrentActiveUser),
     db: Session = Depends(getDb)
 ):
     """
@@ -344,81 +598,228 @@ def getExpenseSummary(
 
     - **from_date**: Optional start date for filtering
     - **to_date**: Optional end date for filtering
+
+    Responses carry an ETag; a request whose If-None-Match matches it gets 304.
     """
-    # Build query
-    query = db.query(Expense).filter(
-        Expense.user_id == currentUser.id,
-        Expense.is_deleted == False
-    )
+    params = {"from_date": from_date, "to_date": to_date}
+    cacheKey = responseCacheKey(request, currentUser.id, "summary", params)
+    cached = getCachedResponse(cacheKey)
+    if cached is not None:
+        return notModifiedResponse(request, cached.headers["ETag"]) or cached
 
-    # Apply date filters
-    if from_date:
-        try:
-            fromDatetime = datetime.strptime(from_date, "%Y-%m-%d")
-            query = query.filter(Expense.date >= fromDatetime)
-        except ValueError:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid from_date format. Use YYYY-MM-DD"
+    changeSeq = db.execute(buildChangeMarker(currentUser.id)).scalar()
+    etag = makeEtag("summary", currentUser.id, changeSeq, normalizeParams(params))
+    notModified = notModifiedResponse(request, etag)
+    if notModified is not None:
+        return notModified
+
+    loadSummary = partial(renderExpenseSummary, db, currentUser.id, from_date, to_date)
+    return storeResponse(cacheKey, readFlights.run(etag, loadSummary), etag)
+
+
+@app.get(
+    f"{settings.API_V1_PREFIX}/expenses/trends",
+    response_model=ExpenseTrendsResponse,
+    tags=["Expenses"]
+)
+@limiter.limit(f"{settings.RATE_LIMIT_PER_MINUTE}/minute")
+def getExpenseTrends(
+    request: Request,
+    bucket: str = Query("month", enum=list(TREND_BUCKETS), description="Bucket size"),
+    tz: str = Query("UTC", max_length=64, description="IANA time zone (e.g. Europe/Berlin)"),
+    from_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD, local)"),
+    to_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD, local)"),
+    category: Optional[str] = Query(None, description="Filter by category"),
+    currentUser: AuthenticatedUser = Depends(getCurrentActiveUser),
+    db: Session = Depends(getDb)
+):
+    """
+    Get spending per time bucket and category, for charting.
+
+    - **bucket**: day, week (starting Monday) or month
+    - **tz**: IANA time zone the buckets and dates are in (default: UTC)
+    - **from_date**, **to_date**: Optional local date range (inclusive);
+      without them the range spans the matching expenses
+    - **category**: Only this category
+
+    Every bucket in the range is listed, empty ones included; each series
+    has one total and count per bucket. Responses carry an ETag.
+    """
+    zone = parseTimezone(tz)
+    params = {"bucket": bucket, "tz": tz, "from_date": from_date, "to_date": to_date, "category": category}
+    cacheKey = responseCacheKey(request, currentUser.id, "trends", params)
+    cached = getCachedResponse(cacheKey)
+    if cached is not None:
+        return notModifiedResponse(request, cached.headers["ETag"]) or cached
+
+    changeSeq = db.execute(buildChangeMarker(currentUser.id)).scalar()
+    etag = makeEtag("trends", currentUser.id, changeSeq, normalizeParams(params))
+    notModified = notModifiedResponse(request, etag)
+    if notModified is not None:
+        return notModified
+
+    def loadTrends() -> bytes:
+        conditions = buildExpenseFilters(currentUser.id, category) + buildLocalDateFilters(from_date, to_date, zone)
+        # The first/last expense only matters when the range is open-ended
+        span = None
+        if not (from_date and to_date):
+            span = db.execute(buildDateSpanQuery(conditions)).one()
+        plan = planTrends(bucket, zone, from_date, to_date, span)
+        buckets, rows = [], []
+        if plan is not None:
+            buckets, segments = plan
+            rows = db.execute(buildTrendsQuery(conditions, bucket, segments)).all()
+        return serializeResponse(ExpenseTrendsResponse, trendsResponse(rows, bucket, tz, buckets))
+
+    return storeResponse(cacheKey, readFlights.run(etag, loadTrends), etag)
+
+
+@app.get(
+    f"{settings.API_V1_PREFIX}/expenses/changes",
+    response_model=ExpenseChangesResponse,
+    tags=["Expenses"]
+)
+@limiter.limit(f"{settings.RATE_LIMIT_PER_MINUTE}/minute")
+def listExpenseChanges(
+    request: Request,
+    since: Optional[str] = Query(None, description="Sync token from a previous response"),
+    limit: int = Query(settings.MAX_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE, description="Maximum changes"),
+    currentUser: AuthenticatedUser = Depends(getCurrentActiveUser),
+    db: Session = Depends(getDb)
+):
+    """
+    Get expenses created, updated or deleted since a sync token.
+
+    - **since**: `next_token` of the previous response (omit for a full sync)
+    - **limit**: Maximum changes per response; repeat while `has_more` is true
+
+    Deleted expenses are returned with `is_deleted: true`.
+    """
+    expenses = db.execute(buildChangesQuery(currentUser.id, since, limit)).scalars().all()
+    return buildChangesPage(expenses, since, limit)
+
+
+@app.get(
+    f"{settings.API_V1_PREFIX}/expenses/events",
+    response_class=StreamingResponse,
+    tags=["Expenses"]
+)
+async def streamExpenseChanges(
+    request: Request,
+    since: Optional[str] = Query(None, description="Sync token to resume after (Last-Event-ID wins)"),
+    currentUser: AuthenticatedUser = Depends(getCurrentActiveUser),
+    db: Session = Depends(getDb)
+):
+    """
+    Stream the user's expense changes as server-sent events (text/event-stream).
+
+    - **since**: Send changes after this sync token first; without it (and
+      without a Last-Event-ID header) only future changes are sent
+
+    Events: `created`, `updated` and `deleted` carry the expense and have the
+    sync token after it as their id; `summary` carries the summary totals
+    and follows every round of changes (and opens the stream). The stream
+    ends after EVENTS_MAX_STREAM_SECONDS; EventSource reconnects and resumes
+    from Last-Event-ID.
+    """
+    since = resumeSyncToken(request, since)
+    if not since:
+        since = latestSyncToken(await run_in_threadpool(
+            lambda: db.execute(buildLatestChangeQuery(currentUser.id)).first()
+        ))
+    bind = db.get_bind()
+    userId = currentUser.id
+    # The stream outlives the request's session; each read opens its own
+    db.close()
+
+    def loadChanges(token: str):
+        with Session(bind) as session:
+            expenses = session.execute(buildChangesQuery(userId, token, settings.MAX_PAGE_SIZE)).scalars().all()
+            return buildChangeEvents(
+                expenses, token, settings.MAX_PAGE_SIZE, partial(serializeResponse, ExpenseResponse)
             )
 
-    if to_date:
-        try:
-            toDatetime = datetime.strptime(to_date, "%Y-%m-%d") + timedelta(days=1)
-            query = query.filter(Expense.date < toDatetime)
-        except ValueError:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid to_date format. Use YYYY-MM-DD"
+    def loadSummary() -> bytes:
+        with Session(bind) as session:
+            changeSeq = session.execute(buildChangeMarker(userId)).scalar()
+            return readFlights.run(
+                summaryEtag(userId, changeSeq), partial(renderExpenseSummary, session, userId, None, None)
             )
 
-    expenses = query.all()
+    return eventStreamResponse(
+        expenseChanges.subscribe(userId), since,
+        partial(run_in_threadpool, loadChanges), partial(run_in_threadpool, loadSummary)
+    )
 
-    if not expenses:
-        return {
-            "total_spending": 0,
-            "total_expenses": 0,
-            "categories": [],
-            "date_range": {
-                "from": from_date,
-                "to": to_date
-            }
-        }
 
-    # Calculate totals
-    totalSpending = sum(e.amount for e in expenses)
-    totalExpenses = len(expenses)
+@app.get(
+    f"{settings.API_V1_PREFIX}/expenses/export",
+    response_class=StreamingResponse,
+    tags=["Expenses"]
+)
+@limiter.limit(f"{settings.RATE_LIMIT_PER_MINUTE}/minute")
+def exportExpenses(
+    request: Request,
+    format: str = Query("ndjson", enum=["ndjson", "csv"], description="Export format"),
+    gzip: bool = Query(False, description="Compress the stream with gzip"),
+    category: Optional[str] = Query(None, description="Filter by category"),
+    from_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
+    to_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
+    min_amount: Optional[float] = Query(None, ge=0, description="Minimum amount"),
+    max_amount: Optional[float] = Query(None, ge=0, description="Maximum amount"),
+    sort_by: str = Query("date", enum=["date", "amount", "category"], description="Sort field"),
+    sort_order: str = Query("desc", enum=["asc", "desc"], description="Sort order"),
+    currentUser: AuthenticatedUser = Depends(getCurrentActiveUser),
+    db: Session = Depends(getDb)
+):
+    """
+    Stream all matching expenses as NDJSON or CSV.
+
+    Accepts the same filters and sorting as the list endpoint, without
+    pagination. Rows are streamed from a database cursor, so memory use is
+    constant regardless of result size.
 
-    # Calculate category breakdown
-    categoryTotals = {}
-    categoryCounts = {}
+    - **format**: ndjson (one JSON object per line) or csv
+    - **gzip**: Compress the response on the fly (Content-Encoding: gzip)
+    """
+    # Validate filters before the response starts streaming
+    conditions = buildExpenseFilters(
+        currentUser.id, category, from_date, to_date, min_amount, max_amount
+    )
+    orderBy = buildOrderBy(sort_by, sort_order)
 
-    for expense in expenses:
-        categoryTotals[expense.category] = categoryTotals.get(expense.category, 0) + expense.amount
-        categoryCounts[expense.category] = categoryCounts.get(expense.category, 0) + 1
+    headers = {"Content-Disposition": f'attachment; filename="expenses.{format}"'}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
 
-    categories = [
-        CategorySummary(
-            category=cat,
-            total=total,
-            percentage=(total / totalSpending * 100) if totalSpending > 0 else 0,
-            count=categoryCounts[cat]
-        )
-        for cat, total in categoryTotals.items()
-    ]
+    return StreamingResponse(
+        streamExpenses(db.get_bind(), conditions, orderBy, format, compress=gzip),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers=headers
+    )
 
-    # Sort by total amount descending
-    categories.sort(key=lambda x: x.total, reverse=True)
 
-    return {
-        "total_spending": totalSpending,
-        "total_expenses": totalExpenses,
-        "categories": categories,
-        "date_range": {
-            "from": from_date,
-            "to": to_date
-        }
-    }
+@app.post(
+    f"{settings.API_V1_PREFIX}/expenses/lookup",
+    response_model=ExpenseLookupResponse,
+    tags=["Expenses"]
+)
+@limiter.limit(f"{settings.RATE_LIMIT_PER_MINUTE}/minute")
+def lookupExpenses(
+    request: Request,
+    lookup: ExpenseLookup,
+    currentUser: AuthenticatedUser = Depends(getCurrentActiveUser),
+    db: Session = Depends(getDb)
+):
+    """
+    Get many expenses by ID with a single query.
+
+    - **ids**: Expense IDs (max MAX_LOOKUP_IDS)
+
+    Found expenses are returned in the order requested; IDs that do not exist,
+    are deleted or belong to another user are listed in **missing**.
+    """
+    return lookupResponse(lookup.ids, fetchOwnedExpenses(db, lookup.ids, currentUser.id))
 
 
 @app.get(
@@ -427,16 +828,14 @@ def getExpenseSummary(
     tags=["Expenses"]
 )
 def getExpense(
+    request: Request,
+    response: Response,
     expense_id: int,
-    currentUser: User = Depends(getCurrentActiveUser),
+    currentUser: AuthenticatedUser = Depends(getCurrentActiveUser),
     db: Session = Depends(getDb)
 ):
-    """Get a specific expense by ID."""
-    expense = db.query(Expense).filter(
-        Expense.id == expense_id,
-        Expense.user_id == currentUser.id,
-        Expense.is_deleted == False
-    ).first()
+    """Get a specific expense by ID (with ETag / If-None-Match support)."""
+    expense = fetchOwnedExpense(db, expense_id, currentUser.id)
 
     if not expense:
         raise HTTPException(
@@ -444,7 +843,8 @@ def getExpense(
             detail="Expense not found"
         )
 
-    return expense
+    etag = makeEtag("expense", expense["id"], expense["change_seq"])
+    return notModifiedResponse(request, etag) or withEtag(expense, response, etag)
 
 
 @app.put(
@@ -457,7 +857,7 @@ def updateExpense(
     request: Request,
     expense_id: int,
     expenseUpdate: ExpenseUpdate,
-    currentUser: User = Depends(getCurrentActiveUser),
+    currentUser: AuthenticatedUser = Depends(getCurrentActiveUser),
     db: Session = Depends(getDb)
 ):
     """
@@ -465,27 +865,9 @@ def updateExpense(
 
     All fields are optional. Only provided fields will be updated.
     """
-    dbExpense = db.query(Expense).filter(
-        Expense.id == expense_id,
-        Expense.user_id == currentUser.id,
-        Expense.is_deleted == False
-    ).first()
-
-    if not dbExpense:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Expense not found"
-        )
-
-    # Update only provided fields
-    updateData = expenseUpdate.dict(exclude_unset=True)
-    for field, value in updateData.items():
-        setattr(dbExpense, field, value)
-
-    db.commit()
-    db.refresh(dbExpense)
-
-    return dbExpense
+    return runExpenseWrite(db, partial(
+        updateOwnedExpense, expenseId=expense_id, userId=currentUser.id, expenseUpdate=expenseUpdate
+    ), currentUser.id)
 
 
 @app.delete(
@@ -497,7 +879,7 @@ def updateExpense(
 def deleteExpense(
     request: Request,
     expense_id: int,
-    currentUser: User = Depends(getCurrentActiveUser),
+    currentUser: AuthenticatedUser = Depends(getCurrentActiveUser),
     db: Session = Depends(getDb)
 ):
     """
@@ -505,25 +887,85 @@ def deleteExpense(
 
     The expense is marked as deleted but remains in the database for audit purposes.
     """
-    dbExpense = db.query(Expense).filter(
-        Expense.id == expense_id,
-        Expense.user_id == currentUser.id,
-        Expense.is_deleted == False
-    ).first()
-
-    if not dbExpense:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Expense not found"
-        )
-
     # Soft delete
-    dbExpense.is_deleted = True
-    db.commit()
+    runExpenseWrite(
+        db, partial(softDeleteOwnedExpense, expenseId=expense_id, userId=currentUser.id), currentUser.id
+    )
 
     return None
 
 
+# ============================================================================
+# Category Endpoints
+# ============================================================================
+
+@app.get(
+    f"{settings.API_V1_PREFIX}/categories",
+    response_model=CategoryListResponse,
+    tags=["Categories"]
+)
+def listCategories(
+    prefix: str = Query("", max_length=50, description="Start of the category name (case-insensitive)"),
+    limit: int = Query(10, ge=1, le=settings.MAX_PAGE_SIZE, description="Maximum categories"),
+    currentUser: AuthenticatedUser = Depends(getCurrentActiveUser),
+    db: Session = Depends(getDb)
+):
+    """
+    Autocomplete the user's categories, most used first.
+
+    - **prefix**: Typed text; omit to list all categories in use
+    - **limit**: Maximum categories to return
+
+    Served from an in-memory index that the user's writes keep up to date.
+    """
+    index = getCategoryIndex(currentUser.id)
+    if index is None:
+        version = getUserVersion(currentUser.id)
+        rows = db.execute(buildCategoryUsageQuery(currentUser.id)).all()
+        index = storeCategoryIndex(currentUser.id, version, rows)
+    return {"categories": index.search(prefix, limit)}
+
+
+# ============================================================================
+# Batch Endpoint
+# ============================================================================
+
+@app.post(
+    f"{settings.API_V1_PREFIX}/batch",
+    response_model=BatchResponse,
+    tags=["Batch"]
+)
+@limiter.limit(f"{settings.RATE_LIMIT_PER_MINUTE}/minute")
+async def batchRequests(
+    request: Request,
+    batch: BatchRequest,
+    currentUser: AuthenticatedUser = Depends(getCurrentActiveUser),
+    db: Session = Depends(getDb)
+):
+    """
+    Run several read requests with one authentication and one session.
+
+    - **requests**: Up to MAX_BATCH_REQUESTS items, each a GET **path** with
+      query string (e.g. `/api/v1/expenses/summary`) and an optional
+      **if_none_match**
+
+    Sub-requests run in order on one database snapshot. Each response has the
+    status, ETag and JSON body the route would have returned on its own.
+    """
+    await run_in_threadpool(beginReadSnapshot, db)
+    body = await runBatch(request, batch.requests, currentUser, db)
+    return Response(content=body, media_type="application/json")
+
+
+# ============================================================================
+# Async Database Mode
+# ============================================================================
+
+# Swap the auth, expense, category and batch endpoints above for their AsyncSession versions
+if settings.ASYNC_DATABASE_ENABLED:
+    installAsyncRoutes(app)
+
+
 # ============================================================================
 # Error Handlers
 # ============================================================================
@@ -2,21 +2,29 @@
 Authentication utilities for JWT token management and password hashing.
 """
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Callable, Optional, TypeVar
+import hashlib
+import time
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
 
+from cache import TTLCache
 from config import settings
-from database import getDb
+from database import getDb, getAsyncDb
+from hashing import PasswordHashPool, HashPoolFullError
 from models import User
-from schemas import TokenData
+from schemas import TokenData, AuthenticatedUser
 
 # Password hashing context
 pwdContext = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+T = TypeVar("T")
+
 # OAuth2 scheme for token extraction
 oauth2Scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_PREFIX}/auth/login")
 
@@ -35,10 +43,51 @@ def getPasswordHash(password: str) -> str:
     return pwdContext.hash(password)
 
 
+# Verified against when a username does not exist, so unknown and known
+# usernames cost the same bcrypt work; computed once instead of per login
+DUMMY_PASSWORD_HASH = getPasswordHash("dummy_password_for_timing_consistency")
+
+# bcrypt runs here rather than on the request threadpool (see hashing.py)
+passwordHashPool = PasswordHashPool(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_QUEUED)
+
+
+async def runPasswordWork(work: Callable[..., T], *args) -> T:
+    """
+    Run a bcrypt operation on the password hashing pool.
+
+    Args:
+        work: getPasswordHash or verifyPassword
+        *args: Arguments for the operation
+
+    Returns:
+        Result of the operation
+
+    Raises:
+        HTTPException: 503 if the hashing pool is saturated
+    """
+    try:
+        return await passwordHashPool.run(work, *args)
+    except HashPoolFullError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many sign-ins in progress, retry shortly",
+            headers={"Retry-After": "1"},
+        )
+
+
+async def getPasswordHashAsync(password: str) -> str:
+    """Hash a password on the hashing pool."""
+    return await runPasswordWork(getPasswordHash, password)
+
+
 # ============================================================================
 # JWT Token Management
 # ============================================================================
 
+# Keyed by SHA-256 of the token; holds (TokenData, token type) for verified tokens
+tokenCache = TTLCache(settings.TOKEN_CACHE_MAX_ENTRIES, settings.TOKEN_CACHE_TTL_SECONDS)
+
+
 def createAccessToken(data: dict, expiresDelta: Optional[timedelta] = None) -> str:
     """
     Create a JWT access token.
@@ -86,6 +135,9 @@ def verifyToken(
     """
     Verify and decode a JWT token with type validation.
 
+    Verified tokens are kept in tokenCache until they expire, so a token
+    reused across requests is only decoded and signature-checked once.
+
     Args:
         token: JWT token string
         credentialsException: Exception to raise if validation fails
@@ -98,8 +150,16 @@ def verifyToken(
         credentialsException: If token is invalid or expired
         HTTPException: If token type doesn't match expected type
     """
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    # Tokens are cached by digest so the raw bearer token is never kept
+    tokenDigest = hashlib.sha256(token.encode()).digest()
+    verified = tokenCache.get(tokenDigest)
+
+    if verified is None:
+        try:
+            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        except JWTError:
+            raise credentialsException
+
         username: str = payload.get("sub")
         userId: int = payload.get("user_id")
         tokenType: str = payload.get("type")
@@ -107,29 +167,162 @@ def verifyToken(
         if username is None or userId is None:
             raise credentialsException
 
-        # Verify token type matches expected type
-        if tokenType != expectedType:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail=f"Invalid token type. Expected {expectedType}, got {tokenType}",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
+        verified = (TokenData(username=username, user_id=userId), tokenType)
+        # jwt.decode has checked exp, so the entry can live until the token expires;
+        # a token without exp is not cached, so it is verified on every request
+        expiresAt = payload.get("exp")
+        if isinstance(expiresAt, (int, float)):
+            tokenCache.set(tokenDigest, verified, ttlSeconds=expiresAt - time.time())
+
+    tokenData, tokenType = verified
+
+    # Verify token type matches expected type
+    if tokenType != expectedType:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=f"Invalid token type. Expected {expectedType}, got {tokenType}",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    return tokenData
+
+
+# ============================================================================
+# Authenticated User Cache
+# ============================================================================
+
+# Keyed by user ID; holds AuthenticatedUser snapshots, never ORM objects
+userCache = TTLCache(settings.USER_CACHE_MAX_ENTRIES, settings.USER_CACHE_TTL_SECONDS)
+
+
+# session.info key of the user IDs flushed in the session's open transaction
+CHANGED_USERS_KEY = "changedUserIds"
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def invalidateCachedUser(mapper, connection, target: User) -> None:
+    """
+    Drop a user from the cache whenever its row is changed or deleted.
+
+    This runs at flush, before the change is committed: a concurrent request
+    can still load and cache the old row until then, so the ID is also kept
+    on the session and evicted again once the transaction commits.
+    """
+    userCache.invalidate(target.id)
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(CHANGED_USERS_KEY, set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def invalidateCommittedUsers(session: Session) -> None:
+    """Evict the users changed in a transaction once it has committed."""
+    for userId in session.info.pop(CHANGED_USERS_KEY, ()):
+        userCache.invalidate(userId)
+
 
-        return TokenData(username=username, user_id=userId)
+@event.listens_for(Session, "after_rollback")
+def forgetChangedUsers(session: Session) -> None:
+    """Drop the changed user IDs of a rolled back transaction."""
+    session.info.pop(CHANGED_USERS_KEY, None)
 
-    except JWTError:
+
+def checkAuthenticatedUser(
+    user: Optional[AuthenticatedUser],
+    credentialsException: HTTPException
+) -> AuthenticatedUser:
+    """
+    Reject unknown and deactivated users.
+
+    Args:
+        user: Cached or freshly loaded user, None if it does not exist
+        credentialsException: Exception to raise for unknown users
+
+    Returns:
+        The active user
+
+    Raises:
+        credentialsException: If the user does not exist
+        HTTPException: If the user account is inactive
+    """
+    if user is None:
         raise credentialsException
 
+    if not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Inactive user account"
+        )
+
+    return user
+
+
+def cacheAuthenticatedUser(dbUser: Optional[User]) -> Optional[AuthenticatedUser]:
+    """
+    Snapshot a loaded user and store it in the cache.
+
+    Args:
+        dbUser: User row, or None if it was not found
+
+    Returns:
+        Snapshot of the user, or None
+    """
+    if dbUser is None:
+        return None
+    user = AuthenticatedUser.model_validate(dbUser)
+    userCache.set(user.id, user)
+    return user
+
+
+def loadUserProfile(dbUser: Optional[User]) -> User:
+    """
+    Return the full user row for the profile endpoint.
+
+    Args:
+        dbUser: User row loaded by ID, None if it was deleted meanwhile
+
+    Returns:
+        The user row
+
+    Raises:
+        HTTPException: If the user no longer exists
+    """
+    if dbUser is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return dbUser
+
 
 # ============================================================================
 # User Authentication
 # ============================================================================
 
+def getUserByUsername(db: Session, username: str) -> Optional[User]:
+    """
+    Load a user by username.
+
+    Args:
+        db: Database session
+        username: User's username
+
+    Returns:
+        User object, or None if no user has this username
+    """
+    return db.query(User).filter(User.username == username).first()
+
+
 def authenticateUser(db: Session, username: str, password: str) -> Optional[User]:
     """
     Authenticate a user by username and password.
     Uses constant-time operations to prevent timing attacks.
 
+    Runs bcrypt on the calling thread; request handlers use
+    checkUserPassword instead so the work goes to the hashing pool.
+
     Args:
         db: Database session
         username: User's username
@@ -138,12 +331,11 @@ def authenticateUser(db: Session, username: str, password: str) -> Optional[User
     Returns:
         User object if authentication successful, None otherwise
     """
-    user = db.query(User).filter(User.username == username).first()
+    user = getUserByUsername(db, username)
 
     # Always verify password even if user doesn't exist (constant time)
     # This prevents username enumeration through timing analysis
-    dummyHash = getPasswordHash("dummy_password_for_timing_consistency")
-    passwordHash = user.hashed_password if user else dummyHash
+    passwordHash = user.hashed_password if user else DUMMY_PASSWORD_HASH
 
     passwordValid = verifyPassword(password, passwordHash)
 
@@ -154,19 +346,50 @@ def authenticateUser(db: Session, username: str, password: str) -> Optional[User
     return user
 
 
+async def checkUserPassword(user: Optional[User], password: str) -> Optional[User]:
+    """
+    Verify a password for a looked-up user on the hashing pool.
+
+    Performs the same bcrypt work whether or not the user exists.
+
+    Args:
+        user: User found by username, or None
+        password: Plain text password
+
+    Returns:
+        The user if it exists and the password is valid, None otherwise
+
+    Raises:
+        HTTPException: 503 if the hashing pool is saturated
+    """
+    passwordHash = user.hashed_password if user else DUMMY_PASSWORD_HASH
+    passwordValid = await runPasswordWork(verifyPassword, password, passwordHash)
+
+    if not user or not passwordValid:
+        return None
+
+    return user
+
+
 def getCurrentUser(
+    request: Request,
     token: str = Depends(oauth2Scheme),
     db: Session = Depends(getDb)
-) -> User:
+) -> AuthenticatedUser:
     """
     Dependency to get the current authenticated user.
 
+    The user is served from userCache when possible, so repeat requests do
+    not query the users table. Sub-requests of POST /batch return the user
+    the batch was authenticated as (batchUser in the request state).
+
     Args:
+        request: Incoming request
         token: JWT token from request header
         db: Database session
 
     Returns:
-        Current User object
+        Current user's id, username and active flag
 
     Raises:
         HTTPException: If token is invalid or user not found
@@ -177,24 +400,24 @@ def getCurrentUser(
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+    batchUser = getattr(request.state, "batchUser", None)
+    if batchUser is not None:
+        return batchUser
+
     tokenData = verifyToken(token, credentialsException)
 
-    user = db.query(User).filter(User.id == tokenData.user_id).first()
+    user = userCache.get(tokenData.user_id)
     if user is None:
-        raise credentialsException
-
-    if not user.is_active:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Inactive user account"
+        user = cacheAuthenticatedUser(
+            db.query(User).filter(User.id == tokenData.user_id).first()
         )
 
-    return user
+    return checkAuthenticatedUser(user, credentialsException)
 
 
 def getCurrentActiveUser(
-    currentUser: User = Depends(getCurrentUser)
-) -> User:
+    currentUser: AuthenticatedUser = Depends(getCurrentUser)
+) -> AuthenticatedUser:
     """
     Dependency to ensure user is active.
 
@@ -202,7 +425,96 @@ def getCurrentActiveUser(
         currentUser: Current user from getCurrentUser dependency
 
     Returns:
-        Active User object
+        Active user
+
+    Raises:
+        HTTPException: If user account is inactive
+    """
+    if not currentUser.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Inactive user"
+        )
+    return currentUser
+
+
+# ============================================================================
+# Async User Authentication (ASYNC_DATABASE_ENABLED)
+# ============================================================================
+
+async def authenticateUserAsync(db: AsyncSession, username: str, password: str) -> Optional[User]:
+    """
+    Authenticate a user by username and password using an async session.
+
+    bcrypt work runs on the hashing pool so it does not block the event loop.
+    Uses the same constant-time approach as authenticateUser.
+
+    Args:
+        db: Async database session
+        username: User's username
+        password: Plain text password
+
+    Returns:
+        User object if authentication successful, None otherwise
+    """
+    result = await db.execute(select(User).where(User.username == username))
+    user = result.scalars().first()
+
+    return await checkUserPassword(user, password)
+
+
+async def getCurrentUserAsync(
+    request: Request,
+    token: str = Depends(oauth2Scheme),
+    db: AsyncSession = Depends(getAsyncDb)
+) -> AuthenticatedUser:
+    """
+    Async dependency to get the current authenticated user.
+
+    Shares userCache with getCurrentUser and, like it, returns the batch's
+    user for sub-requests of POST /batch.
+
+    Args:
+        request: Incoming request
+        token: JWT token from request header
+        db: Async database session
+
+    Returns:
+        Current user's id, username and active flag
+
+    Raises:
+        HTTPException: If token is invalid or user not found
+    """
+    credentialsException = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+    batchUser = getattr(request.state, "batchUser", None)
+    if batchUser is not None:
+        return batchUser
+
+    tokenData = verifyToken(token, credentialsException)
+
+    user = userCache.get(tokenData.user_id)
+    if user is None:
+        user = cacheAuthenticatedUser(await db.get(User, tokenData.user_id))
+
+    return checkAuthenticatedUser(user, credentialsException)
+
+
+async def getCurrentActiveUserAsync(
+    currentUser: AuthenticatedUser = Depends(getCurrentUserAsync)
+) -> AuthenticatedUser:
+    """
+    Async dependency to ensure user is active.
+
+    Args:
+        currentUser: Current user from getCurrentUserAsync dependency
+
+    Returns:
+        Active user
 
     Raises:
         HTTPException: If user account is inactive
@@ -0,0 +1,222 @@
+"""
+Batched read requests for dashboard page loads.
+
+A dashboard load issues /auth/me, a list page, a summary and a trends call.
+Sent separately, each is authenticated on its own and opens its own session.
+POST /batch takes those sub-requests in one body and runs them one after the
+other inside the same ASGI app, so routing, parameter validation, ETags and
+single flight behave exactly as for direct calls.
+
+The batch request is authenticated once and opens one session. Each
+sub-request gets the batch's scope state with two extra entries:
+
+- batchUser: the authenticated user, returned by getCurrentUser(Async)
+  without verifying the token again
+- batchDb: the batch's session, yielded by getDb / getAsyncDb instead of a
+  new one (and left open for the next sub-request)
+
+Before the first sub-request the session starts a read transaction (BEGIN on
+SQLite, REPEATABLE READ on PostgreSQL), so all sub-responses come from one
+snapshot: a write that commits halfway through the batch shows up in none of
+them or, after the batch, in all of them. For the same reason sub-requests
+bypass the response cache (responseCacheKey returns None when batchDb is
+set), as a cached body may be newer than the snapshot.
+
+Only GET routes in BATCHABLE_PATHS can be batched; streaming and write routes
+are answered with 400 for that item. Sub-requests still count against the
+per-route rate limits.
+"""
+import json
+from typing import List, Optional, Tuple
+
+from fastapi import FastAPI, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.routing import Match
+
+from config import settings
+from schemas import AuthenticatedUser, BatchRequestItem
+
+# Route templates a batch may call (all GET, all small JSON responses)
+BATCHABLE_PATHS = frozenset(f"{settings.API_V1_PREFIX}{path}" for path in (
+    "/auth/me",
+    "/expenses",
+    "/expenses/summary",
+    "/expenses/trends",
+    "/expenses/changes",
+    "/expenses/{expense_id}",
+    "/categories",
+))
+
+# Connection details a sub-request inherits from the batch request
+SCOPE_KEYS = ("asgi", "http_version", "scheme", "server", "client", "root_path", "extensions")
+
+
+def snapshotStatement(dialectName: str, driverConnection) -> Optional[str]:
+    """
+    Return the statement that makes the following reads share one snapshot.
+
+    Args:
+        dialectName: SQLAlchemy dialect name
+        driverConnection: Driver-level connection (sqlite3 or aiosqlite)
+
+    Returns:
+        SQL to run first, or None if nothing is needed or supported
+    """
+    if dialectName == "sqlite":
+        # pysqlite only opens transactions for writes; a deferred BEGIN makes
+        # the first SELECT take a snapshot that lasts until the session ends
+        return None if driverConnection.in_transaction else "BEGIN"
+    if dialectName == "postgresql":
+        return "SET TRANSACTION ISOLATION LEVEL REPEATABLE READ"
+    return None
+
+
+def beginReadSnapshot(db: Session) -> None:
+    """
+    Start a read transaction on a session.
+
+    Args:
+        db: Fresh database session
+    """
+    connection = db.connection()
+    statement = snapshotStatement(connection.dialect.name, connection.connection.driver_connection)
+    if statement:
+        connection.exec_driver_sql(statement)
+
+
+async def beginReadSnapshotAsync(db: AsyncSession) -> None:
+    """
+    Start a read transaction on an async session.
+
+    Args:
+        db: Fresh async database session
+    """
+    connection = await db.connection()
+    rawConnection = await connection.get_raw_connection()
+    statement = snapshotStatement(connection.dialect.name, rawConnection.driver_connection)
+    if statement:
+        await connection.exec_driver_sql(statement)
+
+
+def isBatchable(app: FastAPI, scope: dict) -> bool:
+    """
+    Check that a sub-request scope resolves to a batchable route.
+
+    Args:
+        app: Application the sub-request is dispatched to
+        scope: Sub-request ASGI scope
+
+    Returns:
+        True if the first route fully matching the scope is in BATCHABLE_PATHS
+    """
+    for route in app.router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", None) in BATCHABLE_PATHS
+    return False
+
+
+def buildSubRequestScope(parentScope: dict, item: BatchRequestItem, user: AuthenticatedUser, db) -> dict:
+    """
+    Build the ASGI scope of one sub-request.
+
+    Args:
+        parentScope: Scope of the batch request
+        item: Sub-request from the batch body
+        user: User the batch was authenticated as
+        db: The batch's session (sync or async)
+
+    Returns:
+        GET scope carrying the batch's Authorization header and state
+    """
+    path, _, query = item.path.partition("?")
+    headers = [(name, value) for name, value in parentScope["headers"] if name == b"authorization"]
+    if item.if_none_match:
+        headers.append((b"if-none-match", item.if_none_match.encode("latin-1")))
+    return {
+        **{key: parentScope[key] for key in SCOPE_KEYS if key in parentScope},
+        "type": "http",
+        "method": "GET",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "headers": headers,
+        "state": {**parentScope.get("state", {}), "batchUser": user, "batchDb": db},
+    }
+
+
+async def runSubRequest(app: FastAPI, scope: dict) -> Tuple[int, Optional[str], bytes]:
+    """
+    Dispatch a sub-request to the app and collect its response.
+
+    Args:
+        app: Application to call
+        scope: Result of buildSubRequestScope
+
+    Returns:
+        (status code, ETag or None, body)
+    """
+    response = {"status": 500, "etag": None}
+    chunks = []
+
+    async def receive() -> dict:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: dict) -> None:
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            for name, value in message.get("headers", []):
+                if name.lower() == b"etag":
+                    response["etag"] = value.decode("latin-1")
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    try:
+        await app(scope, receive, send)
+    except Exception:
+        # The server error middleware has sent a plain-text 500 and re-raises
+        # for logging; one failed sub-request must not fail the others
+        return 500, None, json.dumps({"error": {"message": "Internal server error"}}).encode()
+    return response["status"], response["etag"], b"".join(chunks)
+
+
+def encodeBatchItem(status: int, etag: Optional[str], body: bytes) -> bytes:
+    """
+    Encode one sub-response, embedding its JSON body without re-parsing it.
+
+    Args:
+        status: Status code
+        etag: ETag header, if any
+        body: JSON body (empty for 304)
+
+    Returns:
+        JSON object matching BatchResponseItem
+    """
+    head = json.dumps({"status": status, "etag": etag})[:-1].encode()
+    return head + b', "body": ' + (body or b"null") + b"}"
+
+
+async def runBatch(request: Request, items: List[BatchRequestItem], user: AuthenticatedUser, db) -> bytes:
+    """
+    Run a batch's sub-requests in order and encode the combined response.
+
+    Args:
+        request: The batch request
+        items: Sub-requests from the batch body
+        user: User the batch was authenticated as
+        db: The batch's session, already in a read snapshot
+
+    Returns:
+        JSON body matching BatchResponse
+    """
+    app = request.app
+    encoded = []
+    for item in items:
+        scope = buildSubRequestScope(request.scope, item, user, db)
+        if isBatchable(app, scope):
+            encoded.append(encodeBatchItem(*await runSubRequest(app, scope)))
+        else:
+            message = f"Not a read route that can be batched: {scope['path']}"
+            encoded.append(encodeBatchItem(400, None, json.dumps({"error": {"message": message}}).encode()))
+    return b'{"responses": [' + b", ".join(encoded) + b"]}"
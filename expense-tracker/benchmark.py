@@ -0,0 +1,702 @@
+#!/usr/bin/env python3
+"""
+Performance benchmarks for the Expense Tracker API.
+
+Each scenario prints a small results table so numbers can be compared
+before and after a change. Scenarios run against temporary databases and
+never touch expense_tracker.db.
+
+Usage:
+    python benchmark.py sqlite [--threads 8] [--seconds 5] [--write-ratio 0.2]
+    python benchmark.py writequeue [--threads 32] [--seconds 5]
+    python benchmark.py import [--rows 100000] [--format csv]
+    python benchmark.py tokens [--iterations 20000]
+    python benchmark.py serialization [--page-size 100] [--iterations 2000]
+    python benchmark.py reads [--page-size 100] [--pages 500]
+    python benchmark.py categories [--expenses 20000] [--lookups 2000]
+    python benchmark.py search [--expenses 200000] [--queries 200]
+    python benchmark.py trends [--expenses 1000000]
+    python benchmark.py coalescing [--expenses 200000] [--tabs 8] [--rounds 10]
+"""
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+
+from datetime import datetime, timedelta
+from functools import partial
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from sqlalchemy import func, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+import auth
+from cache import TTLCache
+from categoryindex import CategoryPrefixIndex, buildCategoryUsageQuery
+from database import Base, createDbEngine
+from fastjson import dumpJson, serializeResponse
+from importer import streamImport
+from models import User, Expense, Category
+from mutations import insertExpense
+from queries import buildCategoryTotalsQuery, buildExpenseFilters, buildExpenseSummary, buildOrderBy
+from reads import fetchExpensePage
+from schemas import ExpenseCreate, ExpenseListResponse, ExpenseResponse, ExpenseSummary
+from singleflight import SingleFlight
+from trends import buildTrendsQuery, parseTimezone, planTrends, trendsResponse
+from writer import GroupCommitWriter
+
+
+def seedDatabase(session, expenseCount: int) -> int:
+    """
+    Insert one user and a number of expenses for benchmarking.
+
+    Args:
+        session: Database session
+        expenseCount: Number of expenses to insert
+
+    Returns:
+        ID of the seeded user
+    """
+    user = User(email="bench@example.com", username="bench", hashed_password="x")
+    session.add(user)
+    session.commit()
+    session.bulk_save_objects([
+        Expense(
+            amount=round(random.uniform(1, 500), 2),
+            category=random.choice(["Food", "Transport", "Rent", "Fun"]),
+            description=f"Seed expense {i}",
+            user_id=user.id
+        )
+        for i in range(expenseCount)
+    ])
+    session.commit()
+    return user.id
+
+
+def runMixedLoad(profile: str, threads: int, seconds: float, writeRatio: float) -> dict:
+    """
+    Run a mixed read/write workload against a fresh SQLite database.
+
+    Readers fetch a 20-row page of the user's expenses (like listExpenses),
+    writers insert one expense and commit (like createExpense).
+
+    Args:
+        profile: Database profile passed to createDbEngine
+        threads: Number of concurrent worker threads
+        seconds: Duration of the measurement
+        writeRatio: Fraction of operations that are writes
+
+    Returns:
+        Dictionary with read/write/error counts and operations per second
+    """
+    tmpDir = tempfile.mkdtemp(prefix="expense-bench-")
+    dbEngine = createDbEngine(f"sqlite:///{os.path.join(tmpDir, 'bench.db')}", profile=profile)
+    Base.metadata.create_all(bind=dbEngine)
+    BenchSession = sessionmaker(autocommit=False, autoflush=False, bind=dbEngine)
+
+    with BenchSession() as session:
+        userId = seedDatabase(session, 5000)
+
+    counts = {"reads": 0, "writes": 0, "errors": 0}
+    countsLock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def worker() -> None:
+        rng = random.Random()
+        local = {"reads": 0, "writes": 0, "errors": 0}
+        with BenchSession() as session:
+            while time.perf_counter() < deadline:
+                try:
+                    if rng.random() < writeRatio:
+                        session.add(Expense(
+                            amount=12.5, category="Food", description="bench", user_id=userId
+                        ))
+                        session.commit()
+                        local["writes"] += 1
+                    else:
+                        session.query(Expense).filter(
+                            Expense.user_id == userId,
+                            Expense.is_deleted == False
+                        ).order_by(Expense.date.desc()).limit(20).all()
+                        session.commit()
+                        local["reads"] += 1
+                except OperationalError:
+                    session.rollback()
+                    local["errors"] += 1
+        with countsLock:
+            for key, value in local.items():
+                counts[key] += value
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    startTime = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - startTime
+    dbEngine.dispose()
+    shutil.rmtree(tmpDir, ignore_errors=True)
+
+    counts["ops_per_sec"] = (counts["reads"] + counts["writes"]) / elapsed
+    counts["writes_per_sec"] = counts["writes"] / elapsed
+    return counts
+
+
+def benchmarkSqlite(args: argparse.Namespace) -> None:
+    """Compare the legacy and production SQLite profiles under mixed load."""
+    print(f"Mixed load: {args.threads} threads, {args.seconds}s, "
+          f"{args.write_ratio:.0%} writes")
+    print(f"{'profile':<12}{'ops/s':>10}{'writes/s':>10}{'reads':>10}{'writes':>10}{'errors':>8}")
+    for profile in ("legacy", "production"):
+        result = runMixedLoad(profile, args.threads, args.seconds, args.write_ratio)
+        print(f"{profile:<12}{result['ops_per_sec']:>10.0f}{result['writes_per_sec']:>10.0f}"
+              f"{result['reads']:>10}{result['writes']:>10}{result['errors']:>8}")
+
+
+def runWriteBurst(useWriteQueue: bool, threads: int, seconds: float) -> dict:
+    """
+    Run concurrent createExpense-style inserts with or without the write queue.
+
+    Args:
+        useWriteQueue: Commit through GroupCommitWriter instead of per request
+        threads: Number of concurrent request threads
+        seconds: Duration of the measurement
+
+    Returns:
+        Dictionary with write/error counts and writes per second
+    """
+    tmpDir = tempfile.mkdtemp(prefix="expense-bench-")
+    databaseUrl = f"sqlite:///{os.path.join(tmpDir, 'bench.db')}"
+    dbEngine = createDbEngine(databaseUrl)
+    Base.metadata.create_all(bind=dbEngine)
+    BenchSession = sessionmaker(autocommit=False, autoflush=False, bind=dbEngine)
+    with BenchSession() as session:
+        userId = seedDatabase(session, 0)
+
+    groupWriter = None
+    if useWriteQueue:
+        groupWriter = GroupCommitWriter(databaseUrl)
+        groupWriter.start()
+
+    work = partial(
+        insertExpense, userId=userId,
+        expense=ExpenseCreate(amount=12.5, category="Food", description="bench")
+    )
+    counts = {"writes": 0, "errors": 0}
+    countsLock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def worker() -> None:
+        local = {"writes": 0, "errors": 0}
+        with BenchSession() as session:
+            while time.perf_counter() < deadline:
+                try:
+                    if groupWriter:
+                        groupWriter.execute(work)
+                    else:
+                        work(session)
+                        session.commit()
+                    local["writes"] += 1
+                except OperationalError:
+                    session.rollback()
+                    local["errors"] += 1
+        with countsLock:
+            for key, value in local.items():
+                counts[key] += value
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    startTime = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - startTime
+
+    if groupWriter:
+        counts["batches"] = groupWriter.stats["batches"]
+        groupWriter.stop()
+    dbEngine.dispose()
+    shutil.rmtree(tmpDir, ignore_errors=True)
+
+    counts["writes_per_sec"] = counts["writes"] / elapsed
+    return counts
+
+
+def benchmarkWriteQueue(args: argparse.Namespace) -> None:
+    """Compare per-request commits with the group-commit write queue."""
+    print(f"Write burst: {args.threads} threads, {args.seconds}s")
+    print(f"{'mode':<16}{'writes/s':>10}{'writes':>10}{'commits':>10}{'errors':>8}")
+    for useWriteQueue in (False, True):
+        result = runWriteBurst(useWriteQueue, args.threads, args.seconds)
+        mode = "write queue" if useWriteQueue else "per request"
+        commits = result.get("batches", result["writes"])
+        print(f"{mode:<16}{result['writes_per_sec']:>10.0f}{result['writes']:>10}"
+              f"{commits:>10}{result['errors']:>8}")
+
+
+def buildImportBody(rowCount: int, importFormat: str, chunkBytes: int = 65536) -> list:
+    """
+    Build an upload body split into network-sized chunks.
+
+    Args:
+        rowCount: Number of expense rows
+        importFormat: "csv" or "ndjson"
+        chunkBytes: Size of each body chunk
+
+    Returns:
+        List of byte chunks
+    """
+    if importFormat == "csv":
+        lines = ["amount,category,description,date"]
+        lines += [f"{i % 500 + 1}.25,Food,Imported row {i},2024-01-{i % 28 + 1:02d}"
+                  for i in range(rowCount)]
+    else:
+        lines = [f'{{"amount": {i % 500 + 1}.25, "category": "Food", '
+                 f'"description": "Imported row {i}", "date": "2024-01-{i % 28 + 1:02d}"}}'
+                 for i in range(rowCount)]
+    body = ("\n".join(lines) + "\n").encode()
+    return [body[start:start + chunkBytes] for start in range(0, len(body), chunkBytes)]
+
+
+def runImport(rowCount: int, importFormat: str) -> dict:
+    """
+    Import a generated upload into a fresh database through streamImport.
+
+    Args:
+        rowCount: Number of expense rows
+        importFormat: "csv" or "ndjson"
+
+    Returns:
+        The final import event plus rows per second
+    """
+    tmpDir = tempfile.mkdtemp(prefix="expense-bench-")
+    dbEngine = createDbEngine(f"sqlite:///{os.path.join(tmpDir, 'bench.db')}")
+    Base.metadata.create_all(bind=dbEngine)
+    BenchSession = sessionmaker(autocommit=False, autoflush=False, bind=dbEngine)
+    with BenchSession() as session:
+        userId = seedDatabase(session, 0)
+    chunks = buildImportBody(rowCount, importFormat)
+
+    async def byteStream():
+        for chunk in chunks:
+            yield chunk
+
+    async def consume() -> dict:
+        lastEvent = None
+        async for event in streamImport(byteStream(), importFormat, dbEngine, userId):
+            lastEvent = event
+        return lastEvent
+
+    startTime = time.perf_counter()
+    result = asyncio.run(consume())
+    elapsed = time.perf_counter() - startTime
+    dbEngine.dispose()
+    shutil.rmtree(tmpDir, ignore_errors=True)
+
+    result["rows_per_sec"] = result["inserted"] / elapsed
+    return result
+
+
+def benchmarkImport(args: argparse.Namespace) -> None:
+    """Measure streaming import throughput into SQLite."""
+    print(f"Streaming import: {args.rows} rows")
+    print(f"{'format':<10}{'rows/s':>10}{'inserted':>10}{'chunks':>8}{'failed':>8}")
+    formats = ("csv", "ndjson") if args.format == "all" else (args.format,)
+    for importFormat in formats:
+        result = runImport(args.rows, importFormat)
+        print(f"{importFormat:<10}{result['rows_per_sec']:>10.0f}{result['inserted']:>10}"
+              f"{result['chunks']:>8}{result['failed']:>8}")
+
+
+def timeTokenVerification(iterations: int) -> float:
+    """
+    Time verifyToken on one reused access token.
+
+    Args:
+        iterations: Number of verifications
+
+    Returns:
+        Microseconds per verification
+    """
+    token = auth.createAccessToken(data={"sub": "bench", "user_id": 1})
+    credentialsException = Exception("invalid token")
+    startTime = time.perf_counter()
+    for _ in range(iterations):
+        auth.verifyToken(token, credentialsException)
+    return (time.perf_counter() - startTime) / iterations * 1e6
+
+
+def benchmarkTokens(args: argparse.Namespace) -> None:
+    """Compare verifyToken with and without the verified-token cache."""
+    print(f"Token verification: {args.iterations} requests reusing one access token")
+    print(f"{'mode':<16}{'us/request':>12}")
+    originalCache = auth.tokenCache
+    try:
+        for mode, tokenCache in (("no cache", TTLCache(0, 0)), ("token cache", TTLCache(16, 1800))):
+            auth.tokenCache = tokenCache
+            print(f"{mode:<16}{timeTokenVerification(args.iterations):>12.1f}")
+    finally:
+        auth.tokenCache = originalCache
+
+
+def buildExpensePage(pageSize: int) -> dict:
+    """
+    Build a list endpoint result of unsaved Expense rows.
+
+    Args:
+        pageSize: Number of expenses on the page
+
+    Returns:
+        Dictionary shaped like ExpenseListResponse, holding ORM objects
+    """
+    now = datetime(2026, 1, 7, 12, 30, 15)
+    items = [
+        Expense(
+            id=index + 1, amount=round(random.uniform(1, 500), 2),
+            category=random.choice(["Food", "Transport", "Rent", "Fun"]),
+            description=f"Expense number {index}", date=now, created_at=now, user_id=1
+        )
+        for index in range(pageSize)
+    ]
+    return {"items": items, "total": 10 * pageSize, "page": 1, "page_size": pageSize, "pages": 10}
+
+
+async def timeSerialization(encode, iterations: int) -> float:
+    """
+    Time one serialization strategy.
+
+    Args:
+        encode: Coroutine function producing the response body
+        iterations: Number of encodings
+
+    Returns:
+        Milliseconds per encoding
+    """
+    startTime = time.perf_counter()
+    for _ in range(iterations):
+        await encode()
+    return (time.perf_counter() - startTime) / iterations * 1000
+
+
+def benchmarkSerialization(args: argparse.Namespace) -> None:
+    """Compare FastAPI's response_model serialization with the fast JSON path."""
+    page = buildExpensePage(args.page_size)
+    responseField = create_response_field(name="Response_listExpenses", type_=ExpenseListResponse)
+
+    async def fastapiDefault() -> bytes:
+        content = await serialize_response(field=responseField, response_content=page, is_coroutine=True)
+        return JSONResponse(content).body
+
+    async def modelDumpJson() -> bytes:
+        return ExpenseListResponse.model_validate(page, from_attributes=True).model_dump_json().encode()
+
+    async def fastJson() -> bytes:
+        return dumpJson(page)
+
+    print(f"Serialization: list page of {args.page_size} expenses, {args.iterations} iterations")
+    print(f"{'path':<24}{'ms/page':>10}{'bytes':>8}")
+    for name, encode in (
+        ("response_model (default)", fastapiDefault),
+        ("model_dump_json", modelDumpJson),
+        ("orjson (FAST_JSON)", fastJson)
+    ):
+        milliseconds = asyncio.run(timeSerialization(encode, args.iterations))
+        print(f"{name:<24}{milliseconds:>10.3f}{len(asyncio.run(encode())):>8}")
+
+
+def timePageReads(BenchSession, readPage, pages: int, pageSize: int) -> float:
+    """
+    Time reading pages of expenses, one session per page like a request.
+
+    Args:
+        BenchSession: Session factory
+        readPage: Function (session, offset) returning the page's rows
+        pages: Number of pages to read
+        pageSize: Rows per page
+
+    Returns:
+        Rows per second
+    """
+    startTime = time.perf_counter()
+    for pageNumber in range(pages):
+        with BenchSession() as session:
+            rows = readPage(session, (pageNumber * pageSize) % 5000)
+            [ExpenseResponse.model_validate(row, from_attributes=True) for row in rows]
+    return pages * pageSize / (time.perf_counter() - startTime)
+
+
+def benchmarkReads(args: argparse.Namespace) -> None:
+    """Compare list page reads through ORM instances and Core row mappings."""
+    tmpDir = tempfile.mkdtemp(prefix="expense-bench-")
+    dbEngine = createDbEngine(f"sqlite:///{os.path.join(tmpDir, 'bench.db')}", profile="production")
+    Base.metadata.create_all(bind=dbEngine)
+    BenchSession = sessionmaker(autocommit=False, autoflush=False, bind=dbEngine)
+    with BenchSession() as session:
+        userId = seedDatabase(session, 5000 + args.page_size)
+
+    conditions = buildExpenseFilters(userId)
+    orderBy = buildOrderBy("date", "desc")
+
+    def ormPage(session, offset: int) -> list:
+        return session.query(Expense).filter(*conditions).order_by(orderBy) \
+            .offset(offset).limit(args.page_size).all()
+
+    def corePage(session, offset: int) -> list:
+        return fetchExpensePage(session, conditions, orderBy, offset, args.page_size)
+
+    print(f"List reads: {args.pages} pages of {args.page_size} rows, fetched and validated")
+    print(f"{'path':<20}{'rows/s':>10}")
+    try:
+        for name, readPage in (("ORM instances", ormPage), ("Core mappings", corePage)):
+            timePageReads(BenchSession, readPage, 20, args.page_size)  # warm the statement caches
+            print(f"{name:<20}{timePageReads(BenchSession, readPage, args.pages, args.page_size):>10.0f}")
+    finally:
+        dbEngine.dispose()
+        shutil.rmtree(tmpDir, ignore_errors=True)
+
+
+def benchmarkCategories(args: argparse.Namespace) -> None:
+    """Compare category autocomplete from a usage query and from the prefix index."""
+    tmpDir = tempfile.mkdtemp(prefix="expense-bench-")
+    dbEngine = createDbEngine(f"sqlite:///{os.path.join(tmpDir, 'bench.db')}", profile="production")
+    Base.metadata.create_all(bind=dbEngine)
+    BenchSession = sessionmaker(autocommit=False, autoflush=False, bind=dbEngine)
+    names = [f"{word} {number}" for word in ("Food", "Fuel", "Fun", "Rent", "Travel") for number in range(40)]
+    with BenchSession() as session:
+        userId = seedDatabase(session, 0)
+        session.execute(Expense.__table__.insert(), [
+            {"amount": 1.0, "category": random.choice(names), "description": "x", "user_id": userId}
+            for _ in range(args.expenses)
+        ])
+        session.commit()
+    prefixes = ["f", "fo", "foo", "food 1", "t", "tr", "r", "x"]
+
+    def queryLookup(session, prefix: str) -> list:
+        statement = buildCategoryUsageQuery(userId).where(Category.name_key.startswith(prefix))
+        return session.execute(statement.order_by(func.count(Expense.id).desc()).limit(10)).all()
+
+    def indexLookup(session, prefix: str) -> list:
+        return index.search(prefix, 10)
+
+    with BenchSession() as session:
+        startTime = time.perf_counter()
+        index = CategoryPrefixIndex(session.execute(buildCategoryUsageQuery(userId)).all())
+        buildMilliseconds = (time.perf_counter() - startTime) * 1000
+
+    print(f"Category autocomplete: {args.expenses} expenses, {len(names)} categories, {args.lookups} lookups")
+    print(f"Index build: {buildMilliseconds:.2f} ms")
+    print(f"{'path':<20}{'ms/lookup':>10}")
+    try:
+        for name, lookup in (("usage query", queryLookup), ("prefix index", indexLookup)):
+            with BenchSession() as session:
+                startTime = time.perf_counter()
+                for lookupNumber in range(args.lookups):
+                    lookup(session, prefixes[lookupNumber % len(prefixes)])
+                milliseconds = (time.perf_counter() - startTime) * 1000 / args.lookups
+            print(f"{name:<20}{milliseconds:>10.4f}")
+    finally:
+        dbEngine.dispose()
+        shutil.rmtree(tmpDir, ignore_errors=True)
+
+
+def benchmarkSearch(args: argparse.Namespace) -> None:
+    """Compare a description search by LIKE scan and through the FTS index."""
+    tmpDir = tempfile.mkdtemp(prefix="expense-bench-")
+    dbEngine = createDbEngine(f"sqlite:///{os.path.join(tmpDir, 'bench.db')}", profile="production")
+    Base.metadata.create_all(bind=dbEngine)
+    BenchSession = sessionmaker(autocommit=False, autoflush=False, bind=dbEngine)
+    words = [f"word{number}" for number in range(5000)]
+    with BenchSession() as session:
+        userId = seedDatabase(session, 0)
+        session.execute(Expense.__table__.insert(), [
+            {"amount": 1.0, "category": "Food", "user_id": userId,
+             "description": " ".join(random.choices(words, k=6))}
+            for _ in range(args.expenses)
+        ])
+        session.commit()
+    orderBy = buildOrderBy("date", "desc")
+
+    def likePage(session, word: str) -> list:
+        conditions = buildExpenseFilters(userId) + [Expense.description.like(f"%{word} %")]
+        return fetchExpensePage(session, conditions, orderBy, 0, 20)
+
+    def searchPage(session, word: str) -> list:
+        return fetchExpensePage(session, buildExpenseFilters(userId, q=word), orderBy, 0, 20)
+
+    print(f"Description search: {args.expenses} expenses, {args.queries} queries, first page of 20")
+    print(f"{'path':<20}{'ms/query':>10}")
+    try:
+        for name, readPage in (("LIKE scan", likePage), ("FTS5 index", searchPage)):
+            with BenchSession() as session:
+                startTime = time.perf_counter()
+                for _ in range(args.queries):
+                    readPage(session, random.choice(words))
+                milliseconds = (time.perf_counter() - startTime) * 1000 / args.queries
+            print(f"{name:<20}{milliseconds:>10.3f}")
+    finally:
+        dbEngine.dispose()
+        shutil.rmtree(tmpDir, ignore_errors=True)
+
+
+def benchmarkTrends(args: argparse.Namespace) -> None:
+    """Compare trends bucketed in SQL with downloading every expense."""
+    tmpDir = tempfile.mkdtemp(prefix="expense-bench-")
+    dbEngine = createDbEngine(f"sqlite:///{os.path.join(tmpDir, 'bench.db')}", profile="production")
+    Base.metadata.create_all(bind=dbEngine)
+    BenchSession = sessionmaker(autocommit=False, autoflush=False, bind=dbEngine)
+    start = datetime(2023, 1, 1)
+    with BenchSession() as session:
+        userId = seedDatabase(session, 0)
+        for offset in range(0, args.expenses, 100000):
+            session.execute(Expense.__table__.insert(), [
+                {"amount": round(random.uniform(1, 500), 2), "description": "x", "user_id": userId,
+                 "category": random.choice(["Food", "Transport", "Rent", "Fun", "Travel"]),
+                 "date": start + timedelta(seconds=random.randrange(3 * 365 * 86400))}
+                for _ in range(min(100000, args.expenses - offset))
+            ])
+        session.commit()
+    conditions = buildExpenseFilters(userId)
+    span = (start, start + timedelta(days=3 * 365))
+
+    def sqlTrends(session, bucket: str, zoneName: str) -> dict:
+        zone = parseTimezone(zoneName)
+        buckets, segments = planTrends(bucket, zone, None, None, span)
+        rows = session.execute(buildTrendsQuery(conditions, bucket, segments)).all()
+        return trendsResponse(rows, bucket, zoneName, buckets)
+
+    def downloadAll(session) -> list:
+        return session.execute(select(Expense.date, Expense.category, Expense.amount).where(*conditions)).all()
+
+    print(f"Trends over {args.expenses} expenses (3 years)")
+    print(f"{'path':<36}{'ms':>10}")
+    try:
+        with BenchSession() as session:
+            for name, run in (
+                ("download all rows", lambda: downloadAll(session)),
+                ("SQL, month, UTC", lambda: sqlTrends(session, "month", "UTC")),
+                ("SQL, month, America/New_York", lambda: sqlTrends(session, "month", "America/New_York")),
+                ("SQL, day, America/New_York", lambda: sqlTrends(session, "day", "America/New_York")),
+            ):
+                startTime = time.perf_counter()
+                run()
+                print(f"{name:<36}{(time.perf_counter() - startTime) * 1000:>10.0f}")
+    finally:
+        dbEngine.dispose()
+        shutil.rmtree(tmpDir, ignore_errors=True)
+
+
+def benchmarkCoalescing(args: argparse.Namespace) -> None:
+    """Compare identical concurrent summaries run separately and through single flight."""
+    tmpDir = tempfile.mkdtemp(prefix="expense-bench-")
+    dbEngine = createDbEngine(f"sqlite:///{os.path.join(tmpDir, 'bench.db')}", profile="production")
+    Base.metadata.create_all(bind=dbEngine)
+    BenchSession = sessionmaker(autocommit=False, autoflush=False, bind=dbEngine)
+    with BenchSession() as session:
+        userId = seedDatabase(session, args.expenses)
+    conditions = buildExpenseFilters(userId)
+
+    def runRounds(flights: SingleFlight, key) -> float:
+        # Every round, all tabs ask for the same summary at the same instant
+        barrier = threading.Barrier(args.tabs)
+
+        def tab() -> None:
+            with BenchSession() as session:
+                def loadSummary() -> bytes:
+                    categoryTotals = session.execute(buildCategoryTotalsQuery(conditions)).all()
+                    return serializeResponse(ExpenseSummary, buildExpenseSummary(categoryTotals, None, None))
+
+                for _ in range(args.rounds):
+                    barrier.wait()
+                    flights.run(key, loadSummary)
+                    session.commit()
+
+        tabs = [threading.Thread(target=tab) for _ in range(args.tabs)]
+        startTime = time.perf_counter()
+        for thread in tabs:
+            thread.start()
+        for thread in tabs:
+            thread.join()
+        return time.perf_counter() - startTime
+
+    print(f"Summary over {args.expenses} expenses, {args.tabs} identical requests x {args.rounds} rounds")
+    print(f"{'path':<16}{'ms/round':>10}{'executions':>12}{'shared':>8}")
+    try:
+        for name, key in (("separate", None), ("single flight", "summary")):
+            flights = SingleFlight()
+            elapsed = runRounds(flights, key)
+            stats = flights.snapshot()
+            executions = stats["executions"] if key else args.tabs * args.rounds
+            print(f"{name:<16}{elapsed / args.rounds * 1000:>10.1f}{executions:>12}{stats['shared']:>8}")
+    finally:
+        dbEngine.dispose()
+        shutil.rmtree(tmpDir, ignore_errors=True)
+
+
+def main() -> None:
+    """Parse arguments and run the selected benchmark scenario."""
+    parser = argparse.ArgumentParser(description="Expense Tracker performance benchmarks")
+    subparsers = parser.add_subparsers(dest="scenario", required=True)
+
+    sqliteParser = subparsers.add_parser("sqlite", help="SQLite profile under mixed read/write load")
+    sqliteParser.add_argument("--threads", type=int, default=8)
+    sqliteParser.add_argument("--seconds", type=float, default=5.0)
+    sqliteParser.add_argument("--write-ratio", type=float, default=0.2)
+    sqliteParser.set_defaults(func=benchmarkSqlite)
+
+    queueParser = subparsers.add_parser("writequeue", help="Per-request commits vs group commit")
+    queueParser.add_argument("--threads", type=int, default=32)
+    queueParser.add_argument("--seconds", type=float, default=5.0)
+    queueParser.set_defaults(func=benchmarkWriteQueue)
+
+    importParser = subparsers.add_parser("import", help="Streaming CSV/NDJSON import throughput")
+    importParser.add_argument("--rows", type=int, default=100000)
+    importParser.add_argument("--format", choices=["csv", "ndjson", "all"], default="all")
+    importParser.set_defaults(func=benchmarkImport)
+
+    tokensParser = subparsers.add_parser("tokens", help="verifyToken with and without the token cache")
+    tokensParser.add_argument("--iterations", type=int, default=20000)
+    tokensParser.set_defaults(func=benchmarkTokens)
+
+    serializationParser = subparsers.add_parser("serialization", help="List page JSON encoding paths")
+    serializationParser.add_argument("--page-size", type=int, default=100)
+    serializationParser.add_argument("--iterations", type=int, default=2000)
+    serializationParser.set_defaults(func=benchmarkSerialization)
+
+    readsParser = subparsers.add_parser("reads", help="List page reads: ORM instances vs Core mappings")
+    readsParser.add_argument("--page-size", type=int, default=100)
+    readsParser.add_argument("--pages", type=int, default=500)
+    readsParser.set_defaults(func=benchmarkReads)
+
+    categoriesParser = subparsers.add_parser("categories", help="Category autocomplete: query vs prefix index")
+    categoriesParser.add_argument("--expenses", type=int, default=20000)
+    categoriesParser.add_argument("--lookups", type=int, default=2000)
+    categoriesParser.set_defaults(func=benchmarkCategories)
+
+    searchParser = subparsers.add_parser("search", help="Description search: LIKE scan vs FTS5 index")
+    searchParser.add_argument("--expenses", type=int, default=200000)
+    searchParser.add_argument("--queries", type=int, default=200)
+    searchParser.set_defaults(func=benchmarkSearch)
+
+    trendsParser = subparsers.add_parser("trends", help="Trends bucketed in SQL vs downloading all rows")
+    trendsParser.add_argument("--expenses", type=int, default=1000000)
+    trendsParser.set_defaults(func=benchmarkTrends)
+
+    coalescingParser = subparsers.add_parser("coalescing", help="Identical concurrent summaries with and without single flight")
+    coalescingParser.add_argument("--expenses", type=int, default=200000)
+    coalescingParser.add_argument("--tabs", type=int, default=8)
+    coalescingParser.add_argument("--rounds", type=int, default=10)
+    coalescingParser.set_defaults(func=benchmarkCoalescing)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Bounded in-process caches.
+
+TTLCache is a thread-safe LRU map whose entries also expire after a time to
+live. It is shared by the caches that sit in front of per-request work (for
+example the authenticated-user cache in auth.py) and keeps hit/miss counters
+so the saved work can be observed through GET /metrics.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache with per-entry expiry.
+
+    A maxEntries of 0 (or less) disables the cache: every lookup is a miss
+    and nothing is stored.
+    """
+
+    def __init__(self, maxEntries: int, ttlSeconds: float) -> None:
+        """
+        Initialize an empty cache.
+
+        Args:
+            maxEntries: Maximum number of entries before the least recently
+                used one is evicted
+            ttlSeconds: Default time to live of an entry
+        """
+        self.maxEntries = maxEntries
+        self.ttlSeconds = ttlSeconds
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Look up a live entry and mark it as most recently used.
+
+        Args:
+            key: Cache key
+            default: Value returned on a miss
+
+        Returns:
+            Cached value, or default if missing or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return default
+            expiresAt, value = entry
+            if expiresAt <= time.monotonic():
+                del self._entries[key]
+                self.stats["expirations"] += 1
+                self.stats["misses"] += 1
+                return default
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return value
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Look up a live entry without counting it or changing its LRU position.
+
+        Args:
+            key: Cache key
+            default: Value returned if missing or expired
+
+        Returns:
+            Cached value, or default
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                return default
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttlSeconds: Optional[float] = None) -> None:
+        """
+        Store an entry, evicting the least recently used one if full.
+
+        Args:
+            key: Cache key
+            value: Value to cache
+            ttlSeconds: Time to live of this entry (capped at the cache default)
+        """
+        if self.maxEntries <= 0:
+            return
+        ttl = self.ttlSeconds if ttlSeconds is None else min(ttlSeconds, self.ttlSeconds)
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxEntries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        """
+        Drop an entry if present.
+
+        Args:
+            key: Cache key
+        """
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self.stats["invalidations"] += 1
+
+    def clear(self) -> None:
+        """Drop every entry (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def snapshot(self) -> dict:
+        """
+        Return the counters together with the current size and limits.
+
+        Returns:
+            Dictionary suitable for a metrics response
+        """
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "hit_ratio": self.stats["hits"] / lookups if lookups else 0.0,
+                "size": len(self._entries),
+                "max_entries": self.maxEntries,
+                "ttl_seconds": self.ttlSeconds
+            }
@@ -0,0 +1,196 @@
+"""
+In-memory prefix index of each user's categories for autocomplete.
+
+GET /categories is called on every keystroke, so it must not group the
+expenses table each time. The first lookup for a user counts their
+non-deleted expenses per category once (from ix_expenses_user_category) and
+keeps the result as a sorted list of category keys; prefix matches are then a
+bisect and a short scan over that list.
+
+An index is filed under the user's write version from responsecache. Write
+operations record how many expenses they add to or remove from each category
+(CategoryChanges), and after the commit notifyExpenseWrite bumps the version
+and hands those changes to applyCategoryChanges: an index that was current
+before the write is updated in place of a rebuild and filed under the new
+version, so autocomplete does not go back to the expenses table while the
+user writes. A lookup whose stored version no longer matches (an index that
+missed a write, e.g. because two writes settled out of order) rebuilds the
+index. The version is read before the counting query runs, so an index never
+claims a newer version than its data.
+
+Like the response cache, versions are per process. Updates keep the index's
+original expiry, so the index TTL still bounds how long another worker's
+writes can go unseen.
+"""
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, select
+
+from cache import TTLCache
+from config import settings
+from models import Category, Expense
+from responsecache import getUserVersion
+
+# Per-user (write version, CategoryPrefixIndex)
+categoryIndexes = TTLCache(settings.CATEGORY_INDEX_MAX_USERS, settings.CATEGORY_INDEX_TTL_SECONDS)
+
+# Serializes applyCategoryChanges, so concurrent writes do not drop each other's changes
+categoryIndexesLock = threading.Lock()
+
+
+class CategoryChanges:
+    """Net change in the number of non-deleted expenses per category made by a write."""
+
+    def __init__(self) -> None:
+        """Initialize with no changes."""
+        self.counts: Dict[str, Tuple[str, int]] = {}
+
+    def add(self, name: str, nameKey: str, delta: int) -> None:
+        """
+        Record expenses added to (positive delta) or removed from a category.
+
+        Args:
+            name: Category display name
+            nameKey: Normalized category key
+            delta: Change in the category's expense count
+        """
+        _, count = self.counts.get(nameKey, (name, 0))
+        self.counts[nameKey] = (name, count + delta)
+
+
+class CategoryPrefixIndex:
+    """Sorted category keys of one user with display names and usage counts."""
+
+    def __init__(self, rows: Iterable[Tuple[str, str, int]]) -> None:
+        """
+        Build the index from category usage rows.
+
+        Args:
+            rows: (name, name_key, count) rows from buildCategoryUsageQuery
+        """
+        self.entries = {nameKey: (name, count) for name, nameKey, count in rows}
+        self.keys = sorted(self.entries)
+        self.builtAt = time.monotonic()
+
+    def withChanges(self, changes: CategoryChanges) -> "CategoryPrefixIndex":
+        """
+        Build a copy of the index with a write's count changes applied.
+
+        The index itself is left unchanged, as lookups may be reading it.
+
+        Args:
+            changes: Changes recorded by a committed write
+
+        Returns:
+            New index with the same build time
+        """
+        entries = dict(self.entries)
+        for nameKey, (name, delta) in changes.counts.items():
+            currentName, count = entries.get(nameKey, (name, 0))
+            if count + delta > 0:
+                entries[nameKey] = (currentName, count + delta)
+            else:
+                entries.pop(nameKey, None)
+        index = CategoryPrefixIndex((name, nameKey, count) for nameKey, (name, count) in entries.items())
+        index.builtAt = self.builtAt
+        return index
+
+    def search(self, prefix: str, limit: int) -> List[dict]:
+        """
+        Find the categories whose key starts with a prefix.
+
+        Args:
+            prefix: Typed text, compared case-insensitively
+            limit: Maximum categories to return
+
+        Returns:
+            Categories as {"name", "count"}, most used first
+        """
+        prefixKey = prefix.lstrip().casefold()
+        matches = []
+        for position in range(bisect_left(self.keys, prefixKey), len(self.keys)):
+            nameKey = self.keys[position]
+            if not nameKey.startswith(prefixKey):
+                break
+            matches.append(self.entries[nameKey])
+        matches.sort(key=lambda entry: (-entry[1], entry[0].casefold()))
+        return [{"name": name, "count": count} for name, count in matches[:limit]]
+
+
+def buildCategoryUsageQuery(userId: int):
+    """
+    Build the query counting a user's non-deleted expenses per category.
+
+    Args:
+        userId: Owner ID
+
+    Returns:
+        SELECT of (name, name_key, count) for categories in use
+    """
+    return (
+        select(Category.name, Category.name_key, func.count(Expense.id))
+        .join(Expense, Expense.category_id == Category.id)
+        .where(Expense.user_id == userId, Expense.is_deleted == False)
+        .group_by(Category.id)
+    )
+
+
+def getCategoryIndex(userId: int) -> Optional[CategoryPrefixIndex]:
+    """
+    Return the user's index if it reflects all of their writes.
+
+    Args:
+        userId: User ID
+
+    Returns:
+        Current index, or None if it must be rebuilt
+    """
+    entry = categoryIndexes.get(userId)
+    if entry is None:
+        return None
+    version, index = entry
+    if version != getUserVersion(userId):
+        return None
+    return index
+
+
+def storeCategoryIndex(userId: int, version: int, rows: Iterable[Tuple[str, str, int]]) -> CategoryPrefixIndex:
+    """
+    Build and store a user's index.
+
+    Args:
+        userId: User ID
+        version: Write version read before the usage query ran
+        rows: Result of buildCategoryUsageQuery
+
+    Returns:
+        The new index
+    """
+    index = CategoryPrefixIndex(rows)
+    categoryIndexes.set(userId, (version, index))
+    return index
+
+
+def applyCategoryChanges(userId: int, changes: CategoryChanges, version: int) -> None:
+    """
+    Bring a user's index up to date with a committed write.
+
+    Only an index filed under the version just before the write is updated;
+    any other index has missed a write and is rebuilt by the next lookup.
+
+    Args:
+        userId: User ID
+        changes: Changes recorded by the write
+        version: The user's write version after the write
+    """
+    with categoryIndexesLock:
+        entry = categoryIndexes.peek(userId)
+        if entry is None or entry[0] != version - 1:
+            return
+        index = entry[1].withChanges(changes)
+        # Keep the original expiry, which bounds staleness from other workers
+        remaining = settings.CATEGORY_INDEX_TTL_SECONDS - (time.monotonic() - index.builtAt)
+        categoryIndexes.set(userId, (version, index), ttlSeconds=remaining)
@@ -0,0 +1,370 @@
+"""
+In-process change feed and server-sent events for live dashboards.
+
+Dashboards that poll the list and summary endpoints to look live cause most
+of the read traffic. GET /expenses/events instead keeps one response open per
+tab and pushes what changed.
+
+Every committed expense write publishes the owner's id on expenseChanges
+(see notifyExpenseWrite in mutations.py, next to the response cache version
+bump). A notification carries no data: it wakes that user's streams, which
+then read the user's changes since their last sync token with the delta sync
+query and send
+
+- one created / updated / deleted event per changed expense, whose SSE id is
+  the sync token after it, so a reconnecting EventSource resumes from
+  Last-Event-ID without gaps
+- then one summary event with the totals after those changes
+
+Reading the delta rather than shipping rows through the feed covers every
+write path (single writes, batches, bulk updates by filter, imports and the
+write queue) the same way, and a burst of writes is sent as one round of
+events. Summaries go through single flight under the same ETag as
+GET /expenses/summary, so tabs of one user share the aggregation.
+
+The feed is per process. Streams also check for changes at every heartbeat,
+which bounds how late writes made by other workers show up. A stream ends
+after EVENTS_MAX_STREAM_SECONDS so the client reconnects and is
+authenticated again.
+"""
+import asyncio
+import threading
+import time
+from typing import AsyncIterator, Awaitable, Callable, List, Optional, Tuple
+
+from fastapi import HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from starlette.background import BackgroundTask
+
+from config import settings
+from etags import makeEtag
+from models import Expense
+from queries import buildChangesPage, formatSyncToken, parseSyncToken
+from responsecache import normalizeParams
+
+# (event name, SSE id, JSON body) of one changed expense
+ChangeEvent = Tuple[str, str, bytes]
+
+
+class ChangeSubscription:
+    """One open event stream's wake-up signal."""
+
+    def __init__(self, userId: int, loop: asyncio.AbstractEventLoop) -> None:
+        """
+        Initialize an unsignalled subscription.
+
+        Args:
+            userId: User whose writes wake the stream
+            loop: Event loop the stream runs on
+        """
+        self.userId = userId
+        self.loop = loop
+        self.event = asyncio.Event()
+
+    def notify(self) -> None:
+        """Wake the stream; safe to call from any thread."""
+        try:
+            self.loop.call_soon_threadsafe(self.event.set)
+        except RuntimeError:
+            # The loop has shut down; the stream is gone with it
+            pass
+
+    async def wait(self, timeout: float) -> bool:
+        """
+        Wait for a notification.
+
+        Args:
+            timeout: Seconds to wait at most
+
+        Returns:
+            True if notified, False on timeout
+        """
+        try:
+            await asyncio.wait_for(self.event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+
+class ChangeFeed:
+    """Per-user subscriptions notified after committed expense writes."""
+
+    def __init__(self, maxPerUser: int) -> None:
+        """
+        Initialize with no subscriptions.
+
+        Args:
+            maxPerUser: Open streams allowed per user
+        """
+        self.maxPerUser = maxPerUser
+        self._subscriptions: dict = {}
+        self._lock = threading.Lock()
+        self.stats = {"published": 0, "notified": 0, "rejected": 0}
+
+    def subscribe(self, userId: int) -> ChangeSubscription:
+        """
+        Open a subscription for the calling event loop.
+
+        Args:
+            userId: User whose writes to follow
+
+        Returns:
+            New subscription
+
+        Raises:
+            HTTPException: If the user already has maxPerUser streams open
+        """
+        subscription = ChangeSubscription(userId, asyncio.get_running_loop())
+        with self._lock:
+            userSubscriptions = self._subscriptions.setdefault(userId, set())
+            if len(userSubscriptions) >= self.maxPerUser:
+                self.stats["rejected"] += 1
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="Too many open event streams"
+                )
+            userSubscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: ChangeSubscription) -> None:
+        """
+        Close a subscription.
+
+        Args:
+            subscription: Subscription from subscribe
+        """
+        with self._lock:
+            userSubscriptions = self._subscriptions.get(subscription.userId)
+            if userSubscriptions is not None:
+                userSubscriptions.discard(subscription)
+                if not userSubscriptions:
+                    del self._subscriptions[subscription.userId]
+
+    def publish(self, userId: int) -> None:
+        """
+        Wake every stream of a user after a committed write.
+
+        Args:
+            userId: Owner of the written expenses
+        """
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(userId, ()))
+            self.stats["published"] += 1
+            self.stats["notified"] += len(subscriptions)
+        for subscription in subscriptions:
+            subscription.notify()
+
+    def snapshot(self) -> dict:
+        """
+        Return the counters and the number of open streams.
+
+        Returns:
+            Dictionary suitable for a metrics response
+        """
+        with self._lock:
+            return {
+                **self.stats,
+                "streams": sum(len(userSubscriptions) for userSubscriptions in self._subscriptions.values()),
+                "max_per_user": self.maxPerUser
+            }
+
+
+expenseChanges = ChangeFeed(settings.EVENTS_MAX_STREAMS_PER_USER)
+
+
+def buildLatestChangeQuery(userId: int):
+    """
+    Build the query for the position of a user's latest change.
+
+    Args:
+        userId: Owner of the expenses
+
+    Returns:
+        SELECT of at most one (change_seq, id) row
+    """
+    return (
+        select(Expense.change_seq, Expense.id)
+        .where(Expense.user_id == userId)
+        .order_by(Expense.change_seq.desc(), Expense.id.desc())
+        .limit(1)
+    )
+
+
+def latestSyncToken(row: Optional[Tuple[int, int]]) -> str:
+    """
+    Turn the result of buildLatestChangeQuery into a sync token.
+
+    Args:
+        row: (change_seq, id), or None if the user has no expenses
+
+    Returns:
+        Token after which only future changes follow
+    """
+    return formatSyncToken(*row) if row else formatSyncToken(0, 0)
+
+
+def resumeSyncToken(request: Request, since: Optional[str]) -> Optional[str]:
+    """
+    Pick the sync token a stream starts after.
+
+    Args:
+        request: Incoming request (a reconnecting EventSource sends Last-Event-ID)
+        since: Token from the query string
+
+    Returns:
+        Last-Event-ID, else since, else None (only future changes)
+
+    Raises:
+        HTTPException: If the token is malformed
+    """
+    since = request.headers.get("last-event-id") or since
+    if since:
+        parseSyncToken(since)
+    return since
+
+
+def summaryEtag(userId: int, changeSeq: Optional[int]) -> str:
+    """
+    Return the ETag of the unfiltered GET /expenses/summary response.
+
+    Streams use it as their single-flight key, so they share the summary
+    aggregation with each other and with that endpoint.
+
+    Args:
+        userId: Owner of the expenses
+        changeSeq: Result of buildChangeMarker
+
+    Returns:
+        Weak ETag
+    """
+    return makeEtag("summary", userId, changeSeq, normalizeParams({}))
+
+
+def changeEventName(expense: Expense) -> str:
+    """
+    Name the event for a changed expense.
+
+    An expense created and then updated before the stream read it is reported
+    as updated; clients should treat created and updated alike (upsert).
+
+    Args:
+        expense: Row from buildChangesQuery
+
+    Returns:
+        "created", "updated" or "deleted"
+    """
+    if expense.is_deleted:
+        return "deleted"
+    return "created" if expense.updated_at is None else "updated"
+
+
+def buildChangeEvents(
+    expenses: List[Expense],
+    since: str,
+    limit: int,
+    serialize: Callable[[Expense], bytes]
+) -> Tuple[List[ChangeEvent], str, bool]:
+    """
+    Turn a page of delta sync rows into change events.
+
+    Args:
+        expenses: Rows from buildChangesQuery (up to limit + 1)
+        since: Token the rows were read after
+        limit: Page size the rows were read with
+        serialize: Encodes one expense as its response JSON
+
+    Returns:
+        (events, token after the page, whether more changes follow)
+    """
+    page = buildChangesPage(expenses, since, limit)
+    events = [
+        (changeEventName(expense), formatSyncToken(expense.change_seq, expense.id), serialize(expense))
+        for expense in page["changes"]
+    ]
+    return events, page["next_token"], page["has_more"]
+
+
+def formatEvent(name: str, data: bytes, eventId: Optional[str] = None) -> bytes:
+    """
+    Encode one server-sent event.
+
+    Args:
+        name: Event name
+        data: Single-line JSON payload
+        eventId: SSE id (a sync token), if the event has one
+
+    Returns:
+        Event bytes, ending with a blank line
+    """
+    head = f"id: {eventId}\n" if eventId else ""
+    return f"{head}event: {name}\ndata: ".encode() + data + b"\n\n"
+
+
+async def streamExpenseEvents(
+    subscription: ChangeSubscription,
+    since: str,
+    loadChanges: Callable[[str], Awaitable[Tuple[List[ChangeEvent], str, bool]]],
+    loadSummary: Callable[[], Awaitable[bytes]]
+) -> AsyncIterator[bytes]:
+    """
+    Produce a user's event stream until it times out or the client leaves.
+
+    Args:
+        subscription: The stream's subscription (closed when the stream ends)
+        since: Sync token to send changes after
+        loadChanges: Reads a page of change events after a token
+        loadSummary: Reads the summary JSON
+
+    Yields:
+        Encoded server-sent events and keep-alive comments
+    """
+    deadline = time.monotonic() + settings.EVENTS_MAX_STREAM_SECONDS
+    try:
+        yield formatEvent("summary", await loadSummary())
+        while True:
+            # Cleared before reading, so a write committed meanwhile wakes the next wait
+            subscription.event.clear()
+            changed, hasMore = False, True
+            while hasMore:
+                events, since, hasMore = await loadChanges(since)
+                for name, eventId, body in events:
+                    yield formatEvent(name, body, eventId)
+                changed = changed or bool(events)
+            if changed:
+                yield formatEvent("summary", await loadSummary())
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            if not await subscription.wait(min(settings.EVENTS_HEARTBEAT_SECONDS, remaining)):
+                yield b": keep-alive\n\n"
+    finally:
+        expenseChanges.unsubscribe(subscription)
+
+
+def eventStreamResponse(
+    subscription: ChangeSubscription,
+    since: str,
+    loadChanges: Callable[[str], Awaitable[Tuple[List[ChangeEvent], str, bool]]],
+    loadSummary: Callable[[], Awaitable[bytes]]
+) -> StreamingResponse:
+    """
+    Wrap streamExpenseEvents in a text/event-stream response.
+
+    Args:
+        subscription: The stream's subscription
+        since: Sync token to send changes after
+        loadChanges: Reads a page of change events after a token
+        loadSummary: Reads the summary JSON
+
+    Returns:
+        Streaming response that proxies do not buffer
+    """
+    return StreamingResponse(
+        streamExpenseEvents(subscription, since, loadChanges, loadSummary),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # Also closes the subscription if the client leaves before the stream starts
+        background=BackgroundTask(expenseChanges.unsubscribe, subscription)
+    )
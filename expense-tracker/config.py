@@ -18,6 +18,84 @@ class Settings(BaseSettings):
     # Database
     DATABASE_URL: str = "sqlite:///./expense_tracker.db"
 
+    # Database profile: "production" applies the SQLite pragmas below on every
+    # new connection, "legacy" keeps the SQLite defaults (rollback journal)
+    DATABASE_PROFILE: str = "production"
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_CACHE_SIZE_KB: int = 65536
+    SQLITE_MMAP_SIZE_BYTES: int = 268435456
+    SQLITE_TEMP_STORE: str = "MEMORY"
+
+    # Connection pool
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT_SECONDS: int = 30
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+
+    # Async database access: serve auth and expense endpoints with AsyncSession.
+    # ASYNC_DATABASE_URL defaults to DATABASE_URL with an async driver
+    # (sqlite -> sqlite+aiosqlite, postgresql -> postgresql+asyncpg)
+    ASYNC_DATABASE_ENABLED: bool = False
+    ASYNC_DATABASE_URL: Optional[str] = None
+
+    # Single-writer queue: expense writes are committed in batches by one
+    # writer thread (group commit) instead of one commit per request
+    WRITE_QUEUE_ENABLED: bool = False
+    WRITE_QUEUE_BATCH_WINDOW_MS: int = 5
+    WRITE_QUEUE_MAX_BATCH_SIZE: int = 200
+    WRITE_QUEUE_MAX_PENDING: int = 10000
+    WRITE_QUEUE_TIMEOUT_SECONDS: float = 30.0
+
+    # GET /metrics exposes internal cache and queue counters without
+    # authentication, so it is off (404) unless enabled; expose it only to
+    # the monitoring network
+    METRICS_ENABLED: bool = False
+
+    # Authenticated-user cache: skips the users SELECT on repeat requests.
+    # Entries are dropped when a user row changes; the TTL bounds staleness
+    # for changes made outside the ORM. 0 entries disables the cache.
+    USER_CACHE_MAX_ENTRIES: int = 10000
+    USER_CACHE_TTL_SECONDS: float = 60.0
+
+    # Verified-token cache: a token reused across requests is signature-checked
+    # once. Entries never outlive the token's exp claim. 0 entries disables it.
+    TOKEN_CACHE_MAX_ENTRIES: int = 10000
+    TOKEN_CACHE_TTL_SECONDS: float = 1800.0
+
+    # Password hashing pool: bcrypt for login/register runs on these threads
+    # instead of the request threadpool; requests beyond workers + queue get 503
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_QUEUED: int = 64
+
+    # Response cache for the list and summary endpoints, invalidated by a
+    # per-user write version. Versions are per process, so only enable it with
+    # a single worker or when TTL-bounded staleness across workers is acceptable
+    RESPONSE_CACHE_ENABLED: bool = False
+    RESPONSE_CACHE_MAX_ENTRIES: int = 5000
+    RESPONSE_CACHE_TTL_SECONDS: float = 300.0
+
+    # Fast JSON: list, summary and export responses are encoded with orjson
+    # straight from the rows, skipping response_model validation. Needs orjson
+    FAST_JSON_ENABLED: bool = False
+
+    # Single flight: identical concurrent list, summary and trends requests
+    # (same user, parameters and data) share one query and serialized body
+    SINGLE_FLIGHT_ENABLED: bool = True
+
+    # Server-sent events: open streams per user, keep-alive interval (also how
+    # often other workers' writes are picked up) and lifetime before the
+    # client reconnects and is authenticated again
+    EVENTS_MAX_STREAMS_PER_USER: int = 10
+    EVENTS_HEARTBEAT_SECONDS: float = 15.0
+    EVENTS_MAX_STREAM_SECONDS: float = 300.0
+
+    # Category autocomplete index: per-user prefix index rebuilt after that
+    # user's writes; the TTL bounds staleness from other worker processes
+    CATEGORY_INDEX_MAX_USERS: int = 10000
+    CATEGORY_INDEX_TTL_SECONDS: float = 300.0
+
     # Security
     # Default secure key for development/testing - will be validated based on ENVIRONMENT
     SECRET_KEY: str = secrets.token_urlsafe(32)
@@ -37,6 +115,37 @@ class Settings(BaseSettings):
     DEFAULT_PAGE_SIZE: int = 20
     MAX_PAGE_SIZE: int = 100
 
+    # Batch endpoints
+    MAX_BATCH_SIZE: int = 1000
+    MAX_LOOKUP_IDS: int = 500
+    MAX_BATCH_REQUESTS: int = 20
+
+    # Streaming import
+    IMPORT_CHUNK_ROWS: int = 5000
+    IMPORT_MAX_REPORTED_ERRORS: int = 100
+
+    @field_validator('DATABASE_PROFILE')
+    @classmethod
+    def validate_database_profile(cls, v: str) -> str:
+        """Validate DATABASE_PROFILE is a known profile."""
+        if v not in ("production", "legacy"):
+            raise ValueError("DATABASE_PROFILE must be 'production' or 'legacy'")
+        return v
+
+    @field_validator('SQLITE_JOURNAL_MODE', 'SQLITE_SYNCHRONOUS', 'SQLITE_TEMP_STORE')
+    @classmethod
+    def validate_sqlite_pragma_value(cls, v: str, info) -> str:
+        """Validate SQLite pragma values against a whitelist (pragmas cannot be bound)."""
+        allowedValues = {
+            'SQLITE_JOURNAL_MODE': ("DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"),
+            'SQLITE_SYNCHRONOUS': ("OFF", "NORMAL", "FULL", "EXTRA"),
+            'SQLITE_TEMP_STORE': ("DEFAULT", "FILE", "MEMORY"),
+        }[info.field_name]
+        v = v.upper()
+        if v not in allowedValues:
+            raise ValueError(f"{info.field_name} must be one of: {', '.join(allowedValues)}")
+        return v
+
     @model_validator(mode='after')
     def validate_production_secret_key(self) -> 'Settings':
         """Validate SECRET_KEY is secure for production environments."""
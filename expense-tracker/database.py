@@ -1,16 +1,138 @@
 """
 Database configuration and session management.
 """
-from sqlalchemy import create_engine
+from typing import Optional
+from fastapi import Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from config import settings
 
+
+def isSqliteUrl(databaseUrl: str) -> bool:
+    """Return True if the database URL points at SQLite (any driver)."""
+    return databaseUrl.startswith("sqlite")
+
+
+def isInMemorySqliteUrl(databaseUrl: str) -> bool:
+    """Return True for in-memory SQLite URLs, which cannot use a sized pool."""
+    return isSqliteUrl(databaseUrl) and (
+        databaseUrl.endswith(":memory:") or databaseUrl.split("://", 1)[1] in ("", "/")
+    )
+
+
+def applySqlitePragmas(dbapiConnection, connectionRecord) -> None:
+    """
+    Apply the configured SQLite pragmas to a new DBAPI connection.
+
+    Registered as a "connect" event listener so that every pooled connection
+    gets the same settings. busy_timeout is set first so that switching the
+    journal mode waits for other writers instead of failing immediately.
+
+    Args:
+        dbapiConnection: Raw DBAPI connection being opened
+        connectionRecord: SQLAlchemy pool connection record (unused)
+    """
+    cursor = dbapiConnection.cursor()
+    try:
+        # Values are whitelisted/typed by Settings validators; pragmas cannot be bound
+        cursor.execute(f"PRAGMA busy_timeout = {int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+        cursor.execute(f"PRAGMA journal_mode = {settings.SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous = {settings.SQLITE_SYNCHRONOUS}")
+        # Negative cache_size is interpreted by SQLite as KiB instead of pages
+        cursor.execute(f"PRAGMA cache_size = -{int(settings.SQLITE_CACHE_SIZE_KB)}")
+        cursor.execute(f"PRAGMA mmap_size = {int(settings.SQLITE_MMAP_SIZE_BYTES)}")
+        cursor.execute(f"PRAGMA temp_store = {settings.SQLITE_TEMP_STORE}")
+    finally:
+        cursor.close()
+
+
+def getEngineOptions(databaseUrl: str) -> dict:
+    """
+    Build create_engine keyword arguments for a database URL.
+
+    Args:
+        databaseUrl: SQLAlchemy database URL
+
+    Returns:
+        Dictionary of engine options (connect args and pool sizing)
+    """
+    options = {}
+    if isSqliteUrl(databaseUrl):
+        options["connect_args"] = {"check_same_thread": False}
+
+    # In-memory SQLite uses a singleton/static pool that does not accept sizing
+    if not isInMemorySqliteUrl(databaseUrl):
+        options.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+            pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+        )
+    return options
+
+
+def createDbEngine(databaseUrl: str, profile: str = settings.DATABASE_PROFILE) -> Engine:
+    """
+    Create a SQLAlchemy engine using the configured database profile.
+
+    Args:
+        databaseUrl: SQLAlchemy database URL
+        profile: "production" to apply SQLite pragmas, "legacy" for defaults
+
+    Returns:
+        Configured SQLAlchemy engine
+    """
+    dbEngine = create_engine(databaseUrl, **getEngineOptions(databaseUrl))
+    if isSqliteUrl(databaseUrl) and profile == "production":
+        event.listen(dbEngine, "connect", applySqlitePragmas)
+    return dbEngine
+
+
+def getAsyncDatabaseUrl(databaseUrl: str) -> str:
+    """
+    Derive an async driver URL from a sync database URL.
+
+    Args:
+        databaseUrl: SQLAlchemy database URL, e.g. sqlite:///./expense_tracker.db
+
+    Returns:
+        URL using an asyncio driver, e.g. sqlite+aiosqlite:///./expense_tracker.db
+    """
+    scheme, rest = databaseUrl.split("://", 1)
+    if "+" in scheme:
+        return databaseUrl
+    asyncDrivers = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+    return f"{asyncDrivers.get(scheme, scheme)}://{rest}"
+
+
+def createAsyncDbEngine(databaseUrl: str, profile: str = settings.DATABASE_PROFILE) -> AsyncEngine:
+    """
+    Create an async SQLAlchemy engine using the configured database profile.
+
+    Args:
+        databaseUrl: Async SQLAlchemy database URL (e.g. sqlite+aiosqlite://...)
+        profile: "production" to apply SQLite pragmas, "legacy" for defaults
+
+    Returns:
+        Configured async SQLAlchemy engine
+    """
+    options = getEngineOptions(databaseUrl)
+    if "pool_size" in options:
+        # Some async dialects (aiosqlite) default to NullPool; sizing needs a queue pool
+        options["poolclass"] = AsyncAdaptedQueuePool
+    dbEngine = create_async_engine(databaseUrl, **options)
+    if isSqliteUrl(databaseUrl) and profile == "production":
+        # Pool events are registered on the underlying sync engine
+        event.listen(dbEngine.sync_engine, "connect", applySqlitePragmas)
+    return dbEngine
+
+
 # Create SQLAlchemy engine
-engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {}
-)
+engine = createDbEngine(settings.DATABASE_URL)
 
 # Create SessionLocal class for database sessions
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -19,13 +141,23 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
-def getDb():
+def getDb(request: Request):
     """
     Dependency function to get database session.
 
+    Sub-requests of POST /batch share the batch's session (batchDb in the
+    request state, see batching.py), which the batch closes itself.
+
+    Args:
+        request: Incoming request
+
     Yields:
         Database session that automatically closes after use
     """
+    batchDb = getattr(request.state, "batchDb", None)
+    if batchDb is not None:
+        yield batchDb
+        return
     db = SessionLocal()
     try:
         yield db
@@ -33,6 +165,48 @@ def getDb():
         db.close()
 
 
+# Async engine and session factory, created only when async access is enabled
+# so that the async driver (aiosqlite/asyncpg) stays an optional dependency
+asyncEngine: Optional[AsyncEngine] = None
+AsyncSessionLocal: Optional[async_sessionmaker] = None
+
+if settings.ASYNC_DATABASE_ENABLED:
+    asyncEngine = createAsyncDbEngine(
+        settings.ASYNC_DATABASE_URL or getAsyncDatabaseUrl(settings.DATABASE_URL)
+    )
+    # expire_on_commit=False: async sessions cannot lazy-load expired attributes
+    AsyncSessionLocal = async_sessionmaker(asyncEngine, autoflush=False, expire_on_commit=False)
+
+
+async def getAsyncDb(request: Request):
+    """
+    Dependency function to get an async database session.
+
+    Sub-requests of POST /batch share the batch's session, as with getDb.
+
+    Args:
+        request: Incoming request
+
+    Yields:
+        AsyncSession that automatically closes after use
+
+    Raises:
+        RuntimeError: If ASYNC_DATABASE_ENABLED is not set
+    """
+    if AsyncSessionLocal is None:
+        raise RuntimeError("Async database access is disabled. Set ASYNC_DATABASE_ENABLED=true")
+    batchDb = getattr(request.state, "batchDb", None)
+    if batchDb is not None:
+        yield batchDb
+        return
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 def initDb():
-    """Initialize database by creating all tables."""
+    """Initialize database by creating all tables and upgrading existing ones."""
+    # Imported here: migrations depends on the models, which depend on Base
+    from migrations import runMigrations
+
     Base.metadata.create_all(bind=engine)
+    runMigrations(engine)
@@ -0,0 +1,90 @@
+"""
+Entity tags and conditional GET for the expense read endpoints.
+
+An ETag is a digest of everything a response depends on: the endpoint, its
+normalized parameters and a change marker for the data. Every insert, update
+and soft delete raises an expense's change_seq, so the marker of a single
+expense is its own change_seq, and that of lists and summaries is the user's
+highest change_seq (see buildChangeMarker in queries.py), read from an index.
+Because the marker comes from the database rather than process memory, the
+ETag is the same whichever worker serves the request.
+
+When If-None-Match already holds the current ETag the endpoint answers 304
+before running the full query or serializing a body.
+"""
+import hashlib
+from typing import Any, Optional
+
+from fastapi import Request, Response
+
+
+def makeEtag(*parts: Any) -> str:
+    """
+    Build a weak ETag from the values a response depends on.
+
+    Args:
+        *parts: Endpoint name, parameters and change marker
+
+    Returns:
+        Weak entity tag (e.g. W/"3f2a...")
+    """
+    digest = hashlib.sha256(repr(parts).encode()).hexdigest()[:32]
+    return f'W/"{digest}"'
+
+
+def etagMatches(ifNoneMatch: Optional[str], etag: str) -> bool:
+    """
+    Check an If-None-Match header against an ETag (weak comparison).
+
+    Args:
+        ifNoneMatch: Header value: "*" or a comma-separated list of tags
+        etag: Current ETag of the resource
+
+    Returns:
+        True if the client's copy is current
+    """
+    if not ifNoneMatch:
+        return False
+    if ifNoneMatch.strip() == "*":
+        return True
+    opaqueTag = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaqueTag
+        for candidate in ifNoneMatch.split(",")
+    )
+
+
+def notModifiedResponse(request: Request, etag: str) -> Optional[Response]:
+    """
+    Return a 304 response if the request's If-None-Match holds the ETag.
+
+    Args:
+        request: Incoming request
+        etag: Current ETag of the resource
+
+    Returns:
+        Empty 304 response carrying the ETag, or None if the client must get
+        the full response
+    """
+    if etagMatches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    return None
+
+
+def withEtag(result: Any, response: Response, etag: str) -> Any:
+    """
+    Attach the ETag to an endpoint's result.
+
+    Args:
+        result: Value or Response the endpoint returns
+        response: The endpoint's injected Response (used for plain values)
+        etag: ETag to send
+
+    Returns:
+        result unchanged
+    """
+    if isinstance(result, Response):
+        result.headers["ETag"] = etag
+    else:
+        response.headers["ETag"] = etag
+    return result
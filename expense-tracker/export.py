@@ -0,0 +1,134 @@
+"""
+Streaming export of expenses as NDJSON or CSV.
+
+Rows are read with yield_per (server-side cursor where the driver supports
+it) and encoded one partition at a time, so memory per request stays constant
+regardless of how many expenses a user has. Output can be gzip-compressed on
+the fly.
+"""
+import csv
+import io
+import json
+import zlib
+from typing import Iterator, List
+
+from sqlalchemy import select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from config import settings
+from fastjson import dumpJson
+from models import Expense
+
+# Columns exported, matching the fields of ExpenseResponse
+EXPORT_COLUMNS = [
+    Expense.id,
+    Expense.amount,
+    Expense.category,
+    Expense.description,
+    Expense.date,
+    Expense.created_at,
+    Expense.user_id
+]
+EXPORT_FIELD_NAMES = [column.key for column in EXPORT_COLUMNS]
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv"
+}
+
+# Rows fetched from the cursor and encoded per chunk
+EXPORT_CHUNK_ROWS = 1000
+
+
+def formatValue(value):
+    """Format a column value for export (datetimes as ISO 8601)."""
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+
+def encodeNdjson(rows: List) -> str:
+    """
+    Encode rows as newline-delimited JSON.
+
+    Args:
+        rows: Row tuples in EXPORT_COLUMNS order
+
+    Returns:
+        One JSON object per line
+    """
+    if settings.FAST_JSON_ENABLED:
+        return "".join(dumpJson(dict(zip(EXPORT_FIELD_NAMES, row))).decode() + "\n" for row in rows)
+    return "".join(
+        json.dumps(dict(zip(EXPORT_FIELD_NAMES, map(formatValue, row)))) + "\n"
+        for row in rows
+    )
+
+
+def encodeCsv(rows: List, includeHeader: bool = False) -> str:
+    """
+    Encode rows as CSV.
+
+    Args:
+        rows: Row tuples in EXPORT_COLUMNS order
+        includeHeader: Whether to emit the header line first
+
+    Returns:
+        CSV text
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if includeHeader:
+        writer.writerow(EXPORT_FIELD_NAMES)
+    writer.writerows([map(formatValue, row) for row in rows])
+    return buffer.getvalue()
+
+
+def streamExpenses(
+    bind: Engine,
+    conditions: List,
+    orderBy,
+    exportFormat: str,
+    compress: bool = False
+) -> Iterator[bytes]:
+    """
+    Yield encoded export chunks for the expenses matching the conditions.
+
+    Opens its own session because the request session is closed before a
+    streaming response body is sent.
+
+    Args:
+        bind: Engine (or connection) to read from
+        conditions: Filter conditions scoped to the user
+        orderBy: ORDER BY expression
+        exportFormat: "ndjson" or "csv"
+        compress: gzip-compress the stream
+
+    Yields:
+        Encoded (and optionally compressed) bytes
+    """
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16) if compress else None
+
+    def emit(text: str) -> bytes:
+        data = text.encode("utf-8")
+        return compressor.compress(data) if compressor else data
+
+    with Session(bind=bind) as session:
+        statement = (
+            select(*EXPORT_COLUMNS)
+            .where(*conditions)
+            .order_by(orderBy, Expense.id)
+            .execution_options(yield_per=EXPORT_CHUNK_ROWS)
+        )
+        result = session.execute(statement)
+
+        if exportFormat == "csv":
+            yield emit(encodeCsv([], includeHeader=True))
+
+        for partition in result.partitions():
+            chunk = encodeCsv(partition) if exportFormat == "csv" else encodeNdjson(partition)
+            data = emit(chunk)
+            if data:
+                yield data
+
+    if compressor:
+        yield compressor.flush()
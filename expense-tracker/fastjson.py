@@ -0,0 +1,84 @@
+"""
+Optional orjson-backed serialization for the list, summary and export endpoints.
+
+By default FastAPI validates an endpoint's return value against its
+response_model (from_attributes for ORM rows), converts the model with
+jsonable_encoder and encodes it with the stdlib json module. For a full page
+of expenses most of that time is spent re-validating data that came straight
+from the database. With FAST_JSON_ENABLED=true those endpoints instead read
+the response fields straight off the ORM rows and encode them in one orjson
+call, which handles datetimes natively.
+
+orjson is an optional dependency, required only when the setting is on.
+"""
+from typing import Any, Type
+
+from pydantic import BaseModel
+from sqlalchemy.engine import RowMapping
+
+from config import settings
+from models import Expense
+from schemas import ExpenseResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if settings.FAST_JSON_ENABLED and orjson is None:
+    raise RuntimeError("FAST_JSON_ENABLED requires orjson. Install it with: pip install orjson")
+
+# Fields an Expense row is serialized with, in ExpenseResponse order
+EXPENSE_RESPONSE_FIELDS = tuple(ExpenseResponse.model_fields)
+
+
+def toJsonable(value: Any) -> Any:
+    """
+    orjson default hook for values it cannot encode natively.
+
+    Args:
+        value: Expense ORM row, Core row mapping or Pydantic model
+
+    Returns:
+        Dictionary of the value's response fields
+
+    Raises:
+        TypeError: For any other type (orjson reports it as unserializable)
+    """
+    if isinstance(value, RowMapping):
+        return dict(value)
+    if isinstance(value, Expense):
+        return {name: getattr(value, name) for name in EXPENSE_RESPONSE_FIELDS}
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def serializeResponse(responseModel: Type[BaseModel], result: Any) -> bytes:
+    """
+    Encode an endpoint result as its response model's JSON.
+
+    Args:
+        responseModel: The endpoint's response_model
+        result: What the endpoint returns (may contain Expense rows)
+
+    Returns:
+        JSON body
+    """
+    if settings.FAST_JSON_ENABLED:
+        return dumpJson(result)
+    return responseModel.model_validate(result, from_attributes=True).model_dump_json().encode()
+
+
+def dumpJson(content: Any) -> bytes:
+    """
+    Encode content with orjson, without validation (FAST_JSON_ENABLED only).
+
+    Args:
+        content: Plain data, Expense rows or Pydantic models
+
+    Returns:
+        Compact JSON
+    """
+    return orjson.dumps(content, default=toJsonable)
+
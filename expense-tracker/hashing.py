@@ -0,0 +1,116 @@
+"""
+Dedicated, bounded pool for password hashing.
+
+bcrypt is deliberately slow (hundreds of milliseconds per hash). Running it on
+FastAPI's request threadpool lets a burst of logins occupy every thread and
+stall unrelated endpoints such as expense reads. PasswordHashPool runs hashing
+on its own small set of threads (bcrypt releases the GIL while it works) and
+caps how much work may wait for them; callers beyond that limit are rejected
+immediately instead of queueing without bound.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, TypeVar
+
+T = TypeVar("T")
+
+
+class HashPoolFullError(Exception):
+    """Raised when the hashing pool already has its maximum of pending work."""
+    pass
+
+
+class PasswordHashPool:
+    """
+    Bounded thread pool for CPU-heavy password operations.
+
+    At most maxWorkers operations run at once and at most maxQueued more wait
+    for a worker; run() raises HashPoolFullError beyond that.
+    """
+
+    def __init__(self, maxWorkers: int, maxQueued: int) -> None:
+        """
+        Initialize the pool (worker threads start on demand).
+
+        Args:
+            maxWorkers: Number of hashing threads
+            maxQueued: Operations allowed to wait for a free thread
+        """
+        self.maxWorkers = maxWorkers
+        self.maxQueued = maxQueued
+        self._executor = ThreadPoolExecutor(max_workers=maxWorkers, thread_name_prefix="password-hash")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.stats = {
+            "submitted": 0,
+            "completed": 0,
+            "rejected": 0,
+            "max_pending": 0,
+            "queue_wait_seconds": 0.0,
+            "work_seconds": 0.0
+        }
+
+    async def run(self, work: Callable[..., T], *args) -> T:
+        """
+        Run a password operation on the pool and await its result.
+
+        Args:
+            work: Function to run (e.g. a bcrypt hash or verify)
+            *args: Arguments for the function
+
+        Returns:
+            Result of the function
+
+        Raises:
+            HashPoolFullError: If the pool already has its maximum pending work
+        """
+        with self._lock:
+            if self._pending >= self.maxWorkers + self.maxQueued:
+                self.stats["rejected"] += 1
+                raise HashPoolFullError("Password hashing pool is full")
+            self._pending += 1
+            self.stats["submitted"] += 1
+            self.stats["max_pending"] = max(self.stats["max_pending"], self._pending)
+
+        future = self._executor.submit(self._timed, time.perf_counter(), work, *args)
+        # Released on completion or cancellation, whichever happens
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def _timed(self, submittedAt: float, work: Callable[..., T], *args) -> T:
+        """Run work on a pool thread, recording queue wait and run time."""
+        startedAt = time.perf_counter()
+        try:
+            return work(*args)
+        finally:
+            finishedAt = time.perf_counter()
+            with self._lock:
+                self.stats["completed"] += 1
+                self.stats["queue_wait_seconds"] += startedAt - submittedAt
+                self.stats["work_seconds"] += finishedAt - startedAt
+
+    def _release(self, future: Future) -> None:
+        """Free the pending slot taken by run()."""
+        with self._lock:
+            self._pending -= 1
+
+    def snapshot(self) -> dict:
+        """
+        Return the counters together with the current load.
+
+        Returns:
+            Dictionary suitable for a metrics response
+        """
+        with self._lock:
+            completed = self.stats["completed"]
+            return {
+                **self.stats,
+                "running": min(self._pending, self.maxWorkers),
+                "queued": max(self._pending - self.maxWorkers, 0),
+                "avg_queue_wait_ms": self.stats["queue_wait_seconds"] / completed * 1000 if completed else 0.0,
+                "avg_work_ms": self.stats["work_seconds"] / completed * 1000 if completed else 0.0,
+                "max_workers": self.maxWorkers,
+                "max_queued": self.maxQueued
+            }
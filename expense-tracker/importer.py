@@ -0,0 +1,241 @@
+"""
+Streaming bulk import of expenses from CSV or NDJSON uploads.
+
+The request body is parsed incrementally as it arrives, so uploads of any
+size use constant memory. Rows are validated one at a time and inserted in
+chunks of IMPORT_CHUNK_ROWS, each chunk in its own transaction with a single
+executemany INSERT. Progress and per-row errors are reported as a log of
+NDJSON events (see importExpenses in api_main.py).
+"""
+import codecs
+import csv
+import json
+from collections import Counter
+from datetime import datetime
+from functools import partial
+from typing import AsyncIterator, Iterator, List, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from config import settings
+from models import Expense, Category, categoryKey
+from mutations import recordCategoryCounts, runExpenseWrite
+from schemas import ExpenseImport
+
+IMPORT_MEDIA_TYPES = {
+    "text/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+}
+
+REQUIRED_CSV_COLUMNS = ("amount", "category", "description")
+
+
+class ImportFormatError(Exception):
+    """Raised when an upload cannot be parsed at all (e.g. missing CSV columns)."""
+    pass
+
+
+def splitCompleteRecords(buffer: str, importFormat: str) -> Tuple[List[str], str]:
+    """
+    Split buffered text into complete records and a trailing remainder.
+
+    For CSV a record may span lines inside a quoted field; a record is
+    complete once it contains an even number of quote characters (escaped
+    quotes are doubled, so they never change the parity).
+
+    Args:
+        buffer: Decoded text received so far
+        importFormat: "csv" or "ndjson"
+
+    Returns:
+        Tuple of (complete records, unconsumed remainder)
+    """
+    lines = buffer.split("\n")
+    remainder = lines.pop()
+    if importFormat != "csv":
+        return lines, remainder
+
+    records = []
+    pending = None
+    for line in lines:
+        pending = line if pending is None else f"{pending}\n{line}"
+        if pending.count('"') % 2 == 0:
+            records.append(pending)
+            pending = None
+    if pending is not None:
+        remainder = f"{pending}\n{remainder}"
+    return records, remainder
+
+
+async def iterRecords(byteStream: AsyncIterator[bytes], importFormat: str) -> AsyncIterator[Tuple[int, object]]:
+    """
+    Parse an uploaded byte stream into records as it arrives.
+
+    Args:
+        byteStream: Async iterator of body chunks (e.g. request.stream())
+        importFormat: "csv" or "ndjson"
+
+    Yields:
+        Tuples of (row number, dict) for parsed rows, or (row number, str)
+        with an error message for rows that could not be parsed
+
+    Raises:
+        ImportFormatError: If the CSV header is missing required columns
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    buffer = ""
+    header = None
+    rowNumber = 0
+
+    def parseRecords(records: List[str]) -> Iterator[Tuple[int, object]]:
+        nonlocal header, rowNumber
+        for record in records:
+            record = record.rstrip("\r")
+            if not record.strip():
+                continue
+            if importFormat == "csv":
+                values = next(csv.reader([record]))
+                if header is None:
+                    header = [name.strip().lstrip("\ufeff") for name in values]
+                    missing = [name for name in REQUIRED_CSV_COLUMNS if name not in header]
+                    if missing:
+                        raise ImportFormatError(f"CSV header is missing columns: {', '.join(missing)}")
+                    continue
+                rowNumber += 1
+                # Empty cells count as missing so optional columns fall back to defaults
+                yield rowNumber, {name: value for name, value in zip(header, values) if value != ""}
+            else:
+                rowNumber += 1
+                try:
+                    row = json.loads(record)
+                except ValueError as exc:
+                    yield rowNumber, f"Invalid JSON: {exc.msg}"
+                    continue
+                yield rowNumber, row if isinstance(row, dict) else "Expected a JSON object"
+
+    async for chunk in byteStream:
+        buffer += decoder.decode(chunk)
+        records, buffer = splitCompleteRecords(buffer, importFormat)
+        for parsed in parseRecords(records):
+            yield parsed
+
+    buffer += decoder.decode(b"", final=True)
+    for parsed in parseRecords([buffer]):
+        yield parsed
+
+
+def insertImportRows(session: Session, userId: int, rows: List[dict]) -> int:
+    """
+    Insert a chunk of prepared expense rows with one executemany INSERT.
+
+    Args:
+        session: Database session
+        userId: Owner of the imported expenses
+        rows: Column dictionaries for Expense
+
+    Returns:
+        Number of rows inserted
+    """
+    session.execute(insert(Expense), rows)
+    recordCategoryCounts(session, userId, Category.name_key, Counter(categoryKey(row["category"]) for row in rows))
+    return len(rows)
+
+
+def commitImportChunk(bind: Engine, rows: List[dict], userId: int) -> int:
+    """
+    Insert and commit one chunk in its own session/transaction.
+
+    Args:
+        bind: Engine to write to
+        rows: Column dictionaries for Expense
+        userId: Owner of the imported expenses
+
+    Returns:
+        Number of rows inserted
+    """
+    with Session(bind=bind) as session:
+        return runExpenseWrite(session, partial(insertImportRows, userId=userId, rows=rows), userId)
+
+
+async def streamImport(
+    byteStream: AsyncIterator[bytes],
+    importFormat: str,
+    bind: Engine,
+    userId: int
+) -> AsyncIterator[dict]:
+    """
+    Import expenses from an upload stream, yielding progress events.
+
+    Rows without a date are stamped with the time the import started.
+    Database work runs in the threadpool so the event loop keeps receiving
+    the upload while a chunk is being committed.
+
+    Args:
+        byteStream: Async iterator of body chunks
+        importFormat: "csv" or "ndjson"
+        bind: Engine to write to
+        userId: Owner of the imported expenses
+
+    Yields:
+        Event dictionaries: "error" per rejected row (up to
+        IMPORT_MAX_REPORTED_ERRORS), "progress" per committed chunk, then
+        "complete" (or "aborted" if the upload cannot be parsed)
+    """
+    importStartedAt = datetime.utcnow()
+    stats = {"rows": 0, "inserted": 0, "failed": 0, "chunks": 0}
+    pendingRows = []
+
+    async def flushChunk() -> dict:
+        stats["inserted"] += await run_in_threadpool(commitImportChunk, bind, pendingRows.copy(), userId)
+        stats["chunks"] += 1
+        pendingRows.clear()
+        return {"event": "progress", **stats}
+
+    def rejectRow(rowNumber: int, field: str, message: str) -> dict:
+        stats["failed"] += 1
+        if stats["failed"] <= settings.IMPORT_MAX_REPORTED_ERRORS:
+            return {"event": "error", "row": rowNumber, "field": field, "message": message}
+        return None
+
+    try:
+        async for rowNumber, record in iterRecords(byteStream, importFormat):
+            stats["rows"] += 1
+            if isinstance(record, str):
+                errorEvent = rejectRow(rowNumber, "", record)
+                if errorEvent:
+                    yield errorEvent
+                continue
+
+            try:
+                expense = ExpenseImport.model_validate(record)
+            except ValidationError as exc:
+                error = exc.errors()[0]
+                errorEvent = rejectRow(
+                    rowNumber, ".".join(str(part) for part in error["loc"]), error["msg"]
+                )
+                if errorEvent:
+                    yield errorEvent
+                continue
+
+            pendingRows.append({
+                "amount": expense.amount,
+                "category": expense.category,
+                "description": expense.description,
+                "date": expense.date or importStartedAt,
+                "user_id": userId
+            })
+            if len(pendingRows) >= settings.IMPORT_CHUNK_ROWS:
+                yield await flushChunk()
+
+        if pendingRows:
+            yield await flushChunk()
+    except ImportFormatError as exc:
+        yield {"event": "aborted", "message": str(exc), **stats}
+        return
+
+    yield {"event": "complete", **stats}
@@ -0,0 +1,155 @@
+"""
+In-place schema upgrades for existing databases.
+
+Base.metadata.create_all creates missing tables but never changes tables that
+already exist. Each migration here inspects the live schema and only applies
+what is missing, so runMigrations is safe to run on every startup (initDb
+does) and on databases created by any earlier version.
+"""
+from typing import Callable, List
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+from models import EXPENSE_SEARCH_DDL, Expense, amountToCents, resolveCategoryId
+
+# Rows converted per statement by data migrations
+MIGRATION_CHUNK_ROWS = 10000
+
+
+def addExpenseChangeSequence(connection: Connection) -> None:
+    """
+    Add expenses.change_seq and its indexes.
+
+    Existing rows are numbered in id order; later writes continue from the
+    highest value.
+
+    Args:
+        connection: Connection inside the migration transaction
+    """
+    columns = {column["name"] for column in inspect(connection).get_columns("expenses")}
+    if "change_seq" not in columns:
+        connection.execute(text("ALTER TABLE expenses ADD COLUMN change_seq INTEGER NOT NULL DEFAULT 0"))
+        connection.execute(text("UPDATE expenses SET change_seq = id"))
+
+    for index in Expense.__table__.indexes:
+        if "change_seq" in index.columns:
+            index.create(connection, checkfirst=True)
+
+
+def addExpenseCategories(connection: Connection) -> None:
+    """
+    Add expenses.category_id and backfill it from the free-text categories.
+
+    The categories table itself is created by create_all. Each distinct
+    (user, category) pair is resolved to a category, so names differing only
+    in case or surrounding spaces share one.
+
+    Args:
+        connection: Connection inside the migration transaction
+    """
+    columns = {column["name"] for column in inspect(connection).get_columns("expenses")}
+    if "category_id" not in columns:
+        connection.execute(text("ALTER TABLE expenses ADD COLUMN category_id INTEGER REFERENCES categories(id)"))
+        pairs = connection.execute(text("SELECT DISTINCT user_id, category FROM expenses")).all()
+        categoryIds = {}
+        backfill = [
+            {
+                "category_id": resolveCategoryId(connection, userId, category, categoryIds),
+                "user_id": userId,
+                "category": category
+            }
+            for userId, category in pairs
+        ]
+        if backfill:
+            connection.execute(text(
+                "UPDATE expenses SET category_id = :category_id "
+                "WHERE user_id = :user_id AND category = :category"
+            ), backfill)
+
+    for index in Expense.__table__.indexes:
+        if index.name == "ix_expenses_user_category":
+            index.create(connection, checkfirst=True)
+
+
+def addExpenseSearchIndex(connection: Connection) -> None:
+    """
+    Add the expenses_fts full-text index and its sync triggers.
+
+    New databases get them from create_all; an existing one also has its
+    descriptions indexed here, once.
+
+    Args:
+        connection: Connection inside the migration transaction
+    """
+    if connection.dialect.name != "sqlite":
+        return
+    created = "expenses_fts" not in inspect(connection).get_table_names()
+    for searchDdl in EXPENSE_SEARCH_DDL:
+        connection.execute(searchDdl)
+    if created:
+        connection.execute(text("INSERT INTO expenses_fts(expenses_fts) VALUES ('rebuild')"))
+
+
+def convertExpenseAmountsToCents(connection: Connection) -> None:
+    """
+    Replace the float expenses.amount column with integer amount_cents.
+
+    Amounts are converted in id order, a chunk at a time, with the same
+    rounding as new writes (amountToCents) rather than SQL round(), which
+    would turn 0.285 * 100 = 28.4999... into 28. Dropping the old column
+    needs SQLite 3.35 or later.
+
+    Args:
+        connection: Connection inside the migration transaction
+    """
+    columns = {column["name"] for column in inspect(connection).get_columns("expenses")}
+    if "amount_cents" in columns:
+        return
+    connection.execute(text("ALTER TABLE expenses ADD COLUMN amount_cents INTEGER NOT NULL DEFAULT 0"))
+    lastId = 0
+    while True:
+        rows = connection.execute(text(
+            "SELECT id, amount FROM expenses WHERE id > :last_id ORDER BY id LIMIT :chunk"
+        ), {"last_id": lastId, "chunk": MIGRATION_CHUNK_ROWS}).all()
+        if not rows:
+            break
+        connection.execute(text("UPDATE expenses SET amount_cents = :cents WHERE id = :id"), [
+            {"cents": amountToCents(amount), "id": expenseId} for expenseId, amount in rows
+        ])
+        lastId = rows[-1][0]
+    connection.execute(text("ALTER TABLE expenses DROP COLUMN amount"))
+
+
+def addExpenseDateIndex(connection: Connection) -> None:
+    """
+    Add the (user_id, date, ...) index covering trends queries.
+
+    Args:
+        connection: Connection inside the migration transaction
+    """
+    for index in Expense.__table__.indexes:
+        if index.name == "ix_expenses_user_date":
+            index.create(connection, checkfirst=True)
+
+
+# Applied in order; each must be idempotent
+MIGRATIONS: List[Callable[[Connection], None]] = [
+    addExpenseChangeSequence,
+    addExpenseCategories,
+    addExpenseSearchIndex,
+    convertExpenseAmountsToCents,
+    addExpenseDateIndex,
+]
+
+
+def runMigrations(bind: Engine) -> None:
+    """
+    Apply every migration in one transaction.
+
+    Args:
+        bind: Engine of the database to upgrade
+    """
+    with bind.begin() as connection:
+        for migration in MIGRATIONS:
+            migration(connection)
@@ -1,7 +1,15 @@
 """
 SQLAlchemy database models for the Expense Tracker API.
 """
-from sqlalchemy import Column, Integer, Float, String, DateTime, ForeignKey, Boolean
+from datetime import datetime
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Optional
+
+from sqlalchemy import (
+    DDL, Column, Integer, String, DateTime, ForeignKey, Boolean, Index, UniqueConstraint,
+    TypeDecorator, column, event, insert, select, table, text
+)
+from sqlalchemy.engine import Connection
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
@@ -24,22 +32,209 @@ class User(Base):
     expenses = relationship("Expense", back_populates="owner", cascade="all, delete-orphan")
 
 
+class Category(Base):
+    """Per-user expense category, matched case-insensitively by name_key."""
+
+    __tablename__ = "categories"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    name = Column(String, nullable=False)  # Spelling first used by the user
+    name_key = Column(String, nullable=False)  # categoryKey(name)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "name_key", name="uq_categories_user_name_key"),
+    )
+
+
+def categoryKey(name: str) -> str:
+    """
+    Normalize a category name for matching ("Food ", "food" and "FOOD" are one category).
+
+    Args:
+        name: Category name as entered
+
+    Returns:
+        Stripped, case-folded name
+    """
+    return name.strip().casefold()
+
+
+def resolveCategoryId(connection: Connection, userId: int, name: str, cache: Optional[dict] = None) -> int:
+    """
+    Return the id of the user's category with this name, creating it if needed.
+
+    Args:
+        connection: Connection of the current write transaction
+        userId: Owner of the category
+        name: Category name as entered
+        cache: Optional dict reused across calls within one statement
+
+    Returns:
+        Category ID
+    """
+    key = (userId, categoryKey(name))
+    if cache is not None and key in cache:
+        return cache[key]
+    lookup = select(Category.id).where(Category.user_id == userId, Category.name_key == key[1])
+    categoryId = connection.execute(lookup).scalar()
+    if categoryId is None:
+        # OR IGNORE: a concurrent writer may have created it since the lookup
+        connection.execute(
+            insert(Category).prefix_with("OR IGNORE", dialect="sqlite")
+            .values(user_id=userId, name=name.strip(), name_key=key[1])
+        )
+        categoryId = connection.execute(lookup).scalar_one()
+    if cache is not None:
+        cache[key] = categoryId
+    return categoryId
+
+
+def defaultCategoryId(context) -> Optional[int]:
+    """
+    Column default for Expense.category_id: resolve the inserted row's category.
+
+    Runs for every INSERT (ORM or Core, including executemany); the category
+    ids are cached on the execution context for the rest of the statement.
+    """
+    params = context.get_current_parameters()
+    if params.get("category") is None:
+        return None
+    if not hasattr(context, "categoryIds"):
+        context.categoryIds = {}
+    return resolveCategoryId(context.connection, params["user_id"], params["category"], context.categoryIds)
+
+
+def amountToCents(amount) -> int:
+    """
+    Convert a currency amount to integer cents, rounding half up.
+
+    Args:
+        amount: Amount in currency units (float, int or Decimal)
+
+    Returns:
+        Whole number of cents
+    """
+    return int((Decimal(str(amount)) * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def centsToAmount(cents: int) -> float:
+    """
+    Convert integer cents back to currency units for the API.
+
+    Args:
+        cents: Whole number of cents
+
+    Returns:
+        Amount in currency units (the float closest to the exact value)
+    """
+    return cents / 100
+
+
+class Cents(TypeDecorator):
+    """
+    Money stored as an INTEGER number of cents.
+
+    Python code, filters and the API keep using currency units: values are
+    converted to cents when bound (so comparisons are exact integer
+    comparisons) and back when loaded. Aggregates that must stay exact select
+    the raw cents with type_=Integer.
+    """
+
+    impl = Integer
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else amountToCents(value)
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else centsToAmount(value)
+
+
+# Next value of the global change sequence. It is evaluated inside each INSERT
+# or UPDATE statement, i.e. while SQLite holds the write lock, so values are
+# handed out in commit order and a client that has seen N has seen everything
+# up to N.
+NEXT_CHANGE_SEQ = text("(SELECT coalesce(max(change_seq), 0) + 1 FROM expenses)")
+
+
 class Expense(Base):
     """Expense model for tracking expenses."""
 
     __tablename__ = "expenses"
 
     id = Column(Integer, primary_key=True, index=True)
-    amount = Column(Float, nullable=False)
+    # Stored as integer cents; the attribute (and table key) stays "amount"
+    amount = Column("amount_cents", Cents, key="amount", nullable=False)
     category = Column(String, nullable=False, index=True)
     description = Column(String, nullable=False)
     date = Column(DateTime(timezone=True), server_default=func.now(), index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Set in Python for sub-second precision (SQLite's now() has whole seconds);
+    # ETags rely on it changing with every write
+    updated_at = Column(DateTime(timezone=True), onupdate=datetime.utcnow)
     is_deleted = Column(Boolean, default=False)  # Soft delete support
+    # Raised by every insert, update and soft delete (delta sync and ETags)
+    change_seq = Column(Integer, nullable=False, default=NEXT_CHANGE_SEQ, onupdate=NEXT_CHANGE_SEQ, index=True)
 
     # Foreign key to user
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
 
+    # Normalized category; filled from category on insert, and by the
+    # mutations that change category
+    category_id = Column(Integer, ForeignKey("categories.id"), default=defaultCategoryId)
+
     # Relationship with user
     owner = relationship("User", back_populates="expenses")
+
+    __table_args__ = (
+        # Serves "changes since" for one user and the per-user change marker
+        Index("ix_expenses_user_change_seq", "user_id", "change_seq"),
+        # Exact category filter
+        Index("ix_expenses_user_category", "user_id", "category_id"),
+        # Covers the trends aggregate (and date ranges and ordering per user)
+        Index("ix_expenses_user_date", "user_id", "date", "category_id", "amount", "is_deleted"),
+    )
+
+
+# ============================================================================
+# Full-Text Search
+# ============================================================================
+
+# External-content FTS5 index of expenses.description. It stores only the
+# index (rows are read back from expenses by rowid = id) and is kept in sync
+# by triggers, so every write path, ORM or Core, updates it in the same
+# transaction. Soft-deleted expenses stay indexed and are filtered out like
+# everywhere else.
+EXPENSE_SEARCH_DDL = [
+    DDL(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS expenses_fts USING fts5("
+        "description, content='expenses', content_rowid='id', tokenize='porter unicode61')"
+    ),
+    DDL(
+        "CREATE TRIGGER IF NOT EXISTS expenses_fts_insert AFTER INSERT ON expenses BEGIN "
+        "INSERT INTO expenses_fts(rowid, description) VALUES (new.id, new.description); END"
+    ),
+    DDL(
+        "CREATE TRIGGER IF NOT EXISTS expenses_fts_delete AFTER DELETE ON expenses BEGIN "
+        "INSERT INTO expenses_fts(expenses_fts, rowid, description) "
+        "VALUES ('delete', old.id, old.description); END"
+    ),
+    DDL(
+        "CREATE TRIGGER IF NOT EXISTS expenses_fts_update AFTER UPDATE OF description ON expenses BEGIN "
+        "INSERT INTO expenses_fts(expenses_fts, rowid, description) "
+        "VALUES ('delete', old.id, old.description); "
+        "INSERT INTO expenses_fts(rowid, description) VALUES (new.id, new.description); END"
+    ),
+]
+
+for searchDdl in EXPENSE_SEARCH_DDL:
+    event.listen(Expense.__table__, "after_create", searchDdl.execute_if(dialect="sqlite"))
+event.listen(
+    Expense.__table__, "before_drop",
+    DDL("DROP TABLE IF EXISTS expenses_fts").execute_if(dialect="sqlite")
+)
+
+# Query-side view of the FTS table; the hidden expenses_fts column takes MATCH
+expenseSearch = table("expenses_fts", column("rowid"), column("rank"), column("expenses_fts"))
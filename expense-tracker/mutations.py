@@ -0,0 +1,460 @@
+"""
+Expense write operations shared by every write path.
+
+Each operation is a plain function taking a sync Session as its first
+argument. It makes its changes and flushes but never commits, and it returns
+plain data (Pydantic snapshots or IDs) rather than ORM objects. That lets the
+same code run:
+
+- on the request's Session (sync endpoints, committed by runExpenseWrite)
+- inside AsyncSession.run_sync (async endpoints, runExpenseWriteAsync)
+- on the group-commit writer thread (WRITE_QUEUE_ENABLED, see writer.py)
+
+Operations also record how many expenses they add to or remove from each
+category on the session (recordCategoryCounts). The CategoryChanges of a
+write reach notifyExpenseWrite only once it has committed, which applies
+them to the category autocomplete index.
+"""
+import asyncio
+from collections import Counter
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Callable, Dict, List, Optional, TypeVar
+
+from fastapi import HTTPException, status
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from config import settings
+from models import Expense, Category, categoryKey, resolveCategoryId
+from categoryindex import CategoryChanges, applyCategoryChanges
+from changefeed import expenseChanges
+from responsecache import bumpUserVersion
+from schemas import ExpenseCreate, ExpenseUpdate, ExpenseResponse
+from writer import getExpenseWriter, WriteQueueFullError
+
+T = TypeVar("T")
+
+# session.info key of the CategoryChanges of the write running on the session
+CATEGORY_CHANGES_KEY = "categoryChanges"
+
+
+# ============================================================================
+# Write Operations
+# ============================================================================
+
+def recordCategoryCounts(session: Session, userId: int, column, deltas: Dict) -> None:
+    """
+    Record changes in the number of expenses per category for the running write.
+
+    Does nothing unless the write is run through runExpenseWrite(Async).
+
+    Args:
+        session: Database session
+        userId: Owner of the categories
+        column: Category.id or Category.name_key, whichever deltas is keyed by
+        deltas: Change in expense count per category
+    """
+    changes = session.info.get(CATEGORY_CHANGES_KEY)
+    deltas = {category: delta for category, delta in deltas.items() if delta}
+    if changes is None or not deltas:
+        return
+    rows = session.execute(
+        select(column, Category.name, Category.name_key)
+        .where(Category.user_id == userId, column.in_(deltas))
+    ).all()
+    for category, name, nameKey in rows:
+        changes.add(name, nameKey, deltas[category])
+
+
+def countExpensesByCategory(session: Session, conditions: List) -> Dict[int, int]:
+    """
+    Count the non-deleted expenses matching conditions per category.
+
+    Args:
+        session: Database session
+        conditions: Filter conditions (must include the user scope)
+
+    Returns:
+        Expense count per category ID
+    """
+    rows = session.execute(
+        select(Expense.category_id, func.count(Expense.id))
+        .where(*conditions, Expense.is_deleted == False)
+        .group_by(Expense.category_id)
+    ).all()
+    return dict(rows)
+
+def getOwnedExpense(session: Session, expenseId: int, userId: int) -> Expense:
+    """
+    Load a non-deleted expense owned by the user.
+
+    Args:
+        session: Database session
+        expenseId: Expense ID
+        userId: Owner ID
+
+    Returns:
+        Expense object
+
+    Raises:
+        HTTPException: If the expense does not exist for this user
+    """
+    expense = session.query(Expense).filter(
+        Expense.id == expenseId,
+        Expense.user_id == userId,
+        Expense.is_deleted == False
+    ).first()
+
+    if not expense:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Expense not found"
+        )
+
+    return expense
+
+
+def insertExpense(session: Session, userId: int, expense: ExpenseCreate) -> ExpenseResponse:
+    """
+    Insert a new expense for the user.
+
+    Args:
+        session: Database session
+        userId: Owner ID
+        expense: Validated expense data
+
+    Returns:
+        Snapshot of the created expense
+    """
+    dbExpense = Expense(
+        amount=expense.amount,
+        category=expense.category,
+        description=expense.description,
+        user_id=userId
+    )
+    session.add(dbExpense)
+    session.flush()
+    # Load server defaults (date, created_at) inside the same transaction
+    session.refresh(dbExpense)
+    recordCategoryCounts(session, userId, Category.id, {dbExpense.category_id: 1})
+
+    return ExpenseResponse.model_validate(dbExpense)
+
+
+def insertExpenses(session: Session, userId: int, expenses: List[ExpenseCreate]) -> List[int]:
+    """
+    Insert many expenses for the user with a single INSERT ... RETURNING.
+
+    Args:
+        session: Database session
+        userId: Owner ID
+        expenses: Validated expense data
+
+    Returns:
+        IDs of the created expenses, in the same order as the input
+    """
+    rows = [
+        {
+            "amount": expense.amount,
+            "category": expense.category,
+            "description": expense.description,
+            "user_id": userId
+        }
+        for expense in expenses
+    ]
+    result = session.execute(
+        insert(Expense).returning(Expense.id, sort_by_parameter_order=True),
+        rows
+    )
+    createdIds = list(result.scalars())
+    recordCategoryCounts(
+        session, userId, Category.name_key, Counter(categoryKey(expense.category) for expense in expenses)
+    )
+    return createdIds
+
+
+def updateOwnedExpense(
+    session: Session,
+    expenseId: int,
+    userId: int,
+    expenseUpdate: ExpenseUpdate
+) -> ExpenseResponse:
+    """
+    Apply the provided fields of an update to the user's expense.
+
+    Args:
+        session: Database session
+        expenseId: Expense ID
+        userId: Owner ID
+        expenseUpdate: Partial update; only fields that were set are applied
+
+    Returns:
+        Snapshot of the updated expense
+
+    Raises:
+        HTTPException: If the expense does not exist for this user
+    """
+    dbExpense = getOwnedExpense(session, expenseId, userId)
+    oldCategoryId = dbExpense.category_id
+
+    # Update only provided fields
+    updateData = expenseUpdate.model_dump(exclude_unset=True)
+    for field, value in updateData.items():
+        setattr(dbExpense, field, value)
+    if updateData.get("category") is not None:
+        dbExpense.category_id = resolveCategoryId(session.connection(), userId, dbExpense.category)
+        if dbExpense.category_id != oldCategoryId:
+            recordCategoryCounts(session, userId, Category.id, {oldCategoryId: -1, dbExpense.category_id: 1})
+
+    session.flush()
+    session.refresh(dbExpense)
+
+    return ExpenseResponse.model_validate(dbExpense)
+
+
+def softDeleteOwnedExpense(session: Session, expenseId: int, userId: int) -> None:
+    """
+    Mark the user's expense as deleted.
+
+    Args:
+        session: Database session
+        expenseId: Expense ID
+        userId: Owner ID
+
+    Raises:
+        HTTPException: If the expense does not exist for this user
+    """
+    dbExpense = getOwnedExpense(session, expenseId, userId)
+    dbExpense.is_deleted = True
+    session.flush()
+    recordCategoryCounts(session, userId, Category.id, {dbExpense.category_id: -1})
+
+
+def updateExpensesWhere(session: Session, userId: int, conditions: List, values: dict) -> int:
+    """
+    Apply the same values to every expense matching the conditions.
+
+    Args:
+        session: Database session
+        userId: Owner of the expenses
+        conditions: Filter conditions (must include the user scope)
+        values: Column values to set
+
+    Returns:
+        Number of rows updated
+    """
+    if values.get("category") is not None:
+        values = {**values, "category_id": resolveCategoryId(session.connection(), userId, values["category"])}
+    # Only deleting and recategorizing change category counts
+    moved = {}
+    if CATEGORY_CHANGES_KEY in session.info and (values.get("is_deleted") or "category_id" in values):
+        moved = countExpensesByCategory(session, conditions)
+    result = session.execute(
+        update(Expense).where(*conditions).values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    if moved:
+        deltas = {categoryId: -count for categoryId, count in moved.items()}
+        if not values.get("is_deleted"):
+            deltas[values["category_id"]] = deltas.get(values["category_id"], 0) + sum(moved.values())
+        recordCategoryCounts(session, userId, Category.id, deltas)
+    return result.rowcount
+
+
+def softDeleteExpensesWhere(session: Session, userId: int, conditions: List) -> int:
+    """
+    Soft delete every expense matching the conditions.
+
+    Args:
+        session: Database session
+        userId: Owner of the expenses
+        conditions: Filter conditions (must include the user scope)
+
+    Returns:
+        Number of rows marked as deleted
+    """
+    return updateExpensesWhere(session, userId, conditions, {"is_deleted": True})
+
+
+# ============================================================================
+# Write Execution
+# ============================================================================
+
+def writeQueueUnavailable(detail: str) -> HTTPException:
+    """Build the 503 returned when the write queue cannot take or finish work."""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=detail
+    )
+
+
+def notifyExpenseWrite(userId: int, categoryChanges: Optional[CategoryChanges] = None) -> None:
+    """
+    Record a committed write of a user's expenses.
+
+    Bumps the user's write version (response cache, category index), applies
+    the write's category count changes to the user's autocomplete index and
+    wakes the user's event streams.
+
+    Args:
+        userId: Owner of the written expenses
+        categoryChanges: Changes recorded by the write; None if unknown, in
+            which case the index is rebuilt by its next lookup
+    """
+    version = bumpUserVersion(userId)
+    if categoryChanges is not None:
+        applyCategoryChanges(userId, categoryChanges, version)
+    expenseChanges.publish(userId)
+
+
+def trackCategoryChanges(work: Callable[[Session], T], changes: CategoryChanges) -> Callable[[Session], T]:
+    """
+    Wrap a write operation so that it records its category changes.
+
+    Args:
+        work: Write operation taking a Session
+        changes: Collects the changes recorded while work runs
+
+    Returns:
+        Write operation taking a Session
+    """
+    def tracked(session: Session) -> T:
+        session.info[CATEGORY_CHANGES_KEY] = changes
+        try:
+            return work(session)
+        finally:
+            del session.info[CATEGORY_CHANGES_KEY]
+    return tracked
+
+
+def settledChanges(future: Future, changes: CategoryChanges) -> CategoryChanges:
+    """Return a queued write's changes if it committed, else empty ones."""
+    if future.cancelled() or future.exception() is not None:
+        return CategoryChanges()
+    return changes
+
+
+def submitExpenseWrite(work: Callable[[Session], T], userId: int) -> "Future[T]":
+    """
+    Queue a write on the group-commit writer.
+
+    The user's write version is bumped when the future settles, i.e. after
+    the batch commit, even if the caller has stopped waiting.
+
+    Args:
+        work: Write operation taking a Session
+        userId: Owner of the expenses being written
+
+    Returns:
+        Future resolved once the write has committed
+
+    Raises:
+        HTTPException: 503 if the write queue is full
+    """
+    changes = CategoryChanges()
+    try:
+        future = getExpenseWriter().submit(trackCategoryChanges(work, changes))
+    except WriteQueueFullError:
+        raise writeQueueUnavailable("Write queue is full, retry later")
+    future.add_done_callback(lambda done: notifyExpenseWrite(userId, settledChanges(done, changes)))
+    return future
+
+
+def resolveTimedOutWrite(future: "Future[T]") -> T:
+    """
+    Settle a queued write whose caller stopped waiting for it.
+
+    A write that has not started yet is cancelled, so it is never applied
+    and the client can safely retry. A write already in the writer's current
+    batch cannot be withdrawn: if it finished in the meantime its result is
+    returned, otherwise the outcome is unknown and the client must check
+    before retrying.
+
+    Args:
+        future: Future returned by GroupCommitWriter.submit
+
+    Returns:
+        Result of the write if it completed after all
+
+    Raises:
+        HTTPException: 503 if the write was cancelled, 504 if its outcome is unknown
+    """
+    if future.cancel():
+        raise writeQueueUnavailable("Timed out waiting for write to commit; it was not applied")
+    if future.done():
+        return future.result()
+    raise HTTPException(
+        status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+        detail="Timed out waiting for write to commit; its outcome is unknown"
+    )
+
+
+def runExpenseWrite(db: Session, work: Callable[[Session], T], userId: int) -> T:
+    """
+    Run a write operation and commit it.
+
+    With WRITE_QUEUE_ENABLED the work is handed to the group-commit writer
+    and this call blocks until its batch is durable; otherwise it runs on
+    the request's session and is committed immediately. Either way the
+    user's write version is bumped once the write has committed.
+
+    Args:
+        db: Request database session
+        work: Write operation taking a Session
+        userId: Owner of the expenses being written
+
+    Returns:
+        Result of the write operation
+
+    Raises:
+        HTTPException: 503 if the write queue is full or the write was cancelled
+            after timing out, 504 if it timed out while being committed
+    """
+    if settings.WRITE_QUEUE_ENABLED:
+        future = submitExpenseWrite(work, userId)
+        try:
+            return future.result(settings.WRITE_QUEUE_TIMEOUT_SECONDS)
+        except FutureTimeoutError:
+            return resolveTimedOutWrite(future)
+
+    changes = CategoryChanges()
+    result = trackCategoryChanges(work, changes)(db)
+    db.commit()
+    notifyExpenseWrite(userId, changes)
+    return result
+
+
+async def runExpenseWriteAsync(db: AsyncSession, work: Callable[[Session], T], userId: int) -> T:
+    """
+    Async counterpart of runExpenseWrite for AsyncSession endpoints.
+
+    Args:
+        db: Request async database session
+        work: Write operation taking a sync Session
+        userId: Owner of the expenses being written
+
+    Returns:
+        Result of the write operation
+
+    Raises:
+        HTTPException: 503 if the write queue is full or the write was cancelled
+            after timing out, 504 if it timed out while being committed
+    """
+    if settings.WRITE_QUEUE_ENABLED:
+        future = submitExpenseWrite(work, userId)
+        waiter = asyncio.wrap_future(future)
+        # asyncio.wait (unlike wait_for) leaves the writer's future alone on timeout
+        done, _ = await asyncio.wait({waiter}, timeout=settings.WRITE_QUEUE_TIMEOUT_SECONDS)
+        if done:
+            return waiter.result()
+        try:
+            return resolveTimedOutWrite(future)
+        finally:
+            waiter.cancel()
+
+    changes = CategoryChanges()
+    result = await db.run_sync(trackCategoryChanges(work, changes))
+    await db.commit()
+    notifyExpenseWrite(userId, changes)
+    return result
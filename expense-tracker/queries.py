@@ -0,0 +1,460 @@
+"""
+Shared query building for expense endpoints.
+
+The helpers here return plain SQLAlchemy expressions so they can be used by
+both the synchronous ORM endpoints (query.filter(*conditions)) and the async
+endpoints (select(Expense).where(*conditions)).
+"""
+import re
+from datetime import datetime, timedelta
+from typing import Optional, List, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import Integer, select, func, tuple_
+
+from models import Expense, Category, categoryKey, centsToAmount, expenseSearch
+from schemas import CategorySummary, ExpenseResponse
+
+# Explicit mapping for sort fields to prevent attribute injection
+SORT_FIELD_MAPPING = {
+    "date": Expense.date,
+    "amount": Expense.amount,
+    "category": Expense.category
+}
+
+
+def parseDateParam(value: str, paramName: str) -> datetime:
+    """
+    Parse a YYYY-MM-DD query parameter.
+
+    Args:
+        value: Date string from the query string
+        paramName: Parameter name used in the error message
+
+    Returns:
+        Parsed datetime at midnight
+
+    Raises:
+        HTTPException: If the value is not a valid YYYY-MM-DD date
+    """
+    try:
+        return datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid {paramName} format. Use YYYY-MM-DD"
+        )
+
+
+def buildListParams(
+    page: int,
+    page_size: int,
+    category: Optional[str],
+    from_date: Optional[str],
+    to_date: Optional[str],
+    min_amount: Optional[float],
+    max_amount: Optional[float],
+    q: Optional[str],
+    sort_by: Optional[str],
+    sort_order: str,
+    fields: Optional[str]
+) -> Tuple[dict, Optional[Tuple[str, ...]]]:
+    """
+    Resolve the list endpoint's query parameters.
+
+    The default sort (relevance with q, otherwise date) is filled in and the
+    sparse fieldset normalized, so equivalent requests share cache entries
+    and ETags.
+
+    Args:
+        page: Page number
+        page_size: Items per page
+        category: Optional category filter
+        from_date: Optional start date (YYYY-MM-DD)
+        to_date: Optional end date (YYYY-MM-DD)
+        min_amount: Optional minimum amount
+        max_amount: Optional maximum amount
+        q: Optional full-text query
+        sort_by: Sort field, or None for the default
+        sort_order: asc or desc
+        fields: Comma-separated item fields, or None for all
+
+    Returns:
+        (parameters with sort_by resolved, fields from parseFieldsParam)
+
+    Raises:
+        HTTPException: If fields names an unknown field
+    """
+    fieldNames = parseFieldsParam(fields)
+    params = {
+        "page": page, "page_size": page_size, "category": category,
+        "from_date": from_date, "to_date": to_date, "min_amount": min_amount,
+        "max_amount": max_amount, "q": q, "sort_by": sort_by or ("relevance" if q else "date"),
+        "sort_order": sort_order, "fields": ",".join(fieldNames or ())
+    }
+    return params, fieldNames
+
+
+def parseFieldsParam(fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """
+    Parse a comma-separated sparse fieldset against the ExpenseResponse fields.
+
+    Args:
+        fields: Field names from the query string (e.g. "id,amount,date")
+
+    Returns:
+        Requested fields in ExpenseResponse order without duplicates, or None
+        when not set (all fields)
+
+    Raises:
+        HTTPException: If a name is not an ExpenseResponse field
+    """
+    if not fields:
+        return None
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested.difference(ExpenseResponse.model_fields)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid fields: {', '.join(sorted(unknown))}"
+        )
+    return tuple(name for name in ExpenseResponse.model_fields if name in requested) or None
+
+
+def buildDateFilters(from_date: Optional[str], to_date: Optional[str]) -> List:
+    """
+    Build date range conditions; to_date is inclusive of the whole day.
+
+    Args:
+        from_date: Optional start date (YYYY-MM-DD)
+        to_date: Optional end date (YYYY-MM-DD)
+
+    Returns:
+        List of SQLAlchemy filter conditions
+    """
+    conditions = []
+    if from_date:
+        conditions.append(Expense.date >= parseDateParam(from_date, "from_date"))
+    if to_date:
+        conditions.append(Expense.date < parseDateParam(to_date, "to_date") + timedelta(days=1))
+    return conditions
+
+
+def buildSearchQuery(q: str) -> str:
+    """
+    Turn free text into an FTS5 query matching all of its words.
+
+    Each word is quoted, so FTS5 operators and punctuation in the input are
+    searched for literally instead of being parsed as query syntax.
+
+    Args:
+        q: Search text from the query string
+
+    Returns:
+        FTS5 MATCH expression
+
+    Raises:
+        HTTPException: If q contains no words
+    """
+    words = re.findall(r"\w+", q)
+    if not words:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="q must contain at least one word"
+        )
+    return " ".join(f'"{word}"' for word in words)
+
+
+def buildExpenseFilters(
+    userId: int,
+    category: Optional[str] = None,
+    from_date: Optional[str] = None,
+    to_date: Optional[str] = None,
+    min_amount: Optional[float] = None,
+    max_amount: Optional[float] = None,
+    q: Optional[str] = None
+) -> List:
+    """
+    Build the filter conditions supported by the expense list endpoint.
+
+    Always scopes to the given user and excludes soft-deleted expenses.
+
+    Args:
+        userId: Owner of the expenses
+        category: Optional category filter (exact name, case-insensitive)
+        from_date: Optional start date (YYYY-MM-DD)
+        to_date: Optional end date (YYYY-MM-DD)
+        min_amount: Optional minimum amount (inclusive)
+        max_amount: Optional maximum amount (inclusive)
+        q: Optional full-text search over descriptions (all words must match)
+
+    Returns:
+        List of SQLAlchemy filter conditions
+
+    Raises:
+        HTTPException: If a date parameter is malformed or q has no words
+    """
+    conditions = [
+        Expense.user_id == userId,
+        Expense.is_deleted == False
+    ]
+
+    if category:
+        # Exact, case-insensitive match through the (user_id, category_id) index
+        conditions.append(Expense.category_id == select(Category.id).where(
+            Category.user_id == userId,
+            Category.name_key == categoryKey(category)
+        ).scalar_subquery())
+
+    conditions.extend(buildDateFilters(from_date, to_date))
+
+    if min_amount is not None:
+        conditions.append(Expense.amount >= min_amount)
+
+    if max_amount is not None:
+        conditions.append(Expense.amount <= max_amount)
+
+    if q:
+        # Matching ids come from the FTS index; descriptions are never scanned
+        conditions.append(Expense.id.in_(
+            select(expenseSearch.c.rowid).where(expenseSearch.c.expenses_fts.match(buildSearchQuery(q)))
+        ))
+
+    return conditions
+
+
+def buildSelectionFilters(userId: int, selection) -> List:
+    """
+    Build filter conditions for a bulk operation selection.
+
+    Args:
+        userId: Owner of the expenses
+        selection: ExpenseSelection with ids and/or list filters
+
+    Returns:
+        List of SQLAlchemy filter conditions scoped to the user
+
+    Raises:
+        HTTPException: If a date parameter is malformed
+    """
+    conditions = buildExpenseFilters(
+        userId, selection.category, selection.from_date, selection.to_date,
+        selection.min_amount, selection.max_amount
+    )
+    if selection.ids is not None:
+        conditions.append(Expense.id.in_(selection.ids))
+    return conditions
+
+
+def buildOrderBy(sort_by: str, sort_order: str, q: Optional[str] = None):
+    """
+    Resolve sort parameters to an ORDER BY expression using the explicit mapping.
+
+    Args:
+        sort_by: Sort field name (date, amount, category, relevance)
+        sort_order: Sort direction (asc, desc); desc puts the best match first
+            for relevance
+        q: Search text, required for relevance
+
+    Returns:
+        SQLAlchemy ordering expression
+
+    Raises:
+        HTTPException: If sort_by is not a whitelisted field, or is relevance
+            without q
+    """
+    if sort_by == "relevance":
+        if not q:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="sort_by=relevance requires q"
+            )
+        # FTS5 rank is bm25, where lower is better
+        rank = select(expenseSearch.c.rank).where(
+            expenseSearch.c.expenses_fts.match(buildSearchQuery(q)),
+            expenseSearch.c.rowid == Expense.id
+        ).scalar_subquery()
+        return rank.asc() if sort_order == "desc" else rank.desc()
+
+    sortColumn = SORT_FIELD_MAPPING.get(sort_by)
+    if sortColumn is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid sort_by value: {sort_by}"
+        )
+
+    return sortColumn.desc() if sort_order == "desc" else sortColumn.asc()
+
+
+def buildChangeMarker(userId: int):
+    """
+    Build the query for a user's change marker, used to derive list ETags.
+
+    Every insert, update and soft delete raises the expense's change_seq, so
+    the user's highest change_seq changes whenever any list or summary for
+    the user could. It is read from the (user_id, change_seq) index.
+
+    Args:
+        userId: Owner of the expenses
+
+    Returns:
+        SELECT returning one (max change_seq,) row
+    """
+    return select(func.max(Expense.change_seq)).where(Expense.user_id == userId)
+
+
+def parseSyncToken(token: str) -> Tuple[int, int]:
+    """
+    Parse a delta sync token into its (change_seq, id) position.
+
+    Args:
+        token: Token from a previous changes response
+
+    Returns:
+        Tuple of (change_seq, expense id)
+
+    Raises:
+        HTTPException: If the token is malformed
+    """
+    try:
+        changeSeq, expenseId = (int(part) for part in token.split("-"))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid sync token"
+        )
+    return changeSeq, expenseId
+
+
+def formatSyncToken(changeSeq: int, expenseId: int) -> str:
+    """
+    Format a (change_seq, id) position as a sync token.
+
+    Args:
+        changeSeq: change_seq of the last change returned
+        expenseId: ID of the last change returned
+
+    Returns:
+        Opaque token for the next changes request
+    """
+    return f"{changeSeq}-{expenseId}"
+
+
+def buildChangesQuery(userId: int, since: Optional[str], limit: int):
+    """
+    Build the query for a user's expense changes after a sync token.
+
+    Changes are ordered by (change_seq, id); rows written by one statement
+    share a change_seq, so the id breaks ties and a page may end inside such
+    a group. Soft-deleted expenses are included so clients can drop them.
+    One extra row is fetched to tell whether more changes follow.
+
+    Args:
+        userId: Owner of the expenses
+        since: Token from a previous response, or None for a full sync
+        limit: Maximum number of changes to return
+
+    Returns:
+        SELECT of up to limit + 1 Expense rows
+
+    Raises:
+        HTTPException: If the token is malformed
+    """
+    statement = select(Expense).where(Expense.user_id == userId)
+    if since:
+        statement = statement.where(tuple_(Expense.change_seq, Expense.id) > parseSyncToken(since))
+    return statement.order_by(Expense.change_seq, Expense.id).limit(limit + 1)
+
+
+def buildChangesPage(expenses: List[Expense], since: Optional[str], limit: int) -> dict:
+    """
+    Build the changes response body from the rows of buildChangesQuery.
+
+    Args:
+        expenses: Rows returned by the changes query (up to limit + 1)
+        since: Token the client sent
+        limit: Requested page size
+
+    Returns:
+        Dictionary matching the ExpenseChangesResponse schema
+    """
+    changes = expenses[:limit]
+    if changes:
+        nextToken = formatSyncToken(changes[-1].change_seq, changes[-1].id)
+    else:
+        nextToken = since or formatSyncToken(0, 0)
+    return {
+        "changes": changes,
+        "next_token": nextToken,
+        "has_more": len(expenses) > limit
+    }
+
+
+def buildCategoryTotalsQuery(conditions: List):
+    """
+    Build the per-category aggregate behind the expense summary.
+
+    Totals are summed in SQL over the stored integer cents, so they are exact
+    and do not depend on row order. Expenses are grouped by their normalized
+    category, so "Food", "food " and "FOOD" are one row under the name the
+    user first spelled it with (as in the category filter, autocomplete and
+    trends).
+
+    Args:
+        conditions: Filter conditions scoped to the user
+
+    Returns:
+        SELECT of (category, total cents, count) rows
+    """
+    return (
+        select(Category.name, func.sum(Expense.amount, type_=Integer), func.count(Expense.id))
+        .join(Category, Category.id == Expense.category_id)
+        .where(*conditions)
+        .group_by(Category.id, Category.name)
+    )
+
+
+def buildExpenseSummary(
+    categoryTotals: List[Tuple[str, int, int]],
+    from_date: Optional[str],
+    to_date: Optional[str]
+) -> dict:
+    """
+    Build the summary response body from per-category totals.
+
+    Args:
+        categoryTotals: Rows from buildCategoryTotalsQuery
+        from_date: Start date echoed in date_range
+        to_date: End date echoed in date_range
+
+    Returns:
+        Dictionary matching the ExpenseSummary schema
+    """
+    dateRange = {
+        "from": from_date,
+        "to": to_date
+    }
+
+    # Totals stay in integer cents until they are converted for the response
+    totalCents = sum(cents for _, cents, _ in categoryTotals)
+    totalExpenses = sum(count for _, _, count in categoryTotals)
+
+    categories = [
+        CategorySummary(
+            category=category,
+            total=centsToAmount(cents),
+            percentage=(cents / totalCents * 100) if totalCents > 0 else 0,
+            count=count
+        )
+        for category, cents, count in categoryTotals
+    ]
+
+    # Sort by total amount descending (ties by name, for reproducible output)
+    categories.sort(key=lambda summary: (-summary.total, summary.category))
+
+    return {
+        "total_spending": centsToAmount(totalCents),
+        "total_expenses": totalExpenses,
+        "categories": categories,
+        "date_range": dateRange
+    }
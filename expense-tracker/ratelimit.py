@@ -0,0 +1,10 @@
+"""
+Shared rate limiter for the Expense Tracker API.
+
+Kept in its own module so that routers defined outside api_main.py can
+decorate endpoints with the same limiter instance.
+"""
+from slowapi import Limiter
+from slowapi.util import get_remote_address
+
+limiter = Limiter(key_func=get_remote_address)
@@ -0,0 +1,236 @@
+"""
+Core-select read path for the expense read endpoints.
+
+Loading Expense ORM instances for a read-only response costs more than the
+query itself: each row becomes an instance with state tracking and is added
+to the session's identity map, only to be converted to ExpenseResponse and
+thrown away. The helpers here select just the response columns with
+SQLAlchemy Core and return plain RowMapping objects, which the response
+models (and fastjson) accept directly.
+
+Statements are built the same way on every call so SQLAlchemy's compiled
+cache (per engine) reuses their SQL; the single-expense lookup is a
+lambda_stmt, which also skips rebuilding the statement in Python.
+"""
+import math
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import lambda_stmt, select
+from sqlalchemy.engine import RowMapping
+from sqlalchemy.orm import Session
+
+from models import Expense
+from fastjson import serializeResponse
+from schemas import ExpenseResponse, ExpenseListResponse, buildSparseListResponse
+
+
+def responseColumn(name: str):
+    """
+    Select an expense column under its response field name.
+
+    The label keeps row keys equal to field names where the database column
+    is named differently (amount is stored as amount_cents).
+
+    Args:
+        name: ExpenseResponse field name
+
+    Returns:
+        Labeled column
+    """
+    return Expense.__table__.c[name].label(name)
+
+
+# Columns of ExpenseResponse, in field order
+EXPENSE_RESPONSE_COLUMNS = tuple(responseColumn(name) for name in ExpenseResponse.model_fields)
+
+
+def responseColumns(fieldNames: Optional[Tuple[str, ...]]) -> Tuple:
+    """
+    Resolve a sparse fieldset to the columns to select.
+
+    Args:
+        fieldNames: Fields from parseFieldsParam, or None for all
+
+    Returns:
+        Columns in ExpenseResponse order
+    """
+    if fieldNames is None:
+        return EXPENSE_RESPONSE_COLUMNS
+    return tuple(responseColumn(name) for name in fieldNames)
+
+
+def selectExpensePage(
+    conditions: List,
+    orderBy,
+    offset: int,
+    limit: int,
+    columns: Tuple = EXPENSE_RESPONSE_COLUMNS
+):
+    """
+    Build the SELECT for a page of expense response rows.
+
+    Args:
+        conditions: Filter conditions scoped to the user
+        orderBy: ORDER BY expression
+        offset: Rows to skip
+        limit: Maximum rows to return
+        columns: Columns to load (see responseColumns)
+
+    Returns:
+        Core SELECT of the columns
+    """
+    return (
+        select(*columns)
+        .where(*conditions)
+        .order_by(orderBy, Expense.id)
+        .offset(offset)
+        .limit(limit)
+    )
+
+
+def selectOwnedExpense(expenseId: int, userId: int):
+    """
+    Build the cached SELECT for one non-deleted expense of a user.
+
+    change_seq is selected as well, for the expense's ETag.
+
+    Args:
+        expenseId: Expense ID
+        userId: Owner ID
+
+    Returns:
+        Lambda statement returning at most one row
+    """
+    return lambda_stmt(lambda: select(*EXPENSE_RESPONSE_COLUMNS, Expense.change_seq).where(
+        Expense.id == expenseId,
+        Expense.user_id == userId,
+        Expense.is_deleted == False
+    ))
+
+
+def selectOwnedExpenses(expenseIds: List[int], userId: int):
+    """
+    Build the SELECT for several non-deleted expenses of a user.
+
+    The IN list is an expanding parameter, so the statement compiles once
+    whatever the number of IDs.
+
+    Args:
+        expenseIds: Expense IDs
+        userId: Owner ID
+
+    Returns:
+        Core SELECT of the ExpenseResponse columns
+    """
+    return select(*EXPENSE_RESPONSE_COLUMNS).where(
+        Expense.id.in_(expenseIds),
+        Expense.user_id == userId,
+        Expense.is_deleted == False
+    )
+
+
+def lookupResponse(expenseIds: List[int], rows: Iterable[RowMapping]) -> dict:
+    """
+    Arrange multi-get rows in request order and list the IDs not found.
+
+    Expenses that do not exist, are deleted or belong to another user are all
+    reported as missing, so the response does not reveal which is which.
+
+    Args:
+        expenseIds: Requested IDs (duplicates are returned once)
+        rows: Result of selectOwnedExpenses
+
+    Returns:
+        Dictionary matching the ExpenseLookupResponse schema
+    """
+    rowsById = {row["id"]: row for row in rows}
+    requested = dict.fromkeys(expenseIds)
+    return {
+        "items": [rowsById[expenseId] for expenseId in requested if expenseId in rowsById],
+        "missing": [expenseId for expenseId in requested if expenseId not in rowsById]
+    }
+
+
+def renderExpensePage(
+    expenses: List[RowMapping],
+    total: int,
+    page: int,
+    pageSize: int,
+    fieldNames: Optional[Tuple[str, ...]]
+) -> bytes:
+    """
+    Serialize one page of the expense list.
+
+    Args:
+        expenses: Rows from selectExpensePage
+        total: Number of expenses matching the filters
+        page: Page number
+        pageSize: Items per page
+        fieldNames: Sparse fieldset from parseFieldsParam, or None for all fields
+
+    Returns:
+        ExpenseListResponse JSON (with only the requested item fields)
+    """
+    responseModel = buildSparseListResponse(fieldNames) if fieldNames else ExpenseListResponse
+    return serializeResponse(responseModel, {
+        "items": expenses,
+        "total": total,
+        "page": page,
+        "page_size": pageSize,
+        "pages": math.ceil(total / pageSize) if total > 0 else 0
+    })
+
+
+def fetchExpensePage(
+    db: Session,
+    conditions: List,
+    orderBy,
+    offset: int,
+    limit: int,
+    columns: Tuple = EXPENSE_RESPONSE_COLUMNS
+) -> List[RowMapping]:
+    """
+    Fetch a page of expense response rows.
+
+    Args:
+        db: Database session
+        conditions: Filter conditions scoped to the user
+        orderBy: ORDER BY expression
+        offset: Rows to skip
+        limit: Maximum rows to return
+        columns: Columns to load (see responseColumns)
+
+    Returns:
+        Row mappings with the selected ExpenseResponse fields
+    """
+    return db.execute(selectExpensePage(conditions, orderBy, offset, limit, columns)).mappings().all()
+
+
+def fetchOwnedExpense(db: Session, expenseId: int, userId: int) -> Optional[RowMapping]:
+    """
+    Fetch one non-deleted expense of a user.
+
+    Args:
+        db: Database session
+        expenseId: Expense ID
+        userId: Owner ID
+
+    Returns:
+        Row mapping with the ExpenseResponse fields and change_seq, or None
+    """
+    return db.execute(selectOwnedExpense(expenseId, userId)).mappings().first()
+
+
+def fetchOwnedExpenses(db: Session, expenseIds: List[int], userId: int) -> List[RowMapping]:
+    """
+    Fetch several non-deleted expenses of a user with one IN query.
+
+    Args:
+        db: Database session
+        expenseIds: Expense IDs
+        userId: Owner ID
+
+    Returns:
+        Row mappings with the ExpenseResponse fields, in no particular order
+    """
+    return db.execute(selectOwnedExpenses(expenseIds, userId)).mappings().all()
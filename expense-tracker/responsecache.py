@@ -0,0 +1,132 @@
+"""
+Per-user versioned response cache for the expense read endpoints.
+
+Every user has a write version that runExpenseWrite bumps after each committed
+create, update or delete. Cached responses are keyed by (user, version,
+endpoint, normalized query parameters), so a write makes all of that user's
+earlier entries unreachable at once without scanning the cache; the stale
+entries simply age out of the LRU. The version is read before the query runs
+and bumped only after the commit, so an entry never holds data older than the
+version it is filed under.
+
+Versions live in process memory. With several worker processes a write is
+only seen by the worker that made it, which is why the cache is opt-in
+(RESPONSE_CACHE_ENABLED) and its TTL bounds staleness elsewhere.
+
+Sub-requests of POST /batch bypass the cache: they must answer from the
+batch's read snapshot, which a cached (possibly newer) body is not.
+"""
+import threading
+from typing import Hashable, Optional
+
+from fastapi import Request, Response
+
+from cache import TTLCache
+from config import settings
+
+# Cached bodies are JSON produced by the endpoint's response model
+responseCache = TTLCache(settings.RESPONSE_CACHE_MAX_ENTRIES, settings.RESPONSE_CACHE_TTL_SECONDS)
+
+userVersions: dict = {}
+userVersionsLock = threading.Lock()
+
+
+def getUserVersion(userId: int) -> int:
+    """
+    Return the user's current write version.
+
+    Args:
+        userId: User ID
+
+    Returns:
+        Number of committed writes seen for the user in this process
+    """
+    return userVersions.get(userId, 0)
+
+
+def bumpUserVersion(userId: int) -> int:
+    """
+    Record a committed write, invalidating the user's cached responses.
+
+    Args:
+        userId: Owner of the written expenses
+
+    Returns:
+        The user's new write version
+    """
+    with userVersionsLock:
+        version = userVersions[userId] = userVersions.get(userId, 0) + 1
+        return version
+
+
+def normalizeParams(params: dict) -> tuple:
+    """
+    Normalize query parameters for use in cache keys and ETags.
+
+    Parameters that are not set (None or empty) are dropped and the rest are
+    sorted, so equivalent queries produce the same value.
+
+    Args:
+        params: Query parameters after FastAPI validation
+
+    Returns:
+        Sorted tuple of (name, value) pairs
+    """
+    return tuple(sorted((name, value) for name, value in params.items() if value not in (None, "")))
+
+
+def responseCacheKey(request: Request, userId: int, endpoint: str, params: dict) -> Optional[tuple]:
+    """
+    Build the cache key for a read, or None when the cache is not used.
+
+    Args:
+        request: Incoming request (batch sub-requests are not cached)
+        userId: User making the request
+        endpoint: Endpoint name (e.g. "list", "summary")
+        params: Query parameters after FastAPI validation
+
+    Returns:
+        Hashable key, or None
+    """
+    if not settings.RESPONSE_CACHE_ENABLED or getattr(request.state, "batchDb", None) is not None:
+        return None
+    return (userId, getUserVersion(userId), endpoint, normalizeParams(params))
+
+
+def getCachedResponse(key: Optional[Hashable]) -> Optional[Response]:
+    """
+    Return the cached response for a key.
+
+    Args:
+        key: Key from responseCacheKey
+
+    Returns:
+        JSON response with the cached body and its ETag, or None on a miss
+    """
+    if key is None:
+        return None
+    entry = responseCache.get(key)
+    if entry is None:
+        return None
+    body, etag = entry
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+
+def storeResponse(key: Optional[Hashable], body: bytes, etag: str) -> Response:
+    """
+    Store a serialized endpoint result and return it as a response.
+
+    Bodies come from fastjson.serializeResponse, so they are encoded with
+    orjson when FAST_JSON_ENABLED is set.
+
+    Args:
+        key: Key from responseCacheKey (None when the cache is disabled)
+        body: JSON body produced by the endpoint's response model
+        etag: ETag of the body, stored and replayed with it
+
+    Returns:
+        JSON response with the body and its ETag
+    """
+    if key is not None:
+        responseCache.set(key, (body, etag))
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
@@ -1,9 +1,13 @@
 """
 Pydantic schemas for request/response validation.
 """
-from pydantic import BaseModel, Field, EmailStr, validator
-from datetime import datetime
-from typing import Optional, List
+from pydantic import BaseModel, Field, EmailStr, validator, model_validator, create_model
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Annotated, Optional, List, Any, Union, Tuple, Type
+
+from config import settings
+from models import amountToCents, centsToAmount
 
 
 # ============================================================================
@@ -40,6 +44,17 @@ class UserResponse(UserBase):
         from_attributes = True
 
 
+class AuthenticatedUser(BaseModel):
+    """Identity of the user making a request (cached between requests by auth.py)."""
+    id: int
+    username: str
+    is_active: bool
+
+    class Config:
+        from_attributes = True
+        frozen = True
+
+
 class UserLogin(BaseModel):
     """Schema for user login."""
     username: str
@@ -74,9 +89,56 @@ class ExpenseBase(BaseModel):
     description: str = Field(max_length=200, description="Expense description")
 
 
+def roundAmountToCents(value: Optional[float]) -> Optional[float]:
+    """
+    Round an amount to the whole cents it is stored as.
+
+    Args:
+        value: Validated positive amount, or None
+
+    Returns:
+        Amount as it will be stored and returned
+
+    Raises:
+        ValueError: If the amount rounds to zero cents
+    """
+    if value is None:
+        return None
+    cents = amountToCents(value)
+    if cents == 0:
+        raise ValueError('Amount must be at least 0.01')
+    return centsToAmount(cents)
+
+
 class ExpenseCreate(ExpenseBase):
     """Schema for creating an expense."""
-    pass
+
+    @validator('amount')
+    def round_amount(cls, v):
+        """Round to whole cents, as amounts are stored."""
+        return roundAmountToCents(v)
+
+
+class ExpenseImport(ExpenseCreate):
+    """Schema for one imported expense row (date defaults to the import time)."""
+    date: Optional[datetime] = None
+
+    @validator('date', pre=True)
+    def accept_plain_date(cls, v):
+        """Accept YYYY-MM-DD as well as full ISO 8601 datetimes."""
+        if isinstance(v, str) and len(v) == 10:
+            try:
+                return datetime.strptime(v, "%Y-%m-%d")
+            except ValueError:
+                pass
+        return v
+
+    @validator('date')
+    def to_naive_utc(cls, v):
+        """Convert datetimes with a UTC offset to naive UTC, as dates are stored."""
+        if v is not None and v.tzinfo is not None:
+            return v.astimezone(timezone.utc).replace(tzinfo=None)
+        return v
 
 
 class ExpenseUpdate(BaseModel):
@@ -85,6 +147,11 @@ class ExpenseUpdate(BaseModel):
     category: Optional[str] = Field(None, min_length=1, max_length=50)
     description: Optional[str] = Field(None, max_length=200)
 
+    @validator('amount')
+    def round_amount(cls, v):
+        """Round to whole cents, as amounts are stored."""
+        return roundAmountToCents(v)
+
 
 class ExpenseResponse(ExpenseBase):
     """Schema for expense response."""
@@ -97,6 +164,19 @@ class ExpenseResponse(ExpenseBase):
         from_attributes = True
 
 
+class ExpenseChange(ExpenseResponse):
+    """Schema for an expense in a delta sync response (including deletions)."""
+    updated_at: Optional[datetime] = None
+    is_deleted: bool
+
+
+class ExpenseChangesResponse(BaseModel):
+    """Schema for a page of expense changes since a sync token."""
+    changes: List[ExpenseChange]
+    next_token: str
+    has_more: bool
+
+
 class ExpenseListResponse(BaseModel):
     """Schema for paginated expense list response."""
     items: List[ExpenseResponse]
@@ -106,6 +186,142 @@ class ExpenseListResponse(BaseModel):
     pages: int
 
 
+@lru_cache(maxsize=128)
+def buildSparseListResponse(fieldNames: Tuple[str, ...]) -> Type[ExpenseListResponse]:
+    """
+    Build the list response schema for a sparse fieldset.
+
+    Args:
+        fieldNames: ExpenseResponse fields to keep, in field order
+
+    Returns:
+        ExpenseListResponse variant whose items have only those fields
+    """
+    itemModel = create_model(
+        "ExpenseFields",
+        **{name: (ExpenseResponse.model_fields[name].annotation, ...) for name in fieldNames}
+    )
+    return create_model("ExpenseSparseListResponse", __base__=ExpenseListResponse, items=(List[itemModel], ...))
+
+
+class ExpenseBatchCreate(BaseModel):
+    """
+    Schema for creating many expenses in one request.
+
+    Each item is an ExpenseCreate. An item that does not validate (including
+    one that is not an object at all) is kept as-is rather than rejecting the
+    whole batch, so the endpoint can report its errors by index.
+    """
+    items: List[Annotated[Union[ExpenseCreate, Any], Field(union_mode='left_to_right')]] = Field(
+        min_length=1, max_length=settings.MAX_BATCH_SIZE
+    )
+
+
+class BatchItemError(BaseModel):
+    """Schema for a validation error on one item of a batch."""
+    index: int
+    field: str
+    message: str
+
+
+class ExpenseBatchResponse(BaseModel):
+    """Schema for batch create results."""
+    created_ids: List[int]
+    created: int
+    failed: int
+    errors: List[BatchItemError]
+
+
+class ExpenseSelection(BaseModel):
+    """
+    Schema selecting expenses for a bulk operation.
+
+    Expenses can be selected by ID, by the same filters as the list endpoint,
+    or both (the conditions are combined). At least one must be given.
+    """
+    ids: Optional[List[int]] = Field(None, min_length=1, max_length=settings.MAX_BATCH_SIZE)
+    category: Optional[str] = None
+    from_date: Optional[str] = Field(None, description="Start date (YYYY-MM-DD)")
+    to_date: Optional[str] = Field(None, description="End date (YYYY-MM-DD)")
+    min_amount: Optional[float] = Field(None, ge=0)
+    max_amount: Optional[float] = Field(None, ge=0)
+
+    @validator('category', 'from_date', 'to_date')
+    def reject_blank_filter(cls, v):
+        """Reject blank strings, which the filter builder would ignore."""
+        if v is not None and not v.strip():
+            raise ValueError('Filter must not be empty')
+        return v
+
+    @model_validator(mode='after')
+    def require_selection(self) -> 'ExpenseSelection':
+        """Refuse to select every expense implicitly."""
+        filters = (self.ids, self.category, self.from_date, self.to_date,
+                   self.min_amount, self.max_amount)
+        if all(value is None for value in filters):
+            raise ValueError('Provide ids or at least one filter')
+        return self
+
+
+class ExpenseBulkUpdate(ExpenseSelection):
+    """Schema for applying one update to many expenses."""
+    update: ExpenseUpdate
+
+
+class ExpenseBulkDelete(ExpenseSelection):
+    """Schema for soft deleting many expenses."""
+    pass
+
+
+class BulkOperationResponse(BaseModel):
+    """Schema for bulk update/delete results."""
+    affected: int
+
+
+class ExpenseLookup(BaseModel):
+    """Schema for fetching many expenses by ID in one request."""
+    ids: List[int] = Field(min_length=1, max_length=settings.MAX_LOOKUP_IDS)
+
+
+class ExpenseLookupResponse(BaseModel):
+    """Schema for multi-get results: found expenses and the IDs that were not."""
+    items: List[ExpenseResponse]
+    missing: List[int]
+
+
+class BatchRequestItem(BaseModel):
+    """Schema for one read request inside POST /batch."""
+    path: str = Field(
+        min_length=1, max_length=2000,
+        description="Read route with query string, e.g. /api/v1/expenses/summary?from_date=2026-01-01"
+    )
+    if_none_match: Optional[str] = Field(None, max_length=200, description="ETag from an earlier response")
+
+    @validator('path')
+    def require_absolute_path(cls, v):
+        """Only paths on this API can be batched."""
+        if not v.startswith('/'):
+            raise ValueError('Path must start with /')
+        return v
+
+
+class BatchRequest(BaseModel):
+    """Schema for running several read requests in one call."""
+    requests: List[BatchRequestItem] = Field(min_length=1, max_length=settings.MAX_BATCH_REQUESTS)
+
+
+class BatchResponseItem(BaseModel):
+    """Schema for the response to one batched request."""
+    status: int
+    etag: Optional[str]
+    body: Any = Field(description="JSON body of the response (null for 304)")
+
+
+class BatchResponse(BaseModel):
+    """Schema for batch results, in request order."""
+    responses: List[BatchResponseItem]
+
+
 # ============================================================================
 # Summary Schemas
 # ============================================================================
@@ -118,6 +334,17 @@ class CategorySummary(BaseModel):
     count: int
 
 
+class CategoryUsage(BaseModel):
+    """Schema for a category suggestion with its usage count."""
+    name: str
+    count: int
+
+
+class CategoryListResponse(BaseModel):
+    """Schema for category autocomplete results."""
+    categories: List[CategoryUsage]
+
+
 class ExpenseSummary(BaseModel):
     """Schema for overall expense summary."""
     total_spending: float
@@ -126,6 +353,22 @@ class ExpenseSummary(BaseModel):
     date_range: dict
 
 
+class TrendSeries(BaseModel):
+    """Schema for one category's values per trend bucket."""
+    category: str
+    totals: List[float]
+    counts: List[int]
+
+
+class ExpenseTrendsResponse(BaseModel):
+    """Schema for spending per time bucket and category, as parallel arrays."""
+    bucket: str
+    timezone: str
+    buckets: List[str]
+    totals: List[float]
+    series: List[TrendSeries]
+
+
 # ============================================================================
 # Error Schemas
 # ============================================================================
@@ -0,0 +1,163 @@
+"""
+Single-flight coalescing of identical concurrent reads.
+
+A dashboard open in several tabs sends the same list and summary requests at
+the same instant. Without coordination each one runs the same query and
+serializes the same body. SingleFlight lets the first request for a key (the
+leader) do the work while identical requests that arrive before it finishes
+wait for its result; every waiter gets the same serialized body and none of
+them touches the database.
+
+The read endpoints use their ETag as the key. It already covers the user, the
+endpoint, the normalized parameters and the user's change marker from the
+database, so requests are only coalesced when they would produce the same
+response, and a request that starts after a write sees the new marker and
+does not join a flight that started before it. A flight lasts only as long
+as its execution: nothing is kept once the leader finishes (that is the
+response cache's job).
+
+Sync endpoints wait on a concurrent.futures.Future from their threadpool
+thread; async endpoints await the same future through asyncio.wrap_future,
+so both apps share one implementation. A leader's exception is raised in
+every waiter. If an async leader is cancelled (its client went away), its
+waiters start a new flight instead of failing.
+"""
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Hashable, Optional, Tuple
+
+from config import settings
+
+
+class LeaderCancelled(Exception):
+    """Set on a flight whose leader was cancelled before it finished."""
+
+
+class SingleFlight:
+    """Registry of in-flight executions, with counters of the work saved."""
+
+    def __init__(self) -> None:
+        """Initialize with no flights."""
+        self._flights: dict = {}
+        self._lock = threading.Lock()
+        self.stats = {"executions": 0, "shared": 0}
+
+    def _join(self, key: Hashable) -> Tuple[Future, bool]:
+        """
+        Join the flight for a key, starting one if there is none.
+
+        Args:
+            key: Flight key
+
+        Returns:
+            (future of the flight, whether the caller is its leader)
+        """
+        with self._lock:
+            future = self._flights.get(key)
+            if future is not None:
+                self.stats["shared"] += 1
+                return future, False
+            future = self._flights[key] = Future()
+            # A running future cannot be cancelled, so a waiter that goes away
+            # (asyncio.wrap_future propagates cancellation) leaves it intact
+            future.set_running_or_notify_cancel()
+            self.stats["executions"] += 1
+            return future, True
+
+    def _land(self, key: Hashable, future: Future, result: Any = None, error: Optional[BaseException] = None) -> None:
+        """
+        End a flight and hand its outcome to the waiters.
+
+        Args:
+            key: Flight key
+            future: The flight's future
+            result: Leader's result
+            error: Leader's exception, if it failed
+        """
+        # Unregister first, so requests arriving from now on start a new flight
+        with self._lock:
+            del self._flights[key]
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def run(self, key: Optional[Hashable], execute: Callable[[], Any]) -> Any:
+        """
+        Run execute once for all concurrent callers with the same key.
+
+        Args:
+            key: Flight key, or None to run without coalescing
+            execute: Work to run; called at most once per flight
+
+        Returns:
+            Result of the flight's execution
+
+        Raises:
+            Exception: Whatever the flight's execution raised
+        """
+        if key is None or not settings.SINGLE_FLIGHT_ENABLED:
+            return execute()
+        while True:
+            future, isLeader = self._join(key)
+            if not isLeader:
+                try:
+                    return future.result()
+                except LeaderCancelled:
+                    continue
+            try:
+                result = execute()
+            except BaseException as error:
+                self._land(key, future, error=error)
+                raise
+            self._land(key, future, result=result)
+            return result
+
+    async def runAsync(self, key: Optional[Hashable], execute: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Async variant of run for coroutine work.
+
+        Args:
+            key: Flight key, or None to run without coalescing
+            execute: Coroutine function to run; awaited at most once per flight
+
+        Returns:
+            Result of the flight's execution
+
+        Raises:
+            Exception: Whatever the flight's execution raised
+        """
+        if key is None or not settings.SINGLE_FLIGHT_ENABLED:
+            return await execute()
+        while True:
+            future, isLeader = self._join(key)
+            if not isLeader:
+                try:
+                    return await asyncio.wrap_future(future)
+                except LeaderCancelled:
+                    continue
+            try:
+                result = await execute()
+            except asyncio.CancelledError:
+                self._land(key, future, error=LeaderCancelled())
+                raise
+            except BaseException as error:
+                self._land(key, future, error=error)
+                raise
+            self._land(key, future, result=result)
+            return result
+
+    def snapshot(self) -> dict:
+        """
+        Return the counters and the number of flights in progress.
+
+        Returns:
+            Dictionary suitable for a metrics response
+        """
+        with self._lock:
+            return {**self.stats, "in_flight": len(self._flights)}
+
+
+# Shared by the list, summary and trends endpoints of both apps
+readFlights = SingleFlight()
@@ -1,14 +1,39 @@
 """
 Comprehensive API tests for Expense Tracker REST API.
 """
+import asyncio
+import json
+import threading
 import pytest
+from datetime import datetime
+from functools import partial
+from fastapi import FastAPI, HTTPException
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from jose import jwt
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from database import Base, getDb
+from sqlalchemy.pool import NullPool
+from database import Base, getDb, getAsyncDb, createDbEngine, getAsyncDatabaseUrl
+from migrations import runMigrations
 from api_main import app
-from models import User, Expense
-from auth import getPasswordHash
+from api_async import installAsyncRoutes, router as asyncRouter
+from ratelimit import limiter
+from config import settings
+from mutations import insertExpense, softDeleteOwnedExpense
+from schemas import AuthenticatedUser, ExpenseCreate, ExpenseResponse
+from queries import buildExpenseFilters, buildOrderBy, formatSyncToken
+from reads import fetchExpensePage, fetchOwnedExpense
+import writer
+from models import User, Expense, Category
+import auth
+from auth import getPasswordHash, userCache, tokenCache
+from hashing import PasswordHashPool, HashPoolFullError
+import responsecache
+from categoryindex import categoryIndexes
+from singleflight import SingleFlight, readFlights
+from batching import beginReadSnapshot
+from changefeed import expenseChanges
 
 # Test database setup
 SQLALCHEMY_TEST_DATABASE_URL = "sqlite:///./test_expense_tracker.db"
@@ -23,6 +48,13 @@ TestSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=testEngi
 def testDb():
     """Create test database and tables for each test."""
     Base.metadata.create_all(bind=testEngine)
+    # User IDs restart with every database, so cached identities must not carry over
+    userCache.clear()
+    responsecache.responseCache.clear()
+    responsecache.userVersions.clear()
+    categoryIndexes.clear()
+    # All test clients share one address, so per-minute limits must not span tests
+    limiter.reset()
     db = TestSessionLocal()
     try:
         yield db
@@ -191,6 +223,37 @@ def test_login_nonexistent_user(client):
     assert response.status_code == 401
 
 
+def test_login_unknown_user_uses_precomputed_dummy_hash(client, monkeypatch):
+    """Test a login for an unknown user verifies on the pool without hashing a new dummy."""
+    def failHash(password):
+        raise AssertionError("login must not hash a dummy password")
+
+    monkeypatch.setattr(auth, "getPasswordHash", failHash)
+    completedBefore = auth.passwordHashPool.stats["completed"]
+
+    response = client.post("/api/v1/auth/login", json={"username": "ghost", "password": "Whatever1"})
+    assert response.status_code == 401
+    assert auth.passwordHashPool.stats["completed"] == completedBefore + 1
+
+
+def test_password_hash_pool_rejects_beyond_queue_limit():
+    """Test the hashing pool runs work off-thread and rejects work past its bound."""
+    pool = PasswordHashPool(maxWorkers=1, maxQueued=0)
+    release = threading.Event()
+
+    async def scenario():
+        running = asyncio.ensure_future(pool.run(release.wait))
+        await asyncio.sleep(0.05)
+        with pytest.raises(HashPoolFullError):
+            await pool.run(str, "rejected")
+        release.set()
+        return await running
+
+    assert asyncio.run(scenario()) is True
+    snapshot = pool.snapshot()
+    assert (snapshot["completed"], snapshot["rejected"], snapshot["running"]) == (1, 1, 0)
+
+
 def test_get_current_user(client, authHeaders):
     """Test getting current user information."""
     response = client.get("/api/v1/auth/me", headers=authHeaders)
@@ -205,6 +268,52 @@ def test_get_current_user_unauthorized(client):
     response = client.get("/api/v1/auth/me")
     assert response.status_code == 401
 
+def test_current_user_cached_until_user_changes(client, authHeaders, testDb, testUser, monkeypatch):
+    """Test repeat requests skip the users query and deactivation takes effect at once."""
+    client.get("/api/v1/expenses", headers=authHeaders)
+    hitsBefore = userCache.stats["hits"]
+    for _ in range(3):
+        assert client.get("/api/v1/expenses", headers=authHeaders).status_code == 200
+    assert userCache.stats["hits"] == hitsBefore + 3
+
+    testDb.get(User, testUser.id).is_active = False
+    testDb.flush()
+    # A concurrent request re-caching the old row before the commit is evicted by it
+    userCache.set(testUser.id, AuthenticatedUser(id=testUser.id, username="testuser", is_active=True))
+    testDb.commit()
+    assert userCache.get(testUser.id) is None
+    response = client.get("/api/v1/expenses", headers=authHeaders)
+    assert response.status_code == 403
+
+    assert client.get("/metrics").status_code == 404
+    monkeypatch.setattr(settings, "METRICS_ENABLED", True)
+    metrics = client.get("/metrics").json()
+    assert metrics["user_cache"]["invalidations"] >= 1
+
+
+def test_verified_tokens_cached_by_type(client, testUser):
+    """Test a reused token skips verification and a cached refresh token is still rejected."""
+    tokens = client.post(
+        "/api/v1/auth/login", json={"username": "testuser", "password": "TestPass123"}
+    ).json()
+    tokenCache.clear()
+    accessHeaders = {"Authorization": f"Bearer {tokens['access_token']}"}
+    refreshHeaders = {"Authorization": f"Bearer {tokens['refresh_token']}"}
+
+    hitsBefore = tokenCache.stats["hits"]
+    for _ in range(3):
+        assert client.get("/api/v1/expenses", headers=accessHeaders).status_code == 200
+        assert client.get("/api/v1/expenses", headers=refreshHeaders).status_code == 401
+    assert tokenCache.stats["hits"] == hitsBefore + 4
+
+    # exp is optional in JWTs: such a token is accepted but never cached
+    token = jwt.encode(
+        {"sub": "testuser", "user_id": testUser.id, "type": "access"}, settings.SECRET_KEY, algorithm=settings.ALGORITHM
+    )
+    sizeBefore = tokenCache.snapshot()["size"]
+    assert client.get("/api/v1/expenses", headers={"Authorization": f"Bearer {token}"}).status_code == 200
+    assert tokenCache.snapshot()["size"] == sizeBefore
+
 
 # ============================================================================
 # Expense CRUD Tests
@@ -316,6 +425,117 @@ def test_list_expenses_filter_by_category(client, authHeaders, testDb, testUser)
     assert all(item["category"] == "Food" for item in data["items"])
 
 
+def test_category_filter_is_exact_and_case_insensitive(client, authHeaders, testDb, testUser):
+    """Test categories are normalized per user and followed through updates."""
+    for category in ["Food", " food", "Fast Food"]:
+        client.post("/api/v1/expenses", headers=authHeaders, json={
+            "amount": 1.0, "category": category, "description": category
+        })
+    assert testDb.query(Category).filter(Category.user_id == testUser.id).count() == 2
+
+    def listed(category):
+        return sorted(item["description"] for item in client.get(
+            f"/api/v1/expenses?category={category}", headers=authHeaders
+        ).json()["items"])
+
+    assert listed("FOOD") == [" food", "Food"]
+    assert listed("fast food") == ["Fast Food"]
+    assert listed("Foo") == []
+
+    client.post("/api/v1/expenses/bulk/update", headers=authHeaders, json={
+        "category": "food", "update": {"category": "Groceries"}
+    })
+    assert listed("groceries") == [" food", "Food"]
+    assert listed("food") == []
+
+
+def test_categories_autocomplete_from_index(client, authHeaders):
+    """Test category prefixes are served from the index and follow writes."""
+    ids = client.post("/api/v1/expenses/batch", headers=authHeaders, json={"items": [
+        {"amount": 1.0, "category": category, "description": "x"}
+        for category in ["Food", "food ", "Fuel", "Travel"]
+    ]}).json()["created_ids"]
+
+    def suggested(prefix):
+        response = client.get(f"/api/v1/categories?prefix={prefix}", headers=authHeaders)
+        assert response.status_code == 200
+        return [(item["name"], item["count"]) for item in response.json()["categories"]]
+
+    assert suggested("F") == [("Food", 2), ("Fuel", 1)]
+    hits = categoryIndexes.stats["hits"]
+    assert suggested("fu") == [("Fuel", 1)]
+    assert suggested("x") == []
+    assert categoryIndexes.stats["hits"] == hits + 2
+
+    # Writes update the index instead of sending the next keystroke back to the table
+    misses = categoryIndexes.stats["misses"]
+    client.delete(f"/api/v1/expenses/{ids[0]}", headers=authHeaders)
+    client.delete(f"/api/v1/expenses/{ids[1]}", headers=authHeaders)
+    client.post("/api/v1/expenses", headers=authHeaders, json={
+        "amount": 1.0, "category": "Fuel", "description": "x"
+    })
+    assert suggested("") == [("Fuel", 2), ("Travel", 1)]
+    client.put(f"/api/v1/expenses/{ids[3]}", headers=authHeaders, json={"category": "Flights"})
+    client.post("/api/v1/expenses/bulk/update", headers=authHeaders, json={
+        "category": "fuel", "update": {"category": "Travel"}
+    })
+    assert suggested("") == [("Travel", 2), ("Flights", 1)]
+    client.post("/api/v1/expenses/import?format=ndjson", headers=authHeaders, content=b"".join(
+        b'{"amount": 1, "category": "%s", "description": "x"}\n' % name for name in (b"flights", b"Fun")
+    ))
+    assert suggested("f") == [("Flights", 2), ("Fun", 1)]
+    assert categoryIndexes.stats["misses"] == misses
+
+
+def test_list_expenses_full_text_search(client, authHeaders):
+    """Test q= matches descriptions through the FTS index, with filters and ranking."""
+    ids = client.post("/api/v1/expenses/batch", headers=authHeaders, json={"items": [
+        {"amount": 10.0, "category": "Food", "description": "Team lunch"},
+        {"amount": 80.0, "category": "Food", "description": "Team offsite: team dinner, team lunches"},
+        {"amount": 5.0, "category": "Food", "description": "Coffee"},
+    ]}).json()["created_ids"]
+
+    def searched(query):
+        response = client.get(f"/api/v1/expenses?{query}", headers=authHeaders)
+        assert response.status_code == 200
+        return [item["id"] for item in response.json()["items"]]
+
+    assert searched("q=TEAM") == [ids[1], ids[0]]
+    assert searched("q=team&sort_by=relevance&sort_order=asc") == [ids[0], ids[1]]
+    assert searched("q=lunch") == [ids[0], ids[1]]
+    assert searched("q=team&min_amount=50") == [ids[1]]
+    assert sorted(searched('q=(team"lunch*')) == [ids[0], ids[1]]
+    assert searched("q=team OR coffee") == []
+    assert searched("q=team&sort_by=amount&sort_order=asc") == [ids[0], ids[1]]
+
+    client.put(f"/api/v1/expenses/{ids[2]}", headers=authHeaders, json={"description": "Team coffee"})
+    client.delete(f"/api/v1/expenses/{ids[1]}", headers=authHeaders)
+    assert searched("q=team&sort_by=date&sort_order=asc") == [ids[0], ids[2]]
+    assert searched("q=coffee") == [ids[2]]
+
+    assert client.get("/api/v1/expenses?q=%2A%2A", headers=authHeaders).status_code == 400
+    assert client.get("/api/v1/expenses?sort_by=relevance", headers=authHeaders).status_code == 400
+
+
+@pytest.mark.parametrize("fastJson", [False, True])
+def test_list_expenses_sparse_fields(client, authHeaders, testExpense, monkeypatch, fastJson):
+    """Test fields= narrows list items to the requested fields."""
+    if fastJson:
+        pytest.importorskip("orjson")
+    monkeypatch.setattr(settings, "FAST_JSON_ENABLED", fastJson)
+    response = client.get("/api/v1/expenses?fields=date, amount,id,amount", headers=authHeaders)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == 1
+    assert list(data["items"][0]) == ["amount", "id", "date"]
+    assert data["items"][0]["id"] == testExpense.id
+    assert response.headers["ETag"] != client.get("/api/v1/expenses", headers=authHeaders).headers["ETag"]
+
+    response = client.get("/api/v1/expenses?fields=id,hashed_password", headers=authHeaders)
+    assert response.status_code == 400
+    assert "hashed_password" in response.json()["error"]["message"]
+
+
 def test_list_expenses_filter_by_date(client, authHeaders, testExpense):
     """Test filtering expenses by date range."""
     response = client.get(
@@ -337,12 +557,68 @@ def test_get_expense_success(client, authHeaders, testExpense):
     assert data["amount"] == testExpense.amount
 
 
+def test_core_reads_return_response_rows_without_orm_instances(testDb, testExpense, testUser):
+    """Test the Core read path returns plain mappings and leaves the identity map empty."""
+    expected = ExpenseResponse.model_validate(testExpense).model_dump()
+    userId = testUser.id
+    testDb.expunge_all()
+    rows = fetchExpensePage(testDb, buildExpenseFilters(userId), buildOrderBy("date", "desc"), 0, 10)
+    assert [dict(row) for row in rows] == [expected]
+    assert fetchOwnedExpense(testDb, expected["id"], userId)["id"] == expected["id"]
+    assert fetchOwnedExpense(testDb, expected["id"], userId + 1) is None
+    assert len(testDb.identity_map) == 0
+
+
 def test_get_expense_not_found(client, authHeaders):
     """Test getting non-existent expense returns 404."""
     response = client.get("/api/v1/expenses/9999", headers=authHeaders)
     assert response.status_code == 404
 
 
+def test_lookup_expenses_by_ids(client, authHeaders, testDb, testUser):
+    """Test multi-get returns owned expenses in request order and reports the rest as missing."""
+    otherUser = User(email="other@example.com", username="other", hashed_password="x")
+    testDb.add(otherUser)
+    testDb.commit()
+    mine = [Expense(amount=float(i), category="Food", description=f"Mine {i}", user_id=testUser.id) for i in (1, 2, 3)]
+    theirs = Expense(amount=5.0, category="Food", description="Theirs", user_id=otherUser.id)
+    testDb.add_all([*mine, theirs])
+    testDb.commit()
+    (first, deleted, third), theirsId = [expense.id for expense in mine], theirs.id
+    client.delete(f"/api/v1/expenses/{deleted}", headers=authHeaders)
+
+    ids = [third, theirsId, first, deleted, 9999, third]
+    response = client.post("/api/v1/expenses/lookup", headers=authHeaders, json={"ids": ids})
+    assert response.status_code == 200
+    data = response.json()
+    assert [item["id"] for item in data["items"]] == [third, first]
+    assert data["items"][0] == client.get(f"/api/v1/expenses/{third}", headers=authHeaders).json()
+    assert data["missing"] == [theirsId, deleted, 9999]
+
+    assert client.post("/api/v1/expenses/lookup", headers=authHeaders, json={"ids": []}).status_code == 422
+    tooMany = list(range(settings.MAX_LOOKUP_IDS + 1))
+    response = client.post("/api/v1/expenses/lookup", headers=authHeaders, json={"ids": tooMany})
+    assert response.status_code == 422
+
+
+def test_get_expense_conditional(client, authHeaders, testExpense):
+    """Test an expense's ETag gives 304 until the expense is updated."""
+    url = f"/api/v1/expenses/{testExpense.id}"
+    etag = client.get(url, headers=authHeaders).headers["ETag"]
+
+    response = client.get(url, headers={**authHeaders, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+
+    client.put(url, headers=authHeaders, json={"amount": 99.0})
+    client.put(url, headers=authHeaders, json={"amount": 98.0})
+    response = client.get(url, headers={**authHeaders, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["amount"] == 98.0
+    assert response.headers["ETag"] != etag
+
+
 def test_update_expense_success(client, authHeaders, testExpense):
     """Test updating an expense."""
     response = client.put(
@@ -390,6 +666,255 @@ def test_delete_expense_not_found(client, authHeaders):
     assert response.status_code == 404
 
 
+def test_create_expenses_batch(client, authHeaders, testDb):
+    """Test batch create inserts valid items and reports invalid ones by index."""
+    response = client.post("/api/v1/expenses/batch", headers=authHeaders, json={"items": [
+        {"amount": 10.0, "category": "Food", "description": "Breakfast"},
+        {"amount": -5.0, "category": "Food", "description": "Negative"},
+        {"amount": 20.0, "category": "Transport", "description": "Train"},
+        {"category": "Food", "description": "Missing amount"},
+    ]})
+    assert response.status_code == 201
+    data = response.json()
+    assert data["created"] == 2
+    assert data["failed"] == 2
+    assert [error["index"] for error in data["errors"]] == [1, 3]
+    assert data["errors"][0]["field"] == "amount"
+
+    createdAmounts = [
+        testDb.get(Expense, expenseId).amount for expenseId in data["created_ids"]
+    ]
+    assert createdAmounts == [10.0, 20.0]
+
+
+def test_create_expenses_batch_reports_non_object_items(client, authHeaders):
+    """Test items that are not objects are reported per index, not as a body error."""
+    response = client.post("/api/v1/expenses/batch", headers=authHeaders, json={"items": [
+        1, {"amount": 3.0, "category": "Food", "description": "Snack"}, "x"
+    ]})
+    assert response.status_code == 201
+    data = response.json()
+    assert data["created"] == 1
+    assert [error["index"] for error in data["errors"]] == [0, 2]
+
+
+def test_create_expenses_batch_all_or_nothing(client, authHeaders, testDb):
+    """Test all_or_nothing rejects the batch without inserting anything."""
+    response = client.post(
+        "/api/v1/expenses/batch?all_or_nothing=true",
+        headers=authHeaders,
+        json={"items": [
+            {"amount": 10.0, "category": "Food", "description": "Breakfast"},
+            {"amount": 0, "category": "Food", "description": "Zero"},
+        ]}
+    )
+    assert response.status_code == 422
+    assert testDb.query(Expense).count() == 0
+
+
+def test_bulk_update_expenses_by_filter(client, authHeaders, testDb, testUser):
+    """Test bulk update applies to every expense matching the list filters."""
+    for amount, category in [(10.0, "Food"), (20.0, "Food"), (30.0, "Transport")]:
+        testDb.add(Expense(amount=amount, category=category, description="x", user_id=testUser.id))
+    testDb.commit()
+
+    response = client.post("/api/v1/expenses/bulk/update", headers=authHeaders, json={
+        "category": "Food", "update": {"category": "Groceries"}
+    })
+    assert response.status_code == 200
+    assert response.json()["affected"] == 2
+
+    testDb.expire_all()
+    categories = sorted(e.category for e in testDb.query(Expense).all())
+    assert categories == ["Groceries", "Groceries", "Transport"]
+
+
+def test_bulk_delete_expenses_by_ids(client, authHeaders, testDb, testUser):
+    """Test bulk soft delete by ids only touches the current user's expenses."""
+    otherUser = User(email="other@example.com", username="other", hashed_password="x")
+    testDb.add(otherUser)
+    testDb.commit()
+    mine = Expense(amount=5.0, category="Food", description="Mine", user_id=testUser.id)
+    theirs = Expense(amount=5.0, category="Food", description="Theirs", user_id=otherUser.id)
+    testDb.add_all([mine, theirs])
+    testDb.commit()
+    mineId, theirsId = mine.id, theirs.id
+
+    response = client.post("/api/v1/expenses/bulk/delete", headers=authHeaders, json={
+        "ids": [mineId, theirsId]
+    })
+    assert response.json()["affected"] == 1
+
+    testDb.expire_all()
+    assert testDb.get(Expense, mineId).is_deleted is True
+    assert testDb.get(Expense, theirsId).is_deleted is False
+
+
+def test_bulk_delete_requires_selection(client, authHeaders):
+    """Test bulk delete refuses an empty selection instead of deleting everything."""
+    response = client.post("/api/v1/expenses/bulk/delete", headers=authHeaders, json={})
+    assert response.status_code == 422
+
+
+def test_bulk_operations_reject_blank_filters_and_nulls(client, authHeaders, testExpense, testDb):
+    """Test blank filters and null update values never reach the UPDATE."""
+    for blank in ("", "  "):
+        response = client.post("/api/v1/expenses/bulk/delete", headers=authHeaders, json={
+            "category": blank
+        })
+        assert response.status_code == 422
+
+    response = client.post("/api/v1/expenses/bulk/update", headers=authHeaders, json={
+        "ids": [testExpense.id], "update": {"category": None}
+    })
+    assert response.status_code == 400
+
+    testDb.expire_all()
+    assert testDb.get(Expense, testExpense.id).is_deleted is False
+
+
+def test_export_expenses_ndjson(client, authHeaders, testDb, testUser):
+    """Test NDJSON export streams every matching expense without pagination."""
+    for i in range(150):
+        testDb.add(Expense(
+            amount=1.0 + i, category="Food" if i % 2 else "Rent",
+            description=f"Row {i}", user_id=testUser.id
+        ))
+    testDb.commit()
+
+    response = client.get(
+        "/api/v1/expenses/export?category=Food&sort_by=amount&sort_order=asc",
+        headers=authHeaders
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert len(rows) == 75
+    assert all(row["category"] == "Food" for row in rows)
+    assert rows[0]["amount"] == 2.0
+
+
+def test_fast_json_matches_default_serialization(client, authHeaders, testDb, testUser, monkeypatch):
+    """Test the orjson path returns the same JSON as response_model serialization."""
+    pytest.importorskip("orjson")
+    for i in range(5):
+        testDb.add(Expense(amount=1.5 + i, category="Food" if i % 2 else "Rent",
+                           description=f"Row {i}", user_id=testUser.id))
+    testDb.commit()
+    urls = [
+        "/api/v1/expenses?sort_by=amount",
+        "/api/v1/expenses/summary",
+        "/api/v1/expenses/summary?from_date=2000-01-01&to_date=2000-01-02"
+    ]
+
+    defaults = [client.get(url, headers=authHeaders).json() for url in urls]
+    defaultExport = client.get("/api/v1/expenses/export", headers=authHeaders).text
+    monkeypatch.setattr(settings, "FAST_JSON_ENABLED", True)
+    assert [client.get(url, headers=authHeaders).json() for url in urls] == defaults
+    fastExport = client.get("/api/v1/expenses/export", headers=authHeaders).text
+    assert [json.loads(line) for line in fastExport.splitlines()] == [
+        json.loads(line) for line in defaultExport.splitlines()
+    ]
+
+
+def test_export_expenses_csv_gzip(client, authHeaders, testExpense):
+    """Test CSV export with on-the-fly gzip compression."""
+    response = client.get("/api/v1/expenses/export?format=csv&gzip=true", headers=authHeaders)
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    lines = response.text.splitlines()  # httpx decodes gzip transparently
+    assert lines[0] == "id,amount,category,description,date,created_at,user_id"
+    assert lines[1].split(",")[2] == "Food"
+
+
+def test_export_expenses_invalid_date(client, authHeaders):
+    """Test export validates filters before streaming starts."""
+    response = client.get("/api/v1/expenses/export?from_date=bad", headers=authHeaders)
+    assert response.status_code == 400
+
+
+def test_import_expenses_csv_streams_progress(client, authHeaders, testDb, monkeypatch):
+    """Test CSV import commits in chunks and reports per-row errors."""
+    monkeypatch.setattr(settings, "IMPORT_CHUNK_ROWS", 10)
+    lines = ["amount,category,description,date"]
+    lines += [f"{i + 1}.50,Food,\"Meal, number {i}\",2025-03-0{i % 9 + 1}" for i in range(25)]
+    lines.insert(5, "-1,Food,Negative,")
+    lines.insert(9, '7,Food,"Multi\nline note",')
+
+    response = client.post(
+        "/api/v1/expenses/import",
+        headers={**authHeaders, "Content-Type": "text/csv"},
+        content="\n".join(lines).encode()
+    )
+    assert response.status_code == 200
+    events = [json.loads(line) for line in response.text.splitlines()]
+
+    errors = [event for event in events if event["event"] == "error"]
+    assert [(error["row"], error["field"]) for error in errors] == [(5, "amount")]
+    assert [event["inserted"] for event in events if event["event"] == "progress"] == [10, 20, 26]
+    assert events[-1] == {"event": "complete", "rows": 27, "inserted": 26, "failed": 1, "chunks": 3}
+
+    assert testDb.query(Expense).count() == 26
+    assert testDb.query(Expense).filter(Expense.description == "Multi\nline note").count() == 1
+    assert testDb.query(Expense).filter(Expense.description == "Meal, number 0").one().date.year == 2025
+
+
+def test_import_expenses_ndjson_and_bad_header(client, authHeaders, testDb):
+    """Test NDJSON import and that a CSV without required columns is aborted."""
+    body = '{"amount": 3, "category": "Fun", "description": "Game"}\nnot json\n'
+    response = client.post(
+        "/api/v1/expenses/import?format=ndjson", headers=authHeaders, content=body.encode()
+    )
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert events[0]["event"] == "error" and events[0]["row"] == 2
+    assert events[-1]["inserted"] == 1
+
+    # Offsets are converted to UTC, so the row lands on its UTC day
+    body = '{"amount": 4, "category": "Fun", "description": "Late", "date": "2026-01-01T23:30:00-05:00"}\n'
+    client.post("/api/v1/expenses/import?format=ndjson", headers=authHeaders, content=body.encode())
+    assert testDb.query(Expense).filter_by(description="Late").one().date == datetime(2026, 1, 2, 4, 30)
+
+    response = client.post(
+        "/api/v1/expenses/import",
+        headers={**authHeaders, "Content-Type": "text/csv"},
+        content=b"amount,description\n1,x\n"
+    )
+    assert json.loads(response.text.splitlines()[-1])["event"] == "aborted"
+
+
+def test_expense_changes_since_token(client, authHeaders, testExpense):
+    """Test delta sync returns creates, updates and deletions after a token, in pages."""
+    response = client.get("/api/v1/expenses/changes", headers=authHeaders)
+    assert response.status_code == 200
+    data = response.json()
+    assert [change["id"] for change in data["changes"]] == [testExpense.id]
+    assert data["has_more"] is False
+    token = data["next_token"]
+
+    # Nothing changed: same token back
+    data = client.get(f"/api/v1/expenses/changes?since={token}", headers=authHeaders).json()
+    assert data == {"changes": [], "next_token": token, "has_more": False}
+
+    ids = client.post("/api/v1/expenses/batch", headers=authHeaders, json={"items": [
+        {"amount": 1.0, "category": "Food", "description": "One"},
+        {"amount": 2.0, "category": "Food", "description": "Two"}
+    ]}).json()["created_ids"]
+    client.put(f"/api/v1/expenses/{testExpense.id}", headers=authHeaders, json={"amount": 7.0})
+    client.delete(f"/api/v1/expenses/{ids[0]}", headers=authHeaders)
+
+    data = client.get(f"/api/v1/expenses/changes?since={token}&limit=2", headers=authHeaders).json()
+    assert [change["id"] for change in data["changes"]] == [ids[1], testExpense.id]
+    assert data["changes"][1]["amount"] == 7.0
+    assert data["has_more"] is True
+
+    data = client.get(f"/api/v1/expenses/changes?since={data['next_token']}", headers=authHeaders).json()
+    assert [(change["id"], change["is_deleted"]) for change in data["changes"]] == [(ids[0], True)]
+    assert data["has_more"] is False
+
+    response = client.get("/api/v1/expenses/changes?since=bogus", headers=authHeaders)
+    assert response.status_code == 400
+
+
 # ============================================================================
 # Summary Tests
 # ============================================================================
@@ -428,6 +953,138 @@ def test_get_expense_summary(client, authHeaders, testDb, testUser):
     assert foodCategory["count"] == 2
 
 
+def test_expense_summary_groups_normalized_categories(client, authHeaders):
+    """Test spellings of one category are summed into one row under its first name."""
+    for amount, category in [(10.0, "Food"), (20.0, "food "), (30.0, "FOOD"), (5.0, "Rent")]:
+        client.post("/api/v1/expenses", headers=authHeaders, json={
+            "amount": amount, "category": category, "description": "x"
+        })
+    data = client.get("/api/v1/expenses/summary", headers=authHeaders).json()
+    assert [(c["category"], c["total"], c["count"]) for c in data["categories"]] == [
+        ("Food", 60.0, 3), ("Rent", 5.0, 1)
+    ]
+
+
+def test_response_cache_serves_reads_until_next_write(client, authHeaders, testDb, testUser, monkeypatch):
+    """Test list and summary are served from cache and a write invalidates them."""
+    monkeypatch.setattr(settings, "RESPONSE_CACHE_ENABLED", True)
+    client.post("/api/v1/expenses", headers=authHeaders, json={
+        "amount": 10.0, "category": "Food", "description": "Cached"
+    })
+    assert client.get("/api/v1/expenses?page_size=5", headers=authHeaders).json()["total"] == 1
+    assert client.get("/api/v1/expenses/summary", headers=authHeaders).json()["total_expenses"] == 1
+
+    # A row written behind the API's back is not seen until the next write
+    testDb.add(Expense(amount=5.0, category="Food", description="Direct", user_id=testUser.id))
+    testDb.commit()
+    hitsBefore = responsecache.responseCache.stats["hits"]
+    assert client.get("/api/v1/expenses?page_size=5&category=", headers=authHeaders).json()["total"] == 1
+    assert client.get("/api/v1/expenses/summary", headers=authHeaders).json()["total_expenses"] == 1
+    assert responsecache.responseCache.stats["hits"] == hitsBefore + 2
+
+    client.post("/api/v1/expenses", headers=authHeaders, json={
+        "amount": 20.0, "category": "Food", "description": "Invalidates"
+    })
+    assert client.get("/api/v1/expenses?page_size=5", headers=authHeaders).json()["total"] == 3
+    assert client.get("/api/v1/expenses/summary", headers=authHeaders).json()["total_spending"] == 35.0
+
+
+def test_single_flight_shares_one_execution():
+    """Test identical concurrent calls share one execution, its result and its errors."""
+    flights = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def execute():
+        calls.append(1)
+        release.wait(5)
+        return b'{"total": 1}'
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flights.run("key", execute))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    while flights.snapshot()["shared"] < 3:
+        threading.Event().wait(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert calls == [1]
+    assert results == [b'{"total": 1}'] * 4
+    assert flights.snapshot() == {"executions": 1, "shared": 3, "in_flight": 0}
+
+    # Once landed, the next call executes again
+    assert flights.run("key", lambda: b"again") == b"again"
+
+    async def failingLeader():
+        await asyncio.sleep(0.05)
+        raise HTTPException(status_code=400, detail="bad")
+
+    async def cancelledLeader():
+        await asyncio.sleep(5)
+
+    async def scenario():
+        failures = await asyncio.gather(
+            flights.runAsync("fail", failingLeader), flights.runAsync("fail", failingLeader),
+            return_exceptions=True
+        )
+        assert [type(failure) for failure in failures] == [HTTPException, HTTPException]
+
+        # A waiter whose leader is cancelled runs the work itself
+        leader = asyncio.create_task(flights.runAsync("cancel", cancelledLeader))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(flights.runAsync("cancel", partial(asyncio.sleep, 0, b"waiter")))
+        await asyncio.sleep(0)
+        leader.cancel()
+        assert await waiter == b"waiter"
+
+    asyncio.run(scenario())
+    assert flights.snapshot()["in_flight"] == 0
+
+
+def test_read_endpoints_run_through_single_flight(client, authHeaders, testExpense, monkeypatch):
+    """Test list and summary count their executions and return the same body either way."""
+    monkeypatch.setattr(settings, "METRICS_ENABLED", True)
+    before = client.get("/metrics").json()["single_flight"]["executions"]
+    coalesced = client.get("/api/v1/expenses/summary", headers=authHeaders)
+    assert client.get("/api/v1/expenses", headers=authHeaders).json()["total"] == 1
+    assert client.get("/metrics").json()["single_flight"]["executions"] == before + 2
+
+    monkeypatch.setattr(settings, "SINGLE_FLIGHT_ENABLED", False)
+    direct = client.get("/api/v1/expenses/summary", headers=authHeaders)
+    assert direct.content == coalesced.content
+    assert direct.headers["ETag"] == coalesced.headers["ETag"]
+    assert readFlights.snapshot()["executions"] == before + 2
+
+
+@pytest.mark.parametrize("cacheEnabled", [False, True])
+def test_list_and_summary_conditional(client, authHeaders, testExpense, monkeypatch, cacheEnabled):
+    """Test list and summary ETags change with writes and parameters, with or without the response cache."""
+    monkeypatch.setattr(settings, "RESPONSE_CACHE_ENABLED", cacheEnabled)
+    listEtag = client.get("/api/v1/expenses", headers=authHeaders).headers["ETag"]
+    summaryEtag = client.get("/api/v1/expenses/summary", headers=authHeaders).headers["ETag"]
+    assert listEtag != summaryEtag
+    assert client.get("/api/v1/expenses?page=2", headers=authHeaders).headers["ETag"] != listEtag
+
+    for url, etag in (("/api/v1/expenses", listEtag), ("/api/v1/expenses/summary", summaryEtag)):
+        response = client.get(url, headers={**authHeaders, "If-None-Match": f'"other", {etag}'})
+        assert response.status_code == 304
+
+    assert client.delete(f"/api/v1/expenses/{testExpense.id}", headers=authHeaders).status_code == 204
+    response = client.get("/api/v1/expenses", headers={**authHeaders, "If-None-Match": listEtag})
+    assert response.status_code == 200
+    assert response.json()["total"] == 0
+    response = client.get("/api/v1/expenses/summary", headers={**authHeaders, "If-None-Match": summaryEtag})
+    assert response.status_code == 200
+
+    client.post("/api/v1/expenses", headers=authHeaders, json={
+        "amount": 1.0, "category": "Food", "description": "New"
+    })
+    response = client.get("/api/v1/expenses", headers=authHeaders)
+    assert response.json()["total"] == 1
+    assert response.headers["ETag"] != listEtag
+
+
 def test_get_expense_summary_with_date_filter(client, authHeaders, testExpense):
     """Test getting expense summary with date filtering."""
     response = client.get(
@@ -440,6 +1097,74 @@ def test_get_expense_summary_with_date_filter(client, authHeaders, testExpense):
     assert "categories" in data
 
 
+def test_amounts_are_stored_and_summed_as_integer_cents(client, authHeaders, testDb):
+    """Test amounts round to cents, filter exactly and sum without float drift."""
+    client.post("/api/v1/expenses/batch", headers=authHeaders, json={"items": [
+        {"amount": 0.1, "category": "Coffee", "description": "x"} for _ in range(10)
+    ] + [{"amount": 0.2, "category": "Snacks", "description": "y"}]})
+    response = client.post("/api/v1/expenses", headers=authHeaders, json={
+        "amount": 10.005, "category": "Snacks", "description": "z"
+    })
+    assert response.json()["amount"] == 10.01
+    assert client.post("/api/v1/expenses", headers=authHeaders, json={
+        "amount": 0.004, "category": "Snacks", "description": "z"
+    }).status_code == 422
+    assert testDb.execute(text("SELECT typeof(amount_cents), amount_cents FROM expenses ORDER BY id DESC")).first() == (
+        "integer", 1001
+    )
+
+    data = client.get("/api/v1/expenses/summary", headers=authHeaders).json()
+    assert data["total_spending"] == 11.21
+    assert data["total_expenses"] == 12
+    assert [(item["category"], item["total"], item["count"]) for item in data["categories"]] == [
+        ("Snacks", 10.21, 2), ("Coffee", 1.0, 10)
+    ]
+
+    response = client.get("/api/v1/expenses?min_amount=0.2&max_amount=0.2", headers=authHeaders)
+    assert [item["amount"] for item in response.json()["items"]] == [0.2]
+
+
+def test_expense_trends_bucket_in_sql_by_local_time(client, authHeaders, testDb, testUser):
+    """Test trends buckets per category, fill gaps and follow DST in the given zone."""
+    testDb.add_all([
+        Expense(amount=amount, category=category, description="x", date=date, user_id=testUser.id)
+        for amount, category, date in [
+            (10.0, "Food", datetime(2026, 1, 15, 12)),
+            (5.0, "food", datetime(2026, 3, 2, 12)),
+            (100.0, "Rent", datetime(2026, 3, 3, 12)),
+            # 23:30 EST on 7 March, then 00:30 EDT on 9 March (a fixed -5h would give the 8th)
+            (1.0, "Food", datetime(2026, 3, 8, 4, 30)),
+            (2.0, "Food", datetime(2026, 3, 9, 4, 30)),
+        ]
+    ])
+    testDb.commit()
+
+    data = client.get("/api/v1/expenses/trends?bucket=month&to_date=2026-03-31", headers=authHeaders).json()
+    assert data["buckets"] == ["2026-01-01", "2026-02-01", "2026-03-01"]
+    assert data["totals"] == [10.0, 0.0, 108.0]
+    assert data["series"] == [
+        {"category": "Rent", "totals": [0.0, 0.0, 100.0], "counts": [0, 0, 1]},
+        {"category": "Food", "totals": [10.0, 0.0, 8.0], "counts": [1, 0, 3]},
+    ]
+
+    response = client.get(
+        "/api/v1/expenses/trends?bucket=day&tz=America/New_York&from_date=2026-03-07&to_date=2026-03-09"
+        "&category=FOOD",
+        headers=authHeaders
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["buckets"], data["totals"]) == (["2026-03-07", "2026-03-08", "2026-03-09"], [1.0, 0.0, 2.0])
+
+    data = client.get("/api/v1/expenses/trends?bucket=week&from_date=2026-03-01", headers=authHeaders).json()
+    assert data["buckets"] == ["2026-02-23", "2026-03-02", "2026-03-09"]
+    assert data["totals"] == [0.0, 106.0, 2.0]
+
+    assert client.get("/api/v1/expenses/trends?tz=Mars/Olympus", headers=authHeaders).status_code == 400
+    data = client.get("/api/v1/expenses/trends?category=Travel", headers=authHeaders).json()
+    assert (data["buckets"], data["series"]) == ([], [])
+
+
 # ============================================================================
 # User Isolation Tests
 # ============================================================================
@@ -491,5 +1216,382 @@ def test_user_cannot_access_other_user_expenses(client, testDb):
     assert response.status_code == 404  # Should not find it
 
 
+# ============================================================================
+# Batch Endpoint Tests
+# ============================================================================
+
+def test_batch_runs_read_requests_with_one_authentication(client, authHeaders, testExpense, monkeypatch):
+    """Test a batch returns each read route's own response and verifies the token once."""
+    etag = client.get(f"/api/v1/expenses/{testExpense.id}", headers=authHeaders).headers["ETag"]
+    verifications = []
+    verifyToken = auth.verifyToken
+    monkeypatch.setattr(auth, "verifyToken", lambda *args: verifications.append(1) or verifyToken(*args))
+
+    response = client.post("/api/v1/batch", headers=authHeaders, json={"requests": [
+        {"path": "/api/v1/auth/me"},
+        {"path": "/api/v1/expenses?page_size=5&sort_by=amount"},
+        {"path": "/api/v1/expenses/summary"},
+        {"path": "/api/v1/expenses/trends?bucket=day"},
+        {"path": f"/api/v1/expenses/{testExpense.id}", "if_none_match": etag},
+        {"path": "/api/v1/expenses?page=0"},
+        {"path": "/api/v1/expenses/export"},
+        {"path": "/api/v1/batch"},
+    ]})
+    assert response.status_code == 200
+    assert len(verifications) == 1
+    me, page, summary, trends, expense, invalid, export, nested = response.json()["responses"]
+    assert me["status"] == 200 and me["body"]["username"] == "testuser"
+    assert page["body"]["items"][0]["id"] == testExpense.id
+    assert page["etag"] == client.get("/api/v1/expenses?page_size=5&sort_by=amount", headers=authHeaders).headers["ETag"]
+    assert summary["body"]["total_spending"] == 50.0
+    assert trends["body"]["series"][0]["totals"] == [50.0]
+    assert expense == {"status": 304, "etag": etag, "body": None}
+    assert invalid["status"] == 422
+    assert export["status"] == nested["status"] == 400
+    assert export["body"]["error"]["message"] == "Not a read route that can be batched: /api/v1/expenses/export"
+
+    assert client.post("/api/v1/batch", json={"requests": [{"path": "/api/v1/auth/me"}]}).status_code == 401
+    response = client.post("/api/v1/batch", headers=authHeaders, json={"requests": [{"path": "expenses"}]})
+    assert response.status_code == 422
+
+
+def test_batch_bypasses_response_cache(client, authHeaders, testExpense, monkeypatch):
+    """Test batch sub-requests neither read nor fill the response cache, which may be newer than their snapshot."""
+    monkeypatch.setattr(settings, "RESPONSE_CACHE_ENABLED", True)
+    client.get("/api/v1/expenses/summary", headers=authHeaders)
+    cached = responsecache.responseCache.snapshot()
+    response = client.post("/api/v1/batch", headers=authHeaders, json={"requests": [
+        {"path": "/api/v1/expenses/summary"}, {"path": "/api/v1/expenses"}
+    ]})
+    assert [item["status"] for item in response.json()["responses"]] == [200, 200]
+    after = responsecache.responseCache.snapshot()
+    assert (after["hits"], after["size"]) == (cached["hits"], cached["size"])
+
+
+def test_batch_read_snapshot_ignores_later_commits(tmp_path):
+    """Test reads after beginReadSnapshot keep seeing the data as of the first read."""
+    dbEngine = createDbEngine(f"sqlite:///{tmp_path / 'snapshot.db'}", profile="production")
+    Base.metadata.create_all(bind=dbEngine)
+    SnapshotSession = sessionmaker(bind=dbEngine)
+    countExpenses = text("SELECT count(*) FROM expenses")
+    with SnapshotSession() as reader, SnapshotSession() as writer:
+        beginReadSnapshot(reader)
+        assert reader.execute(countExpenses).scalar() == 0
+        writer.add(Expense(amount=1.0, category="Food", description="Later", user_id=1))
+        writer.commit()
+        assert reader.execute(countExpenses).scalar() == 0
+        reader.rollback()
+        assert reader.execute(countExpenses).scalar() == 1
+    dbEngine.dispose()
+
+
+# ============================================================================
+# Event Stream Tests
+# ============================================================================
+
+def parseEvents(body: str) -> list:
+    """Split a text/event-stream body into (event, id, data) tuples, skipping comments."""
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.split("\n") if not line.startswith(":"))
+        if fields:
+            events.append((fields["event"], fields.get("id"), json.loads(fields["data"])))
+    return events
+
+
+def test_expense_events_push_writes_and_summaries(client, authHeaders, testExpense, monkeypatch):
+    """Test the event stream sends the summary, then each write as it commits with a new summary."""
+    monkeypatch.setattr(settings, "EVENTS_MAX_STREAM_SECONDS", 1.0)
+    monkeypatch.setattr(settings, "EVENTS_HEARTBEAT_SECONDS", 0.2)
+    created = {}
+
+    def writeLater():
+        threading.Event().wait(0.3)
+        created.update(client.post("/api/v1/expenses", headers=authHeaders, json={
+            "amount": 20.0, "category": "Transport", "description": "Bus"
+        }).json())
+
+    writerThread = threading.Thread(target=writeLater)
+    writerThread.start()
+    response = client.get("/api/v1/expenses/events", headers=authHeaders)
+    writerThread.join()
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert ": keep-alive" in response.text
+    events = parseEvents(response.text)
+    assert [name for name, _, _ in events] == ["summary", "created", "summary"]
+    assert events[0][2]["total_spending"] == 50.0
+    assert events[1][2]["id"] == created["id"] and events[1][1]
+    assert events[2][2]["total_spending"] == 70.0
+    assert expenseChanges.snapshot()["streams"] == 0
+
+    # Resuming from the first event's position replays what came after it
+    client.put(f"/api/v1/expenses/{testExpense.id}", headers=authHeaders, json={"amount": 5.0})
+    client.delete(f"/api/v1/expenses/{created['id']}", headers=authHeaders)
+    response = client.get("/api/v1/expenses/events", headers={**authHeaders, "Last-Event-ID": events[1][1]})
+    names = [(name, data.get("id")) for name, _, data in parseEvents(response.text)]
+    assert names == [("summary", None), ("updated", testExpense.id), ("deleted", created["id"]), ("summary", None)]
+
+    response = client.get("/api/v1/expenses/events?since=bogus", headers=authHeaders)
+    assert response.status_code == 400
+
+
+def test_expense_events_limit_streams_per_user(client, authHeaders, testUser, monkeypatch):
+    """Test a user cannot open more than EVENTS_MAX_STREAMS_PER_USER streams."""
+    async def fillStreams():
+        return [expenseChanges.subscribe(testUser.id) for _ in range(expenseChanges.maxPerUser)]
+
+    subscriptions = asyncio.run(fillStreams())
+    try:
+        response = client.get("/api/v1/expenses/events", headers=authHeaders)
+        assert response.status_code == 429
+        assert response.json()["error"]["message"] == "Too many open event streams"
+    finally:
+        for subscription in subscriptions:
+            expenseChanges.unsubscribe(subscription)
+
+
+# ============================================================================
+# Database Profile Tests
+# ============================================================================
+
+def test_production_profile_applies_sqlite_pragmas(tmp_path):
+    """Test the production profile enables WAL and tuned pragmas on each connection."""
+    dbEngine = createDbEngine(f"sqlite:///{tmp_path / 'profile.db'}", profile="production")
+    with dbEngine.connect() as connection:
+        assert connection.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert connection.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert connection.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+        assert connection.execute(text("PRAGMA temp_store")).scalar() == 2  # MEMORY
+    assert dbEngine.pool.size() == 10
+    dbEngine.dispose()
+
+
+def test_legacy_profile_keeps_sqlite_defaults(tmp_path):
+    """Test the legacy profile leaves SQLite in rollback-journal mode."""
+    dbEngine = createDbEngine(f"sqlite:///{tmp_path / 'legacy.db'}", profile="legacy")
+    with dbEngine.connect() as connection:
+        assert connection.execute(text("PRAGMA journal_mode")).scalar() == "delete"
+    dbEngine.dispose()
+
+
+def test_migrations_upgrade_existing_expenses_table(tmp_path):
+    """Test an expenses table from before change_seq, categories, search and cents is upgraded in place, idempotently."""
+    dbEngine = createDbEngine(f"sqlite:///{tmp_path / 'old.db'}", profile="legacy")
+    with dbEngine.begin() as connection:
+        connection.execute(text(
+            "CREATE TABLE expenses (id INTEGER PRIMARY KEY, amount FLOAT NOT NULL, "
+            "category VARCHAR NOT NULL, description VARCHAR NOT NULL, date DATETIME, "
+            "created_at DATETIME, updated_at DATETIME, is_deleted BOOLEAN, user_id INTEGER NOT NULL)"
+        ))
+        connection.execute(text(
+            "INSERT INTO expenses (id, amount, category, description, user_id) "
+            "VALUES (1, 1.0, 'Food', 'a', 1), (2, 2.0, 'Food', 'b', 1), (3, 3.0, ' food', 'c', 1), "
+            "(4, 19.99, 'Rent', 'd', 1), (5, 0.285, 'Food', 'e', 2)"
+        ))
+
+    # Same steps as initDb: create missing tables, then upgrade existing ones
+    for _ in range(2):
+        Base.metadata.create_all(bind=dbEngine)
+        runMigrations(dbEngine)
+    with dbEngine.connect() as connection:
+        assert connection.execute(text("SELECT change_seq FROM expenses ORDER BY id")).scalars().all() == [1, 2, 3, 4, 5]
+        assert connection.execute(text("SELECT amount_cents FROM expenses ORDER BY id")).scalars().all() == [
+            100, 200, 300, 1999, 29
+        ]
+        categories = connection.execute(text(
+            "SELECT e.id, c.user_id, c.name_key FROM expenses e JOIN categories c ON c.id = e.category_id ORDER BY e.id"
+        )).all()
+        indexes = {row[1] for row in connection.execute(text("PRAGMA index_list(expenses)"))}
+        matched = connection.execute(text(
+            "SELECT rowid FROM expenses_fts WHERE expenses_fts MATCH 'b OR d'"
+        )).scalars().all()
+    assert matched == [2, 4]
+    assert categories == [(1, 1, "food"), (2, 1, "food"), (3, 1, "food"), (4, 1, "rent"), (5, 2, "food")]
+    assert {"ix_expenses_user_change_seq", "ix_expenses_user_category", "ix_expenses_user_date"} <= indexes
+    dbEngine.dispose()
+
+
+# ============================================================================
+# Async Database Path Tests
+# ============================================================================
+
+@pytest.fixture
+def asyncClient(testDb):
+    """Create a test client for an app serving the async endpoints."""
+    asyncTestEngine = create_async_engine(
+        getAsyncDatabaseUrl(SQLALCHEMY_TEST_DATABASE_URL), poolclass=NullPool
+    )
+    AsyncTestSessionLocal = async_sessionmaker(asyncTestEngine, expire_on_commit=False)
+
+    async def overrideGetAsyncDb():
+        async with AsyncTestSessionLocal() as db:
+            yield db
+
+    asyncApp = FastAPI()
+    asyncApp.state.limiter = limiter
+    installAsyncRoutes(asyncApp)
+    asyncApp.dependency_overrides[getAsyncDb] = overrideGetAsyncDb
+    with TestClient(asyncApp) as testClient:
+        yield testClient
+
+
+def test_async_database_url_derivation():
+    """Test async driver URLs are derived from sync database URLs."""
+    assert getAsyncDatabaseUrl("sqlite:///./x.db") == "sqlite+aiosqlite:///./x.db"
+    assert getAsyncDatabaseUrl("postgresql://u:p@h/db") == "postgresql+asyncpg://u:p@h/db"
+    assert getAsyncDatabaseUrl("sqlite+aiosqlite:///./x.db") == "sqlite+aiosqlite:///./x.db"
+
+
+def test_async_routes_document_like_sync_routes():
+    """Test every async route replaces a sync route with the same OpenAPI description and response model."""
+    syncRoutes = {
+        (route.path, frozenset(route.methods)): route
+        for route in app.router.routes if hasattr(route, "description")
+    }
+    for route in asyncRouter.routes:
+        syncRoute = syncRoutes[(route.path, frozenset(route.methods))]
+        assert route.description == syncRoute.description, route.path
+        assert route.response_model == syncRoute.response_model, route.path
+
+
+def test_async_endpoints_crud_flow(asyncClient, monkeypatch):
+    """Test register, login and expense CRUD through the AsyncSession endpoints."""
+    response = asyncClient.post("/api/v1/auth/register", json={
+        "email": "async@example.com", "username": "asyncuser", "password": "AsyncPass123"
+    })
+    assert response.status_code == 201
+
+    response = asyncClient.post("/api/v1/auth/login", json={
+        "username": "asyncuser", "password": "AsyncPass123"
+    })
+    assert response.status_code == 200
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    response = asyncClient.post("/api/v1/expenses", headers=headers, json={
+        "amount": 42.0, "category": "Food", "description": "Async lunch"
+    })
+    assert response.status_code == 201
+    expenseId = response.json()["id"]
+
+    response = asyncClient.get("/api/v1/expenses?category=food", headers=headers)
+    assert response.json()["total"] == 1
+    response = asyncClient.get("/api/v1/expenses?q=LUNCH", headers=headers)
+    assert response.json()["total"] == 1
+    response = asyncClient.get("/api/v1/expenses/trends?bucket=day&tz=Europe/Berlin", headers=headers)
+    assert response.json()["series"][0]["totals"] == [42.0]
+    response = asyncClient.get("/api/v1/categories?prefix=fo", headers=headers)
+    assert response.json()["categories"] == [{"name": "Food", "count": 1}]
+    response = asyncClient.post("/api/v1/batch", headers=headers, json={"requests": [
+        {"path": "/api/v1/auth/me"}, {"path": "/api/v1/expenses/summary"}
+    ]})
+    assert [item["status"] for item in response.json()["responses"]] == [200, 200]
+    assert response.json()["responses"][1]["body"]["total_spending"] == 42.0
+    response = asyncClient.post("/api/v1/expenses/lookup", headers=headers, json={"ids": [expenseId, expenseId + 1]})
+    assert response.json()["missing"] == [expenseId + 1]
+    assert response.json()["items"][0]["description"] == "Async lunch"
+
+    response = asyncClient.put(
+        f"/api/v1/expenses/{expenseId}", headers=headers, json={"amount": 50.0}
+    )
+    assert response.json()["amount"] == 50.0
+
+    response = asyncClient.get("/api/v1/expenses/summary", headers=headers)
+    assert response.json()["total_spending"] == 50.0
+    response = asyncClient.get(
+        "/api/v1/expenses/summary", headers={**headers, "If-None-Match": response.headers["ETag"]}
+    )
+    assert response.status_code == 304
+
+    assert asyncClient.delete(f"/api/v1/expenses/{expenseId}", headers=headers).status_code == 204
+    assert asyncClient.get(f"/api/v1/expenses/{expenseId}", headers=headers).status_code == 404
+
+    # A stream that has already run out still sends the changes since its token
+    monkeypatch.setattr(settings, "EVENTS_MAX_STREAM_SECONDS", 0.0)
+    response = asyncClient.get(f"/api/v1/expenses/events?since={formatSyncToken(0, 0)}", headers=headers)
+    events = parseEvents(response.text)
+    assert [name for name, _, _ in events] == ["summary", "deleted", "summary"]
+    assert events[1][2]["id"] == expenseId and events[2][2]["total_spending"] == 0.0
+
+
+# ============================================================================
+# Group Commit Writer Tests
+# ============================================================================
+
+@pytest.fixture
+def testWriter(testDb):
+    """Create a group-commit writer bound to the test database."""
+    groupWriter = writer.GroupCommitWriter(
+        SQLALCHEMY_TEST_DATABASE_URL, batchWindowMs=50, profile="legacy"
+    )
+    groupWriter.start()
+    yield groupWriter
+    groupWriter.stop()
+
+
+def test_group_commit_writer_batches_writes(testWriter, testDb, testUser):
+    """Test queued writes share commits and a failing item does not abort its batch."""
+    futures = [
+        testWriter.submit(partial(
+            insertExpense,
+            userId=testUser.id,
+            expense=ExpenseCreate(amount=10.0 + i, category="Food", description=f"Item {i}")
+        ))
+        for i in range(20)
+    ]
+    failing = testWriter.submit(partial(softDeleteOwnedExpense, expenseId=9999, userId=testUser.id))
+
+    results = [future.result(timeout=10) for future in futures]
+    with pytest.raises(HTTPException):
+        failing.result(timeout=10)
+
+    assert len({result.id for result in results}) == 20
+    assert testWriter.stats["items"] == 20
+    assert testWriter.stats["failed_items"] == 1
+    assert testWriter.stats["batches"] < 20
+    assert testDb.query(Expense).count() == 20
+
+
+def test_expense_writes_through_write_queue(client, authHeaders, testWriter, monkeypatch):
+    """Test create, update and delete endpoints acknowledge after the writer commits."""
+    monkeypatch.setattr(settings, "WRITE_QUEUE_ENABLED", True)
+    monkeypatch.setattr(writer, "expenseWriter", testWriter)
+
+    response = client.post("/api/v1/expenses", headers=authHeaders, json={
+        "amount": 12.5, "category": "Transport", "description": "Bus"
+    })
+    assert response.status_code == 201
+    expenseId = response.json()["id"]
+
+    response = client.put(
+        f"/api/v1/expenses/{expenseId}", headers=authHeaders, json={"amount": 15.0}
+    )
+    assert response.status_code == 200
+    assert response.json()["amount"] == 15.0
+
+    assert client.delete(f"/api/v1/expenses/{expenseId}", headers=authHeaders).status_code == 204
+    assert client.delete(f"/api/v1/expenses/{expenseId}", headers=authHeaders).status_code == 404
+    assert testWriter.stats["items"] == 3
+
+
+def test_timed_out_queued_write_is_cancelled(client, authHeaders, testDb, monkeypatch):
+    """Test a write that times out before its batch starts is never applied."""
+    stalledWriter = writer.GroupCommitWriter(SQLALCHEMY_TEST_DATABASE_URL, profile="legacy")
+    monkeypatch.setattr(settings, "WRITE_QUEUE_ENABLED", True)
+    monkeypatch.setattr(settings, "WRITE_QUEUE_TIMEOUT_SECONDS", 0.05)
+    monkeypatch.setattr(writer, "expenseWriter", stalledWriter)
+
+    response = client.post("/api/v1/expenses", headers=authHeaders, json={
+        "amount": 12.5, "category": "Transport", "description": "Bus"
+    })
+    assert response.status_code == 503
+
+    # The writer starts late and must skip the cancelled item
+    stalledWriter.start()
+    stalledWriter.stop()
+    assert testDb.query(Expense).count() == 0
+    assert stalledWriter.stats["items"] == 0
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
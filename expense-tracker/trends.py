@@ -0,0 +1,355 @@
+"""
+Spending trends bucketed by day, week or month in the database.
+
+Clients chart spend per category over time. Rather than downloading every
+expense, GET /expenses/trends groups by (time bucket, category) in SQL and
+returns one row per non-empty bucket and category, which trendsResponse turns
+into dense arrays aligned on a shared list of buckets.
+
+Expense dates are stored in UTC, but buckets follow the caller's time zone:
+a local day starts at local midnight, and that midnight moves with daylight
+saving time. SQLite has no time zone rules, so the UTC offsets in force over
+the queried range are worked out here with zoneinfo and passed in as a CASE
+on the expense date (one branch per DST transition). SQLite then shifts each
+date by its offset and truncates it to the bucket; only the aggregated rows
+are sent back. No rollup tables exist, so every call aggregates the
+expenses themselves.
+"""
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterable, List, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from fastapi import HTTPException, status
+from sqlalchemy import Integer, case, func, select
+
+from models import Category, Expense, centsToAmount
+from queries import parseDateParam
+
+# Upper bound on buckets in one response (about ten years of days)
+MAX_TREND_BUCKETS = 3660
+
+TREND_BUCKETS = ("day", "week", "month")
+
+
+def parseTimezone(name: str) -> ZoneInfo:
+    """
+    Resolve an IANA time zone name.
+
+    Args:
+        name: Zone name from the query string (e.g. "Europe/Berlin")
+
+    Returns:
+        The time zone
+
+    Raises:
+        HTTPException: If the zone is unknown
+    """
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown timezone: {name}"
+        )
+
+
+def localMidnightUtc(day: date, zone: ZoneInfo) -> datetime:
+    """
+    Return the UTC instant of local midnight, as stored (naive UTC).
+
+    Args:
+        day: Local calendar day
+        zone: Time zone of the day
+
+    Returns:
+        Naive UTC datetime
+    """
+    localMidnight = datetime(day.year, day.month, day.day, tzinfo=zone)
+    return localMidnight.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def buildLocalDateFilters(from_date: Optional[str], to_date: Optional[str], zone: ZoneInfo) -> List:
+    """
+    Build date range conditions on local days; to_date is inclusive.
+
+    Args:
+        from_date: Optional start date (YYYY-MM-DD) in the zone
+        to_date: Optional end date (YYYY-MM-DD) in the zone
+        zone: Time zone of the dates
+
+    Returns:
+        List of SQLAlchemy filter conditions
+    """
+    conditions = []
+    if from_date:
+        conditions.append(Expense.date >= localMidnightUtc(parseDateParam(from_date, "from_date"), zone))
+    if to_date:
+        endDay = parseDateParam(to_date, "to_date") + timedelta(days=1)
+        conditions.append(Expense.date < localMidnightUtc(endDay, zone))
+    return conditions
+
+
+def utcOffsetSegments(zone: ZoneInfo, startUtc: datetime, endUtc: datetime) -> List[Tuple[datetime, int]]:
+    """
+    List the UTC offsets a zone uses between two instants.
+
+    The range is scanned a day at a time and each change is narrowed down to
+    the second, so a year costs a few hundred offset lookups.
+
+    Args:
+        zone: Time zone
+        startUtc: Start of the range (naive UTC)
+        endUtc: End of the range (naive UTC)
+
+    Returns:
+        (naive UTC start, offset in seconds) per segment, in order; the first
+        segment applies to everything before the second one
+    """
+    def offsetAt(instant: datetime) -> int:
+        return int(instant.replace(tzinfo=timezone.utc).astimezone(zone).utcoffset().total_seconds())
+
+    step = timedelta(days=1)
+    current = startUtc - step
+    segments = [(current, offsetAt(current))]
+    while current <= endUtc:
+        following = current + step
+        if offsetAt(following) != segments[-1][1]:
+            low, high = current, following
+            while high - low > timedelta(seconds=1):
+                middle = low + (high - low) / 2
+                if offsetAt(middle) == segments[-1][1]:
+                    low = middle
+                else:
+                    high = middle
+            segments.append((high.replace(microsecond=0), offsetAt(high)))
+        current = following
+    return segments
+
+
+def buildBucketExpression(bucket: str, segments: List[Tuple[datetime, int]]):
+    """
+    Build the SQL expression mapping an expense date to its local bucket.
+
+    Args:
+        bucket: day, week (starting Monday) or month
+        segments: Result of utcOffsetSegments for the queried range
+
+    Returns:
+        SQL expression giving the bucket's local start date (YYYY-MM-DD)
+    """
+    # Date modifiers ("-18000 seconds") are applied while the date is parsed,
+    # which is cheaper than a round trip through unixepoch
+    if len(segments) == 1:
+        shift = [f"{segments[0][1]:+d} seconds"] if segments[0][1] else []
+    else:
+        shift = [case(
+            *[(Expense.date >= start, f"{seconds:+d} seconds") for start, seconds in reversed(segments[1:])],
+            else_=f"{segments[0][1]:+d} seconds"
+        )]
+    if bucket == "day":
+        return func.date(Expense.date, *shift)
+    if bucket == "week":
+        return func.date(Expense.date, *shift, "-6 days", "weekday 1")
+    return func.strftime("%Y-%m-01", Expense.date, *shift)
+
+
+def buildDateSpanQuery(conditions: List):
+    """
+    Build the query for the first and last expense date matching the filters.
+
+    Args:
+        conditions: Filter conditions scoped to the user
+
+    Returns:
+        SELECT of (min date, max date)
+    """
+    return select(func.min(Expense.date), func.max(Expense.date)).where(*conditions)
+
+
+def buildTrendsQuery(conditions: List, bucket: str, segments: List[Tuple[datetime, int]]):
+    """
+    Build the per-bucket, per-category aggregate.
+
+    Args:
+        conditions: Filter conditions scoped to the user
+        bucket: day, week or month
+        segments: Result of utcOffsetSegments for the queried range
+
+    Returns:
+        SELECT of (bucket start, category name, total cents, count)
+    """
+    bucketStart = buildBucketExpression(bucket, segments).label("bucket_start")
+    return (
+        select(bucketStart, Category.name, func.sum(Expense.amount, type_=Integer), func.count(Expense.id))
+        .join(Category, Category.id == Expense.category_id)
+        .where(*conditions)
+        # By label, so the bucket expression is not repeated (and evaluated twice)
+        .group_by("bucket_start", Category.id, Category.name)
+    )
+
+
+def bucketStartOf(day: date, bucket: str) -> date:
+    """
+    Truncate a local date to the start of its bucket.
+
+    Args:
+        day: Local date
+        bucket: day, week or month
+
+    Returns:
+        First day of the bucket
+    """
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    if bucket == "month":
+        return day.replace(day=1)
+    return day
+
+
+def nextBucketStart(day: date, bucket: str) -> date:
+    """
+    Return the start of the following bucket.
+
+    Args:
+        day: Start of a bucket
+        bucket: day, week or month
+
+    Returns:
+        Start of the next bucket
+    """
+    if bucket == "day":
+        return day + timedelta(days=1)
+    if bucket == "week":
+        return day + timedelta(days=7)
+    return date(day.year + day.month // 12, day.month % 12 + 1, 1)
+
+
+def listBuckets(first: date, last: date, bucket: str) -> List[str]:
+    """
+    List every bucket between two dates, empty ones included.
+
+    Args:
+        first: Local date in the first bucket
+        last: Local date in the last bucket
+        bucket: day, week or month
+
+    Returns:
+        Bucket start dates (YYYY-MM-DD)
+
+    Raises:
+        HTTPException: If the range has more than MAX_TREND_BUCKETS buckets
+    """
+    buckets = []
+    current, end = bucketStartOf(first, bucket), bucketStartOf(last, bucket)
+    while current <= end:
+        if len(buckets) == MAX_TREND_BUCKETS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"More than {MAX_TREND_BUCKETS} buckets; use a larger bucket or a shorter range"
+            )
+        buckets.append(current.isoformat())
+        current = nextBucketStart(current, bucket)
+    return buckets
+
+
+def toLocalDate(instant: datetime, zone: ZoneInfo) -> date:
+    """Convert a naive UTC instant to its local calendar date."""
+    return instant.replace(tzinfo=timezone.utc).astimezone(zone).date()
+
+
+def planTrends(
+    bucket: str,
+    zone: ZoneInfo,
+    from_date: Optional[str],
+    to_date: Optional[str],
+    span: Optional[Tuple[Optional[datetime], Optional[datetime]]]
+) -> Optional[Tuple[List[str], List[Tuple[datetime, int]]]]:
+    """
+    Work out the buckets and UTC offsets a trends response covers.
+
+    Explicit dates win; a missing one is taken from the first or last
+    matching expense.
+
+    Args:
+        bucket: day, week or month
+        zone: Time zone of the buckets and dates
+        from_date: Optional start date (YYYY-MM-DD) in the zone
+        to_date: Optional end date (YYYY-MM-DD) in the zone
+        span: (min date, max date) from buildDateSpanQuery; only needed when
+            a date is missing
+
+    Returns:
+        (buckets from listBuckets, segments from utcOffsetSegments), or None
+        when the range is empty
+
+    Raises:
+        HTTPException: If a date is malformed or there are too many buckets
+    """
+    firstDate, lastDate = span or (None, None)
+    if from_date:
+        startUtc = localMidnightUtc(parseDateParam(from_date, "from_date"), zone)
+    elif firstDate is not None:
+        startUtc = firstDate.replace(tzinfo=None)
+    else:
+        return None
+    if to_date:
+        endDay = parseDateParam(to_date, "to_date") + timedelta(days=1)
+        endUtc = localMidnightUtc(endDay, zone) - timedelta(microseconds=1)
+    elif lastDate is not None:
+        endUtc = lastDate.replace(tzinfo=None)
+    else:
+        return None
+    if endUtc < startUtc:
+        return None
+    buckets = listBuckets(toLocalDate(startUtc, zone), toLocalDate(endUtc, zone), bucket)
+    return buckets, utcOffsetSegments(zone, startUtc, endUtc)
+
+
+def trendsResponse(
+    rows: Iterable[Tuple[str, str, int, int]],
+    bucket: str,
+    timezoneName: str,
+    buckets: List[str]
+) -> dict:
+    """
+    Pivot aggregate rows into dense per-category arrays.
+
+    Args:
+        rows: Result of buildTrendsQuery
+        bucket: day, week or month
+        timezoneName: Zone the buckets are in
+        buckets: Every bucket in the range, from listBuckets
+
+    Returns:
+        Dictionary matching the ExpenseTrendsResponse schema
+    """
+    positions = {bucketStart: position for position, bucketStart in enumerate(buckets)}
+    totalCents = [0] * len(buckets)
+    seriesByCategory = {}
+    for bucketStart, category, cents, count in rows:
+        position = positions.get(bucketStart)
+        if position is None:
+            continue
+        series = seriesByCategory.get(category)
+        if series is None:
+            series = seriesByCategory[category] = ([0] * len(buckets), [0] * len(buckets))
+        series[0][position] = cents
+        series[1][position] = count
+        totalCents[position] += cents
+
+    # Largest categories first
+    ordered = sorted(seriesByCategory.items(), key=lambda item: (-sum(item[1][0]), item[0]))
+    return {
+        "bucket": bucket,
+        "timezone": timezoneName,
+        "buckets": buckets,
+        "totals": [centsToAmount(cents) for cents in totalCents],
+        "series": [
+            {
+                "category": category,
+                "totals": [centsToAmount(cents) for cents in centsList],
+                "counts": counts
+            }
+            for category, (centsList, counts) in ordered
+        ]
+    }
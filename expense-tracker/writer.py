@@ -0,0 +1,254 @@
+"""
+Single-writer queue with group commit for expense writes.
+
+SQLite serializes writers, so many request threads committing on their own
+contend for the write lock ("database is locked") and each commit pays its
+own fsync. With WRITE_QUEUE_ENABLED=true, write endpoints hand their work to
+one dedicated writer thread instead. The writer drains the queue every few
+milliseconds, runs each item in a SAVEPOINT (so one failing item does not
+abort its neighbours), commits the whole batch once, and only then resolves
+each request's future. Every acknowledged write is therefore durable, and a
+burst of N writes costs one commit instead of N.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Optional, TypeVar
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, sessionmaker
+
+from config import settings
+from database import createDbEngine, isSqliteUrl
+
+T = TypeVar("T")
+
+# Sentinel placed on the queue to stop the writer thread after draining
+STOP_SIGNAL = object()
+
+
+class WriteQueueFullError(Exception):
+    """Raised when the write queue is full and cannot accept more work."""
+    pass
+
+
+class GroupCommitWriter:
+    """
+    Dedicated writer thread that commits queued work items in batches.
+
+    Work items are callables that receive the writer's Session, perform their
+    changes (without committing) and return a result. Results should be plain
+    data (e.g. Pydantic models) because the session is closed after the batch.
+    """
+
+    def __init__(
+        self,
+        databaseUrl: str,
+        batchWindowMs: int = 5,
+        maxBatchSize: int = 200,
+        maxPending: int = 10000,
+        profile: str = settings.DATABASE_PROFILE
+    ) -> None:
+        """
+        Initialize the writer (call start() before submitting work).
+
+        Args:
+            databaseUrl: Database the writer commits to
+            batchWindowMs: How long to collect work after the first item arrives
+            maxBatchSize: Maximum number of items committed together
+            maxPending: Maximum queued items before submit() rejects work
+            profile: Database profile for the writer's engine
+        """
+        self.batchWindowSeconds = batchWindowMs / 1000
+        self.maxBatchSize = maxBatchSize
+        self.engine = createDbEngine(databaseUrl, profile=profile)
+        if isSqliteUrl(databaseUrl):
+            self._configureSqliteTransactions()
+        self.sessionFactory = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+
+        self._queue: queue.Queue = queue.Queue(maxsize=maxPending)
+        self._thread: Optional[threading.Thread] = None
+        self._statsLock = threading.Lock()
+        self.stats = {"batches": 0, "items": 0, "failed_items": 0, "failed_batches": 0}
+
+    def _configureSqliteTransactions(self) -> None:
+        """
+        Make SQLite transactions explicit on the writer's connections.
+
+        pysqlite only emits BEGIN before DML, so a leading SAVEPOINT would run
+        outside a transaction and its RELEASE would commit immediately. Taking
+        control of BEGIN keeps the whole batch in one transaction, and
+        BEGIN IMMEDIATE takes the write lock up front. synchronous=FULL makes
+        every batch commit durable before requests are acknowledged.
+        """
+        @event.listens_for(self.engine, "connect")
+        def onConnect(dbapiConnection, connectionRecord):
+            dbapiConnection.isolation_level = None
+            cursor = dbapiConnection.cursor()
+            cursor.execute("PRAGMA synchronous = FULL")
+            cursor.close()
+
+        @event.listens_for(self.engine, "begin")
+        def onBegin(connection):
+            connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+    def start(self) -> None:
+        """Start the writer thread if it is not already running."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="expense-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """
+        Stop the writer thread after committing already queued work.
+
+        Args:
+            timeout: Seconds to wait for the thread to finish
+        """
+        if self._thread is None:
+            return
+        self._queue.put(STOP_SIGNAL)
+        self._thread.join(timeout)
+        self._thread = None
+        self.engine.dispose()
+
+    def submit(self, work: Callable[[Session], T]) -> "Future[T]":
+        """
+        Queue a work item for the next batch.
+
+        Args:
+            work: Callable receiving the writer's Session
+
+        Returns:
+            Future resolved with the work's result once its batch has committed
+
+        Raises:
+            WriteQueueFullError: If too many writes are already pending
+        """
+        future: Future = Future()
+        try:
+            self._queue.put_nowait((work, future))
+        except queue.Full:
+            raise WriteQueueFullError("Write queue is full")
+        return future
+
+    def execute(self, work: Callable[[Session], T], timeout: Optional[float] = None) -> T:
+        """
+        Queue a work item and block until its batch has committed.
+
+        Args:
+            work: Callable receiving the writer's Session
+            timeout: Optional seconds to wait for the commit
+
+        Returns:
+            Result returned by the work item
+
+        Raises:
+            Exception: Whatever the work item raised, or the commit error
+        """
+        return self.submit(work).result(timeout)
+
+    def _run(self) -> None:
+        """Writer loop: collect a batch, commit it, repeat until stopped."""
+        while True:
+            item = self._queue.get()
+            if item is STOP_SIGNAL:
+                return
+
+            batch = [item]
+            stopAfterBatch = False
+            deadline = time.monotonic() + self.batchWindowSeconds
+            while len(batch) < self.maxBatchSize:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is STOP_SIGNAL:
+                    stopAfterBatch = True
+                    break
+                batch.append(item)
+
+            self._commitBatch(batch)
+            if stopAfterBatch:
+                return
+
+    def _commitBatch(self, batch: list) -> None:
+        """
+        Run a batch of work items in one transaction and resolve their futures.
+
+        Args:
+            batch: List of (work, future) tuples
+        """
+        completed = []
+        failedItems = 0
+        session = self.sessionFactory()
+        try:
+            for work, future in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    with session.begin_nested():
+                        result = work(session)
+                except Exception as exc:
+                    failedItems += 1
+                    future.set_exception(exc)
+                else:
+                    completed.append((future, result))
+            session.commit()
+        except Exception as exc:
+            session.rollback()
+            for future, _ in completed:
+                future.set_exception(exc)
+            with self._statsLock:
+                self.stats["failed_batches"] += 1
+            return
+        finally:
+            session.close()
+
+        # Acknowledge only after the batch is committed
+        for future, result in completed:
+            future.set_result(result)
+
+        with self._statsLock:
+            self.stats["batches"] += 1
+            self.stats["items"] += len(completed)
+            self.stats["failed_items"] += failedItems
+
+
+# Process-wide writer, created on first use when WRITE_QUEUE_ENABLED is set
+expenseWriter: Optional[GroupCommitWriter] = None
+expenseWriterLock = threading.Lock()
+
+
+def getExpenseWriter() -> GroupCommitWriter:
+    """
+    Return the process-wide expense writer, starting it on first use.
+
+    Returns:
+        Running GroupCommitWriter bound to DATABASE_URL
+    """
+    global expenseWriter
+    with expenseWriterLock:
+        if expenseWriter is None:
+            expenseWriter = GroupCommitWriter(
+                settings.DATABASE_URL,
+                batchWindowMs=settings.WRITE_QUEUE_BATCH_WINDOW_MS,
+                maxBatchSize=settings.WRITE_QUEUE_MAX_BATCH_SIZE,
+                maxPending=settings.WRITE_QUEUE_MAX_PENDING
+            )
+            expenseWriter.start()
+        return expenseWriter
+
+
+def stopExpenseWriter() -> None:
+    """Drain and stop the process-wide expense writer if it was started."""
+    global expenseWriter
+    with expenseWriterLock:
+        if expenseWriter is not None:
+            expenseWriter.stop()
+            expenseWriter = None